@@ -5,3 +5,5 @@ class AuthkitConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.authkit'
 
+    def ready(self):
+        import apps.authkit.signals
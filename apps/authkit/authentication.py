@@ -1,7 +1,7 @@
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
-from apps.authkit.models import User
-from django.conf import settings
+from apps.authkit.principal_cache import principal_cache
+from apps.authkit.token_cache import token_cache, TokenRevoked
 import jwt
 from rest_framework.exceptions import APIException
 
@@ -35,25 +35,25 @@ class CookieJWTAuthentication(BaseAuthentication):
             }, status_code=401)
 
         try:
-            payload = jwt.decode(
-                token,
-                settings.SIMPLE_JWT['SIGNING_KEY'],
-                algorithms=[settings.SIMPLE_JWT['ALGORITHM']]
-            )
+            payload = token_cache.decode(token)
         except jwt.ExpiredSignatureError:
             raise CustomAuthenticationFailed({
                 'status': 'error',
                 'message': 'Token is expired.',
             }, status_code=401)
+        except TokenRevoked:
+            raise CustomAuthenticationFailed({
+                'status': 'error',
+                'message': 'Token has been revoked.',
+            }, status_code=401)
         except jwt.InvalidTokenError:
             raise CustomAuthenticationFailed({
                 'status': 'error',
                 'message': 'Invalid token.',
             }, status_code=401)
 
-        try:
-            user = User.objects.get(id=payload['user_id'])
-        except User.DoesNotExist:
+        user = principal_cache.get(payload['user_id'])
+        if user is None:
             raise CustomAuthenticationFailed({
                 'status': 'error',
                 'message': 'User not found.',
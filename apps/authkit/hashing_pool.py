@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.db import close_old_connections
+from apps.base.base_benchmark import percentile
+
+
+class HashingPoolSaturated(Exception):
+    pass
+
+
+class HashingPool:
+    """
+    Bounded pool for password checks.
+
+    PBKDF2 in hashlib releases the GIL, so the worker threads hash in parallel
+    while request threads and the event loop stay free. At most ``workers``
+    checks run and ``max_queue`` wait; beyond that ``submit`` raises
+    ``HashingPoolSaturated`` at once so the caller can answer 503 instead of
+    queueing behind a login spike.
+    """
+
+    def __init__(self, workers, max_queue, samples=2048):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='login-hash')
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.waits = deque(maxlen=samples)
+        self.runs = deque(maxlen=samples)
+        self.counters = {'completed': 0, 'rejected': 0}
+
+    def submit(self, func, *args, **kwargs):
+        with self._lock:
+            if self.pending >= self.workers + self.max_queue:
+                self.counters['rejected'] += 1
+                raise HashingPoolSaturated()
+            self.pending += 1
+        queued = time.perf_counter()
+
+        def run():
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self.pending -= 1
+                    self.counters['completed'] += 1
+                    self.waits.append(started - queued)
+                    self.runs.append(finished - started)
+
+        try:
+            return self._executor.submit(run)
+        except RuntimeError:
+            with self._lock:
+                self.pending -= 1
+            raise
+
+    def stats(self):
+        """Counters plus p50/p99 queue wait and hash time in milliseconds"""
+        with self._lock:
+            stats = dict(self.counters, pending=self.pending)
+            samples = {'wait': list(self.waits), 'hash': list(self.runs)}
+        for name, timings in samples.items():
+            for label, fraction in (('p50', 0.50), ('p99', 0.99)):
+                stats[f'{name}_{label}_ms'] = percentile(timings, fraction) * 1000 if timings else 0.0
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            self.counters = dict.fromkeys(self.counters, 0)
+            self.waits.clear()
+            self.runs.clear()
+
+
+def check_credentials(username, password):
+    """``authenticate`` on a pool thread, which holds its own database connection"""
+    close_old_connections()
+    try:
+        return authenticate(username=username, password=password)
+    finally:
+        close_old_connections()
+
+
+login_pool = HashingPool(workers=settings.LOGIN_HASH_WORKERS, max_queue=settings.LOGIN_HASH_QUEUE)
@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.base.base_benchmark import rolled_back, measure, summarize
+from apps.authkit.authentication import CookieJWTAuthentication
+from apps.authkit.models import User, Batch
+from apps.authkit.principal_cache import principal_cache, PRINCIPAL_KEY
+
+
+class Command(BaseCommand):
+    help = "Benchmark per-request authentication overhead with and without the principal cache (rolled back afterwards)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--requests', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        authentication = CookieJWTAuthentication()
+
+        with rolled_back():
+            batch = Batch.objects.create(name='bench-auth-batch')
+            users = User.objects.bulk_create(
+                User(username=f'bench-auth-{i}', email=f'bench-auth-{i}@example.com', role='Student', batch=batch)
+                for i in range(options['users'])
+            )
+            requests = [
+                factory.get('/api/v1/is-authenticated', HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+                for user in users
+            ]
+            total = options['requests']
+
+            def run(clear):
+                for i in range(total):
+                    if clear:
+                        principal_cache.local.clear()
+                        cache.delete(PRINCIPAL_KEY.format(user_id=users[i % len(users)].id))
+                    authentication.authenticate(requests[i % len(requests)])
+
+            principal_cache.reset_stats()
+            uncached = measure(lambda: run(clear=True), 3)
+            principal_cache.reset_stats()
+            cached = measure(lambda: run(clear=False), 3)
+            stats = principal_cache.stats()
+            principal_cache.invalidate(*[user.id for user in users])
+
+        per_request = lambda timings: [timing / total for timing in timings]
+        self.stdout.write(f"uncached: {summarize(per_request(uncached))} per request")
+        self.stdout.write(f"cached:   {summarize(per_request(cached))} per request")
+        self.stdout.write(
+            f"principal cache: {stats['local_hits']} local hits, {stats['shared_hits']} shared hits, "
+            f"{stats['misses']} misses ({stats['hit_rate']:.1%} hit rate)"
+        )
@@ -0,0 +1,54 @@
+import time
+import uuid
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken, BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.base.base_benchmark import rolled_back, measure, summarize
+from apps.authkit.models import User
+from apps.authkit.token_blacklist import FilteredRefreshToken, blacklist_filter
+
+
+class Command(BaseCommand):
+    help = "Benchmark refresh-token blacklist checks with and without the Bloom filter (rolled back afterwards)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000000, help="Outstanding tokens to seed")
+        parser.add_argument('--blacklisted', type=float, default=0.9, help="Fraction of them blacklisted")
+        parser.add_argument('--repeat', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            user = User.objects.create(username='bench-blacklist', email='bench-blacklist@example.com', role='Faculty')
+            self.seed(user, options['rows'], options['blacklisted'])
+
+            tokens = [str(RefreshToken.for_user(user)) for _ in range(200)]
+            blacklist_filter.reset()
+            started = time.perf_counter()
+            blacklist_filter.refresh()
+            self.stdout.write(
+                f"filter built in {time.perf_counter() - started:.2f}s "
+                f"({blacklist_filter.bloom.count} jtis, {blacklist_filter.bloom.bits.nbytes / 2 ** 20:.1f} MiB)"
+            )
+
+            for label, token_class in (('database check', RefreshToken), ('bloom filter', FilteredRefreshToken)):
+                position = iter(range(options['repeat']))
+                timings = measure(lambda: token_class(tokens[next(position) % len(tokens)]), options['repeat'])
+                self.stdout.write(f"{label}: {summarize(timings)}")
+            blacklist_filter.reset()
+
+    def seed(self, user, rows, blacklisted, chunk_size=50000):
+        expires_at = timezone.now() + timedelta(days=10)
+        started = time.perf_counter()
+        for offset in range(0, rows, chunk_size):
+            outstanding = OutstandingToken.objects.bulk_create(
+                OutstandingToken(jti=uuid.uuid4().hex, token='', user=user, expires_at=expires_at)
+                for _ in range(min(chunk_size, rows - offset))
+            )
+            if blacklisted:
+                BlacklistedToken.objects.bulk_create(
+                    BlacklistedToken(token=token) for position, token in enumerate(outstanding)
+                    if blacklisted >= 1 or position % 10 < round(blacklisted * 10)
+                )
+        self.stdout.write(f"seeded {rows} outstanding tokens in {time.perf_counter() - started:.1f}s")
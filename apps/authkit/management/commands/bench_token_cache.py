@@ -0,0 +1,41 @@
+import time
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.authkit.token_cache import VerifiedTokenCache, verify_token
+
+
+class Command(BaseCommand):
+    help = "Microbenchmark JWT verification against the verified-token cache at a given polling rate"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=2000, help="Concurrently polling browsers")
+        parser.add_argument('--poll-interval', type=float, default=5.0, help="Seconds between polls per client")
+        parser.add_argument('--requests', type=int, default=100000)
+
+    def handle(self, *args, **options):
+        tokens = []
+        for user_id in range(1, options['clients'] + 1):
+            token = AccessToken()
+            token['user_id'] = user_id
+            tokens.append(str(token))
+        total = options['requests']
+        token_cache = VerifiedTokenCache(maxsize=options['clients'] * 2)
+
+        def cpu_per_request(decode):
+            started = time.process_time()
+            for i in range(total):
+                decode(tokens[i % len(tokens)])
+            return (time.process_time() - started) / total
+
+        uncached = cpu_per_request(verify_token)
+        cpu_per_request(token_cache.decode)
+        cached = cpu_per_request(token_cache.decode)
+
+        rate = options['clients'] / options['poll_interval']
+        saved = (uncached - cached) * rate
+        self.stdout.write(f"jwt.decode:   {uncached * 1e6:.1f} us CPU per request")
+        self.stdout.write(f"token cache:  {cached * 1e6:.1f} us CPU per request")
+        self.stdout.write(
+            f"{options['clients']} clients polling every {options['poll_interval']:g}s = {rate:.0f} req/s: "
+            f"{saved * 1000:.1f} ms CPU saved per second ({saved * 100:.2f}% of a core)"
+        )
@@ -0,0 +1,92 @@
+import threading
+import time
+from unittest import mock
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.test import Client
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.base.base_benchmark import summarize
+from apps.authkit.hashing_pool import HashingPool, login_pool
+from apps.authkit.models import User
+
+
+class Command(BaseCommand):
+    help = "Measure read-endpoint latency during a login storm, with the bounded and an unbounded hashing pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--storm', type=int, default=32, help="Concurrent login clients")
+        parser.add_argument('--readers', type=int, default=4, help="Concurrent is-authenticated pollers")
+        parser.add_argument('--duration', type=float, default=10.0, help="Seconds per phase")
+
+    def handle(self, *args, **options):
+        password = 'loadtest-password'
+        password_hash = make_password(password)
+        users = User.objects.bulk_create(
+            User(username=f'loadtest-{i}', email=f'loadtest-{i}@example.com', role='Faculty', password=password_hash)
+            for i in range(max(options['storm'], options['readers']))
+        )
+        try:
+            tokens = [str(RefreshToken.for_user(user).access_token) for user in users[:options['readers']]]
+            self.report('baseline', self.run_phase(options, tokens, storm=0))
+            self.report(f'bounded pool ({login_pool.workers} workers, queue {login_pool.max_queue})',
+                        self.run_phase(options, tokens, options['storm']), login_pool)
+
+            unbounded = HashingPool(workers=options['storm'], max_queue=options['storm'])
+            with mock.patch('apps.authkit.views.login_pool', unbounded):
+                self.report(f'unbounded pool ({options["storm"]} workers)',
+                            self.run_phase(options, tokens, options['storm']), unbounded)
+        finally:
+            OutstandingToken.objects.filter(user__in=users).delete()
+            User.objects.filter(id__in=[user.id for user in users]).delete()
+
+    def run_phase(self, options, tokens, storm):
+        login_pool.reset_stats()
+        deadline = time.perf_counter() + options['duration']
+        reads = []
+        logins = {}
+        lock = threading.Lock()
+
+        def reader(token):
+            client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+            timings = []
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                client.get('/api/v1/is-authenticated')
+                timings.append(time.perf_counter() - started)
+            with lock:
+                reads.extend(timings)
+            close_old_connections()
+
+        def login(username):
+            client = Client()
+            while time.perf_counter() < deadline:
+                response = client.post('/api/v1/login', {'username': username, 'password': 'loadtest-password'},
+                                       content_type='application/json')
+                with lock:
+                    logins[response.status_code] = logins.get(response.status_code, 0) + 1
+                if response.status_code == 503:
+                    time.sleep(0.05)
+            close_old_connections()
+
+        threads = [threading.Thread(target=reader, args=(token,)) for token in tokens]
+        threads += [threading.Thread(target=login, args=(f'loadtest-{i}',)) for i in range(storm)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return reads, logins
+
+    def report(self, label, result, pool=None):
+        reads, logins = result
+        self.stdout.write(f"{label}:")
+        self.stdout.write(f"  reads  {summarize(reads)}")
+        if logins:
+            self.stdout.write(f"  logins {', '.join(f'{code}: {count}' for code, count in sorted(logins.items()))}")
+        if pool is not None:
+            stats = pool.stats()
+            self.stdout.write(
+                f"  hashing wait p50 {stats['wait_p50_ms']:.1f} ms / p99 {stats['wait_p99_ms']:.1f} ms, "
+                f"hash p50 {stats['hash_p50_ms']:.1f} ms / p99 {stats['hash_p99_ms']:.1f} ms"
+            )
@@ -0,0 +1,119 @@
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import transaction
+from apps.authkit.models import User, Batch
+from apps.classroom.recipients import invalidate_batch_recipients
+
+REQUIRED_COLUMNS = {'username', 'email', 'password'}
+
+
+def hash_passwords(passwords, workers):
+    """PBKDF2-hash ``passwords`` in a process pool, preserving order"""
+    if workers <= 1 or len(passwords) < 2:
+        return [make_password(password) for password in passwords]
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor:
+        return list(executor.map(make_password, passwords, chunksize=chunksize))
+
+
+class Command(BaseCommand):
+    help = "Create student accounts for a batch from a CSV (username, email, password and optional phone)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch', required=True, help="Batch name, created if missing")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Hashing processes")
+        parser.add_argument('--dry-run', action='store_true', help="Validate every row without writing")
+
+    def handle(self, *args, **options):
+        rows = self.read_rows(options['path'])
+        students, passwords = self.build_students(rows)
+        if not students:
+            self.stdout.write("Nothing to provision.")
+            return
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f"Validated {len(students)} student(s)"))
+            return
+
+        started = time.perf_counter()
+        hashes = hash_passwords(passwords, options['workers'])
+        hashed = time.perf_counter()
+
+        with transaction.atomic():
+            batch, created = Batch.objects.get_or_create(name=options['batch'])
+            for student, password_hash in zip(students, hashes):
+                student.password = password_hash
+                student.batch = batch
+            User.objects.bulk_create(students, batch_size=500)
+            # bulk_create sends no signals
+            transaction.on_commit(lambda: invalidate_batch_recipients(batch.id))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Provisioned {len(students)} student(s) in batch {batch.name} "
+            f"(hashing {hashed - started:.2f}s on {options['workers']} worker(s), "
+            f"insert {time.perf_counter() - hashed:.2f}s)"
+        ))
+
+    def read_rows(self, path):
+        try:
+            with open(path, newline='', encoding='utf-8-sig') as handle:
+                reader = csv.DictReader(handle)
+                missing = REQUIRED_COLUMNS - set(reader.fieldnames or [])
+                if missing:
+                    raise CommandError(f"Missing columns: {', '.join(sorted(missing))}")
+                return list(enumerate(reader, start=2))
+        except OSError as e:
+            raise CommandError(f"Cannot open {path}: {e}")
+
+    def build_students(self, rows):
+        """Validate rows against each other and the existing users in one query per column"""
+        usernames = {row['username'].strip() for _, row in rows}
+        emails = {User.objects.normalize_email(row['email'].strip()) for _, row in rows}
+        taken_usernames = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        taken_emails = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+        phones = {(row.get('phone') or '').strip() for _, row in rows} - {''}
+        taken_phones = set(User.objects.filter(phone__in=phones).values_list('phone', flat=True))
+
+        students = []
+        passwords = []
+        errors = 0
+        for line_number, row in rows:
+            username = row['username'].strip()
+            email = User.objects.normalize_email(row['email'].strip())
+            phone = (row.get('phone') or '').strip() or None
+            try:
+                if not username or not row['password']:
+                    raise ValidationError("username and password are required")
+                validate_email(email)
+                if username in taken_usernames:
+                    raise ValidationError(f"username {username!r} already exists")
+                if email in taken_emails:
+                    raise ValidationError(f"email {email!r} already exists")
+                if phone and phone in taken_phones:
+                    raise ValidationError(f"phone {phone!r} already exists")
+            except ValidationError as e:
+                errors += 1
+                self.stderr.write(f"line {line_number}: {'; '.join(e.messages)}")
+                continue
+
+            taken_usernames.add(username)
+            taken_emails.add(email)
+            taken_phones.add(phone)
+            students.append(User(
+                username=username,
+                email=email,
+                phone=phone,
+                role='Student'
+            ))
+            passwords.append(row['password'])
+
+        if errors:
+            self.stderr.write(f"{errors} row(s) skipped")
+        return students, passwords
@@ -0,0 +1,92 @@
+import threading
+from django.core.cache import cache
+from apps.authkit.models import User, Batch
+from apps.base.base_cache import LocalTTLCache
+
+PRINCIPAL_KEY = 'authkit:principal:{user_id}'
+PRINCIPAL_FIELDS = ['id', 'username', 'email', 'role', 'is_active', 'batch_id']
+
+# The local tier cannot be invalidated from other processes, so it only
+# trusts an entry for a short while; the shared tier is invalidated by signals
+LOCAL_TTL = 30
+SHARED_TTL = 60 * 15
+
+
+class PrincipalCache:
+    """
+    Two-tier cache of the user fields the API views read.
+
+    Lookups try a process-local LRU, then the shared (Redis) cache, then the
+    database. The result is a ``User`` built from the cached fields with every
+    other field deferred, so saving it can only ever write those fields and
+    reading anything else falls back to a query.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.local = LocalTTLCache(maxsize=maxsize, ttl=LOCAL_TTL)
+        self._lock = threading.Lock()
+        self.counters = {'local_hits': 0, 'shared_hits': 0, 'misses': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+        lookups = sum(counters.values())
+        counters['hit_rate'] = (counters['local_hits'] + counters['shared_hits']) / lookups if lookups else 0.0
+        return counters
+
+    def reset_stats(self):
+        with self._lock:
+            self.counters = dict.fromkeys(self.counters, 0)
+
+    def _load(self, user_id):
+        user = User.objects.select_related('batch').only(
+            *PRINCIPAL_FIELDS[:-1], 'batch__name'
+        ).filter(id=user_id).first()
+        if user is None:
+            return None
+        principal = {field: getattr(user, field) for field in PRINCIPAL_FIELDS}
+        principal['batch_name'] = user.batch.name if user.batch else None
+        return principal
+
+    def _build(self, principal):
+        # from_db expects the values in model field order
+        values = [principal[field.attname] for field in User._meta.concrete_fields if field.attname in principal]
+        user = User.from_db('default', PRINCIPAL_FIELDS, values)
+        if principal['batch_id'] is not None:
+            user.batch = Batch.from_db('default', ['id', 'name'], [principal['batch_id'], principal['batch_name']])
+        return user
+
+    def get(self, user_id):
+        """The cached principal for ``user_id``, or None if there is no such user"""
+        key = PRINCIPAL_KEY.format(user_id=user_id)
+
+        principal = self.local.get(key)
+        if principal is not None:
+            self._count('local_hits')
+            return self._build(principal)
+
+        principal = cache.get(key)
+        if principal is not None:
+            self._count('shared_hits')
+        else:
+            self._count('misses')
+            principal = self._load(user_id)
+            if principal is None:
+                return None
+            cache.set(key, principal, SHARED_TTL)
+
+        self.local.set(key, principal)
+        return self._build(principal)
+
+    def invalidate(self, *user_ids):
+        keys = [PRINCIPAL_KEY.format(user_id=user_id) for user_id in user_ids]
+        for key in keys:
+            self.local.delete(key)
+        cache.delete_many(keys)
+
+
+principal_cache = PrincipalCache()
@@ -11,11 +11,8 @@ class UserSerializer(serializers.ModelSerializer):
         }
         
     def create(self, validated_data):
-        user = User.objects.create_user(**validated_data)
-        password = validated_data.get('password')
-        user.set_password(password)
-        user.save()
-        return user
+        # create_user hashes the password and saves exactly once
+        return User.objects.create_user(**validated_data)
     
     def update(self, instance, validated_data):
         password = validated_data.get('password')
@@ -25,5 +22,6 @@ class UserSerializer(serializers.ModelSerializer):
     
 #==== Login Serializer ====#
 class LoginSerializer(serializers.Serializer):
-    email = serializers.EmailField()
-    password = serializers.CharField()
\ No newline at end of file
+    username = serializers.CharField()
+    password = serializers.CharField()
+    remember_me = serializers.BooleanField(default=False)
\ No newline at end of file
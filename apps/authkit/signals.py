@@ -0,0 +1,30 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from apps.authkit.models import User, Batch
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from apps.authkit.principal_cache import principal_cache
+from apps.authkit.token_blacklist import bump_blacklist_generation
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: principal_cache.invalidate(instance.id))
+
+
+@receiver(post_save, sender=Batch)
+@receiver(pre_delete, sender=Batch)
+def batch_changed(sender, instance, created=False, **kwargs):
+    # Cached principals carry the batch name; before a delete the members
+    # still point at the batch, afterwards the FK has been cleared
+    if created:
+        return
+    user_ids = list(User.objects.filter(batch_id=instance.id).values_list('id', flat=True))
+    transaction.on_commit(lambda: principal_cache.invalidate(*user_ids))
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def token_blacklisted(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(bump_blacklist_generation)
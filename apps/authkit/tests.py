@@ -1,3 +1,297 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+import threading
+import uuid
+from datetime import timedelta
+from unittest import mock
+import jwt
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.auth import hashers
+from django.core.management import call_command
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken, BlacklistedToken
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.authkit.models import User, Batch
+from apps.authkit.principal_cache import principal_cache
+from apps.authkit.token_cache import token_cache
+from apps.authkit.hashing_pool import HashingPool
+from apps.authkit.views import LoginView
+from apps.authkit.tasks import prune_expired_tokens
+from apps.authkit.token_blacklist import BloomFilter, FilteredRefreshToken, blacklist_filter
 
-# Create your tests here.
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PrincipalCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.batch = Batch.objects.create(name='CSE-21')
+        cls.student = User.objects.create_user(
+            email='student@example.com', password='secret', username='student', role='Student', batch=cls.batch
+        )
+
+    def setUp(self):
+        cache.clear()
+        principal_cache.local.clear()
+        principal_cache.reset_stats()
+        token_cache.local.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.student).access_token}')
+
+    def test_authenticated_requests_skip_sql_once_cached(self):
+        with self.assertNumQueries(1):
+            self.client.get('/api/v1/is-authenticated')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/is-authenticated')
+        self.assertEqual(response.data['data']['batch'], 'CSE-21')
+
+        principal_cache.local.clear()
+        with self.assertNumQueries(0):
+            self.client.get('/api/v1/profile')
+        stats = principal_cache.stats()
+        self.assertEqual((stats['local_hits'], stats['shared_hits'], stats['misses']), (1, 1, 1))
+
+    def test_user_and_batch_saves_invalidate(self):
+        self.client.get('/api/v1/is-authenticated')
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(id=self.student.id).update(email='new@example.com')
+            self.student.refresh_from_db()
+            self.student.save()
+        self.assertEqual(self.client.get('/api/v1/profile').data['data']['email'], 'new@example.com')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.batch.name = 'CSE-22'
+            self.batch.save()
+        self.assertEqual(self.client.get('/api/v1/profile').data['data']['batch'], 'CSE-22')
+
+    def test_saving_cached_principal_only_writes_cached_fields(self):
+        user = principal_cache.get(self.student.id)
+        user.email = 'changed@example.com'
+        user.save()
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.email, 'changed@example.com')
+        self.assertTrue(self.student.check_password('secret'))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class VerifiedTokenCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.faculty = User.objects.create_user(
+            email='faculty@example.com', password='secret', username='faculty', role='Faculty'
+        )
+
+    def setUp(self):
+        cache.clear()
+        token_cache.local.clear()
+        token_cache.reset_stats()
+        self.token = str(RefreshToken.for_user(self.faculty).access_token)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    def test_signature_is_verified_once_per_token(self):
+        with mock.patch('jwt.decode', wraps=jwt.decode) as decode:
+            for _ in range(5):
+                self.assertEqual(self.client.get('/api/v1/is-authenticated').status_code, 200)
+        self.assertEqual(decode.call_count, 1)
+        self.assertEqual(token_cache.stats()['hits'], 4)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer not-a-token')
+        self.assertEqual(self.client.get('/api/v1/is-authenticated').status_code, 401)
+
+    def test_logout_revokes_the_access_token(self):
+        self.assertEqual(self.client.get('/api/v1/is-authenticated').status_code, 200)
+        self.client.post('/api/v1/logout')
+
+        # A worker that never cached the token consults the revocation list
+        token_cache.local.clear()
+        response = self.client.get('/api/v1/is-authenticated')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['message'], 'Token has been revoked.')
+
+
+class ProvisioningTests(TestCase):
+
+    def test_registration_hashes_the_password_once(self):
+        with mock.patch('django.contrib.auth.base_user.make_password', wraps=hashers.make_password) as make_password:
+            response = self.client.post('/api/v1/register', {
+                'username': 'new-student', 'email': 'new@example.com', 'password': 'secret',
+                'role': 'Student', 'batch': 'CSE-30'
+            })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(make_password.call_count, 1)
+        self.assertTrue(User.objects.get(username='new-student').check_password('secret'))
+
+    def test_provision_students_bulk_creates_a_batch(self):
+        User.objects.create_user(email='taken@example.com', password='x', username='taken', role='Student')
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            handle.write('username,email,password,phone\n')
+            for i in range(6):
+                handle.write(f's{i},s{i}@example.com,pass-{i},01700{i}\n')
+            handle.write('taken,other@example.com,x,\n')
+            handle.write('s0,dup@example.com,x,\n')
+        self.addCleanup(os.remove, handle.name)
+
+        call_command('provision_students', handle.name, batch='CSE-31', workers=2, stdout=io.StringIO(),
+                     stderr=io.StringIO())
+
+        students = User.objects.filter(batch__name='CSE-31').order_by('username')
+        self.assertEqual([student.username for student in students], [f's{i}' for i in range(6)])
+        self.assertTrue(students[3].check_password('pass-3'))
+        self.assertEqual(Batch.objects.filter(name='CSE-31').count(), 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class LoginHashingPoolTests(TransactionTestCase):
+
+    def setUp(self):
+        User.objects.create_user(email='teacher@example.com', password='secret', username='teacher', role='Faculty')
+        self.pool = HashingPool(workers=1, max_queue=0)
+        patcher = mock.patch('apps.authkit.views.login_pool', self.pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_sync_and_async_login_check_passwords_on_the_pool(self):
+        credentials = {'username': 'teacher', 'password': 'secret'}
+        response = self.client.post('/api/v1/login', credentials, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.post('/api/v1/async-login', credentials, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['username'], 'teacher')
+        self.assertIn('access_token', response.cookies)
+
+        response = self.client.post('/api/v1/async-login', {'username': 'teacher', 'password': 'wrong'},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.pool.stats()['completed'], 3)
+
+    def test_saturated_pool_answers_503_with_retry_after(self):
+        release = threading.Event()
+        busy = self.pool.submit(release.wait)
+        try:
+            for url in ('/api/v1/login', '/api/v1/async-login'):
+                response = self.client.post(url, {'username': 'teacher', 'password': 'secret'},
+                                            content_type='application/json')
+                self.assertEqual(response.status_code, 503)
+                self.assertEqual(response['Retry-After'], '2')
+        finally:
+            release.set()
+            busy.result()
+        self.assertEqual(self.pool.stats()['rejected'], 2)
+
+    def test_sync_and_async_login_validate_and_answer_alike(self):
+        for url in ('/api/v1/login', '/api/v1/async-login'):
+            response = self.client.post(url, {'username': 'teacher'}, content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {
+                'status': 'error',
+                'message': 'Username and password are required.',
+                'error': {'password': ['This field is required.']}
+            })
+
+            response = self.client.post(url, {'username': 'teacher', 'password': 'secret', 'remember_me': 'true'})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['message'], 'Logged in successfully.')
+            self.assertIn('refresh_token', response.cookies)
+
+    def test_asgi_deployments_serve_login_asynchronously(self):
+        from core.asgi import application
+
+        async def post_login():
+            body = json.dumps({'username': 'teacher', 'password': 'secret'}).encode()
+            communicator = ApplicationCommunicator(application, {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'POST',
+                'scheme': 'http', 'path': '/api/v1/login', 'raw_path': b'/api/v1/login', 'query_string': b'',
+                'root_path': '', 'headers': [(b'host', b'testserver'), (b'content-type', b'application/json'),
+                            (b'content-length', str(len(body)).encode())],
+                'client': ('127.0.0.1', 50000), 'server': ('testserver', 80)
+            })
+            await communicator.send_input({'type': 'http.request', 'body': body})
+            start = await communicator.receive_output(5)
+            message = await communicator.receive_output(5)
+            await communicator.wait(5)
+            return start['status'], json.loads(message['body'])
+
+        # LoginView would hold the worker; under ASGI it must not be reached
+        with mock.patch.object(LoginView, 'post', side_effect=AssertionError('sync login served under ASGI')):
+            status, payload = async_to_sync(post_login)()
+        self.assertEqual(status, 200, payload)
+        self.assertEqual(payload['data']['username'], 'teacher')
+        self.assertNotIn('LOGIN_ASYNC', os.environ)
+
+
+class BloomFilterTests(SimpleTestCase):
+
+    def test_members_are_found_and_false_positives_are_rare(self):
+        members = [uuid.uuid4().hex for _ in range(5000)]
+        bloom = BloomFilter(capacity=5000, error_rate=0.01)
+        bloom.add_many(members[:4000])
+        for member in members[4000:]:
+            bloom.add(member)
+        self.assertTrue(all(member in bloom for member in members))
+
+        false_positives = sum(uuid.uuid4().hex in bloom for _ in range(20000))
+        self.assertLess(false_positives / 20000, 0.03)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TokenBlacklistTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.faculty = User.objects.create_user(
+            email='faculty@example.com', password='secret', username='faculty', role='Faculty'
+        )
+
+    def setUp(self):
+        cache.clear()
+        blacklist_filter.reset()
+
+    def test_rotated_refresh_token_cannot_be_reused(self):
+        old_token = str(RefreshToken.for_user(self.faculty))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/v1/refresh-token', HTTP_AUTHORIZATION=f'Bearer {old_token}')
+        self.assertEqual(response.status_code, 200)
+
+        # Another process only learns about the blacklisting from the database
+        blacklist_filter.reset()
+        with self.assertRaises(TokenError):
+            FilteredRefreshToken(old_token)
+        response = self.client.post('/api/v1/refresh-token', HTTP_AUTHORIZATION=f'Bearer {old_token}')
+        self.assertEqual(response.status_code, 400)
+
+    def test_unlisted_tokens_skip_the_blacklist_query(self):
+        blacklist_filter.refresh()
+        token = str(RefreshToken.for_user(self.faculty))
+        with self.assertNumQueries(0):
+            FilteredRefreshToken(token)
+
+    def test_prune_expired_tokens_in_chunks(self):
+        now = timezone.now()
+        expired = OutstandingToken.objects.bulk_create(
+            OutstandingToken(jti=uuid.uuid4().hex, token='', user=self.faculty, expires_at=now - timedelta(days=1))
+            for _ in range(7)
+        )
+        BlacklistedToken.objects.bulk_create(BlacklistedToken(token=token) for token in expired[:3])
+        live = OutstandingToken.objects.create(
+            jti=uuid.uuid4().hex, token='', user=self.faculty, expires_at=now + timedelta(days=1)
+        )
+
+        self.assertEqual(prune_expired_tokens(chunk_size=3), 7)
+        self.assertEqual(list(OutstandingToken.objects.values_list('id', flat=True)), [live.id])
+        self.assertFalse(BlacklistedToken.objects.exists())
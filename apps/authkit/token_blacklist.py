@@ -0,0 +1,158 @@
+import hashlib
+import math
+import threading
+import time
+import numpy as np
+from django.core.cache import cache
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+BLACKLIST_GENERATION_KEY = 'authkit:blacklist:generation'
+
+# Rows committed out of id order can land below the watermark; re-reading a
+# window of recent ids on every refresh picks them up
+WATERMARK_LOOKBACK = 100
+# Pruned tokens stay in the filter as harmless false positives until the
+# next full rebuild
+REBUILD_INTERVAL = 60 * 60
+# Incremental refresh even without a generation bump, in case the shared
+# cache lost the key
+MAX_STALENESS = 5
+MIN_CAPACITY = 100000
+
+_MASK64 = (1 << 64) - 1
+
+
+#=== Bloom Filter ===#
+class BloomFilter:
+    """Bit-packed Bloom filter over strings using double hashing of a BLAKE2b digest"""
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(int(capacity), 1)
+        self.size = int(math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        self.count = 0
+
+    @staticmethod
+    def _digest(key):
+        return hashlib.blake2b(key.encode(), digest_size=16).digest()
+
+    def add_many(self, keys):
+        if not keys:
+            return
+        digests = np.frombuffer(b''.join(self._digest(key) for key in keys), dtype='<u8').reshape(-1, 2)
+        first = digests[:, 0]
+        second = digests[:, 1] | np.uint64(1)
+        rounds = np.arange(self.hash_count, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            positions = ((first[:, None] + rounds[None, :] * second[:, None]) % np.uint64(self.size)).ravel()
+        masks = np.left_shift(np.uint8(1), (positions & np.uint64(7)).astype(np.uint8))
+        np.bitwise_or.at(self.bits, (positions >> np.uint64(3)).astype(np.int64), masks)
+        self.count += len(keys)
+
+    def add(self, key):
+        self.add_many([key])
+
+    def __contains__(self, key):
+        digest = self._digest(key)
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        bits = self.bits
+        for i in range(self.hash_count):
+            position = ((first + i * second) & _MASK64) % self.size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+#=== Blacklisted JTI Filter ===#
+class BlacklistFilter:
+    """
+    Process-local Bloom filter of blacklisted refresh-token JTIs.
+
+    A miss proves the token is not blacklisted, so the common refresh skips
+    the blacklist query entirely; a hit falls through to the database. The
+    filter is topped up from rows above an id watermark whenever the shared
+    blacklist generation moves, and rebuilt from scratch every
+    ``REBUILD_INTERVAL`` or when it outgrows its capacity.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.bloom = None
+        self.watermark = 0
+        self.generation = None
+        self.built_at = 0
+        self.refreshed_at = 0
+
+    def _fill(self, bloom, after_id):
+        rows = BlacklistedToken.objects.filter(id__gt=max(after_id - WATERMARK_LOOKBACK, 0)).order_by(
+            'id'
+        ).values_list('id', 'token__jti')
+        watermark = after_id
+        jtis = []
+        for blacklisted_id, jti in rows.iterator(chunk_size=20000):
+            if blacklisted_id <= after_id and jti in bloom:
+                continue
+            jtis.append(jti)
+            watermark = max(watermark, blacklisted_id)
+            if len(jtis) >= 20000:
+                bloom.add_many(jtis)
+                jtis = []
+        bloom.add_many(jtis)
+        return watermark
+
+    def _rebuild(self):
+        bloom = BloomFilter(max(MIN_CAPACITY, BlacklistedToken.objects.count() * 2))
+        self.watermark = self._fill(bloom, 0)
+        self.bloom = bloom
+        self.built_at = time.monotonic()
+
+    def refresh(self):
+        generation = cache.get(BLACKLIST_GENERATION_KEY)
+        now = time.monotonic()
+        if (
+            self.bloom is not None
+            and generation == self.generation
+            and now - self.refreshed_at < MAX_STALENESS
+            and now - self.built_at < REBUILD_INTERVAL
+        ):
+            return
+
+        with self._lock:
+            if self.bloom is None or now - self.built_at >= REBUILD_INTERVAL or self.bloom.count > self.bloom.capacity:
+                self._rebuild()
+            else:
+                self.watermark = self._fill(self.bloom, self.watermark)
+            self.generation = generation
+            self.refreshed_at = now
+
+    def might_contain(self, jti):
+        self.refresh()
+        return jti in self.bloom
+
+    def reset(self):
+        with self._lock:
+            self.bloom = None
+            self.watermark = 0
+            self.generation = None
+
+
+def bump_blacklist_generation():
+    try:
+        cache.incr(BLACKLIST_GENERATION_KEY)
+    except ValueError:
+        cache.add(BLACKLIST_GENERATION_KEY, 1, timeout=None)
+
+
+blacklist_filter = BlacklistFilter()
+
+
+class FilteredRefreshToken(RefreshToken):
+    """RefreshToken whose blacklist check only queries when the filter says it might be blacklisted"""
+
+    def check_blacklist(self):
+        if blacklist_filter.might_contain(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
@@ -0,0 +1,94 @@
+import hashlib
+import threading
+import time
+import jwt
+from django.conf import settings
+from django.core.cache import cache
+from apps.base.base_cache import LocalTTLCache
+
+REVOKED_TOKEN_KEY = 'authkit:revoked-token:{digest}'
+
+# Upper bound on how long a verified token is trusted without looking at the
+# shared revocation list, i.e. how late a logout in another worker is honoured
+MAX_LOCAL_TTL = 60 * 5
+
+
+class TokenRevoked(jwt.InvalidTokenError):
+    pass
+
+
+def token_digest(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def verify_token(token, **options):
+    return jwt.decode(
+        token,
+        settings.SIMPLE_JWT['SIGNING_KEY'],
+        algorithms=[settings.SIMPLE_JWT['ALGORITHM']],
+        **options
+    )
+
+
+class VerifiedTokenCache:
+    """
+    Bounded cache of decoded access tokens keyed by the token's SHA-256.
+
+    A token is verified once and its payload reused until it expires (or
+    ``MAX_LOCAL_TTL`` passes), so repeated requests with the same token skip
+    the signature check. ``revoke`` purges the entry and records the token in
+    the shared cache so no process accepts it again.
+    """
+
+    def __init__(self, maxsize=10000):
+        self.local = LocalTTLCache(maxsize=maxsize, ttl=MAX_LOCAL_TTL)
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+        lookups = counters['hits'] + counters['misses']
+        counters['hit_rate'] = counters['hits'] / lookups if lookups else 0.0
+        return counters
+
+    def reset_stats(self):
+        with self._lock:
+            self.counters = dict.fromkeys(self.counters, 0)
+
+    def decode(self, token):
+        """The verified payload of ``token``; raises ``jwt.InvalidTokenError`` subclasses"""
+        digest = token_digest(token)
+        payload = self.local.get(digest)
+        if payload is not None:
+            self._count('hits')
+            return payload
+
+        self._count('misses')
+        payload = verify_token(token)
+        if cache.get(REVOKED_TOKEN_KEY.format(digest=digest)):
+            raise TokenRevoked('Token has been revoked.')
+
+        ttl = min(payload.get('exp', 0) - time.time(), MAX_LOCAL_TTL)
+        if ttl > 0:
+            self.local.set(digest, payload, ttl)
+        return payload
+
+    def revoke(self, token):
+        digest = token_digest(token)
+        self.local.delete(digest)
+        try:
+            payload = verify_token(token)
+        except jwt.InvalidTokenError:
+            # Expired or forged tokens are rejected anyway
+            return
+        remaining = int(payload.get('exp', 0) - time.time()) + 1
+        if remaining > 0:
+            cache.set(REVOKED_TOKEN_KEY.format(digest=digest), True, remaining)
+
+
+token_cache = VerifiedTokenCache()
@@ -1,3 +1,5 @@
+import asyncio
+from asgiref.sync import sync_to_async
 from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework import status
@@ -10,6 +12,9 @@ from rest_framework.permissions import IsAuthenticated
 from apps.base.base_response import base_success_response, base_error_response
 from apps.authkit.serializers import *
 from apps.authkit.authentication import CookieJWTAuthentication
+from apps.authkit.token_cache import token_cache
+from apps.authkit.token_blacklist import FilteredRefreshToken
+from apps.authkit.hashing_pool import login_pool, check_credentials, HashingPoolSaturated
 
 #====== Registration API ======#
 class RegisterView(APIView):
@@ -63,81 +68,159 @@ class RegisterView(APIView):
             )
             
 #====== Login API ======#
+def issue_login_tokens(user):
+    refresh_token = RefreshToken.for_user(user)
+    access_token = str(refresh_token.access_token)
+
+    data = {
+        'access_token': access_token,
+        'refresh_token': str(refresh_token),
+        'user_id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'role': user.role
+    }
+
+    if data['role'] == 'Student':
+        data['batch'] = user.batch.name
+
+    return data
+
+
+def set_login_cookies(response, data, remember_me):
+    cookie_max_age = 60 * 60 * 24 * 30
+
+    if remember_me:
+        response.set_cookie(
+            key='refresh_token',
+            value=data['refresh_token'],
+            httponly=True,
+            secure=True,
+            samesite='None',
+            max_age=cookie_max_age
+        )
+
+    response.set_cookie(
+        key='access_token',
+        value=data['access_token'],
+        httponly=True,
+        secure=True,
+        samesite='None',
+        max_age=cookie_max_age
+    )
+    return response
+
+
+LOGIN_SATURATED_MESSAGE = 'Too many logins in progress, please retry shortly.'
+
+
 class LoginView(APIView):
+    """
+    Login for WSGI deployments. The password is checked on the hashing pool,
+    which bounds concurrent PBKDF2 work, but this worker waits for the
+    result. Only an ASGI deployment (core/asgi.py) frees the worker: it
+    serves api/v1/login with AsyncLoginView instead (ASGI_ROOT_URLCONF).
+    """
     permission_classes = [AllowAny]
     authentication_classes = []
     serializer_class = LoginSerializer
-    
+
     def post(self, request, *args, **kwargs):
         try:
-            username = request.data.get('username')
-            password = request.data.get('password')
-            remember_me = request.data.get('remember_me', False)
+            serializer = LoginSerializer(data=request.data)
+            if not serializer.is_valid():
+                return self.invalid_response(serializer)
+            data = serializer.validated_data
 
-            if not username or not password:
-                return Response({"error": "Username and password are required"}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                user = login_pool.submit(check_credentials, data['username'], data['password']).result()
+            except HashingPoolSaturated:
+                return self.saturated_response()
 
-            user = authenticate(username=username, password=password)
+            return self.login_response(user, data['remember_me'])
 
-            if user is not None:
-                refresh_token = RefreshToken.for_user(user)
-                access_token = str(refresh_token.access_token)
-                        
-                data = {
-                    'access_token': access_token,
-                    'refresh_token': str(refresh_token),
-                    'user_id': user.id,
-                    'username': user.username,
-                    'email': user.email,
-                    'role': user.role
-                }
-                
-                if data['role'] == 'Student':
-                    data['batch'] = user.batch.name
-                    
-                response = Response(
-                    base_success_response('Logged in successfully.', data),
-                    status=status.HTTP_200_OK
-                )
+        except Exception as e:
+            return self.failed_response(e)
 
-                cookie_max_age = 60 * 60 * 24 * 30
-                
-                if remember_me:
-                    response.set_cookie(
-                        key='refresh_token',
-                        value=str(refresh_token),
-                        httponly=True,
-                        secure=True, 
-                        samesite='None',
-                        max_age=cookie_max_age
-                    )
-                
-                response.set_cookie(
-                    key='access_token',
-                    value=access_token,
-                    httponly=True,
-                    secure=True, 
-                    samesite='None',
-                    max_age=cookie_max_age
-                )
+    def invalid_response(self, serializer):
+        return Response(
+            base_error_response('Username and password are required.', serializer.errors),
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
-                return response
-            else:
-                return Response(
-                    base_error_response('Invalid username or password.'),
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        
-        except KeyError as e:
+    def saturated_response(self):
+        return Response(
+            base_error_response(LOGIN_SATURATED_MESSAGE),
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={'Retry-After': str(settings.LOGIN_RETRY_AFTER)}
+        )
+
+    def login_response(self, user, remember_me):
+        if user is None:
             return Response(
-                base_error_response('Login failed.', f'Missing key: {str(e)}'),
+                base_error_response('Invalid username or password.'),
                 status=status.HTTP_400_BAD_REQUEST
             )
+
+        response = Response(
+            base_success_response('Logged in successfully.', issue_login_tokens(user)),
+            status=status.HTTP_200_OK
+        )
+        return set_login_cookies(response, response.data['data'], remember_me)
+
+    def failed_response(self, error):
+        return Response(
+            base_error_response('Login failed.', str(error)),
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+#====== Async Login API ======#
+class AsyncLoginView(LoginView):
+    """
+    Login for ASGI deployments (core/asgi.py): the password check is awaited
+    on the hashing pool, so no worker is held while PBKDF2 runs. Parsing,
+    throttling, validation and responses are LoginView's.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        # APIView.dispatch with the handler awaited; DRF has no async views
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            self.initial(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def post(self, request, *args, **kwargs):
+        try:
+            serializer = LoginSerializer(data=request.data)
+            if not serializer.is_valid():
+                return self.invalid_response(serializer)
+            data = serializer.validated_data
+
+            try:
+                user = await asyncio.wrap_future(login_pool.submit(check_credentials, data['username'], data['password']))
+            except HashingPoolSaturated:
+                return self.saturated_response()
+
+            return await sync_to_async(self.login_response)(user, data['remember_me'])
+
         except Exception as e:
-            return Response(
-                base_error_response('Login failed.', str(e)),
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+            return self.failed_response(e)
 
 #====== Refresh Token API ======#
 class RefreshTokenView(APIView):
@@ -155,7 +238,7 @@ class RefreshTokenView(APIView):
 
         if refresh_token_str:
             try:
-                old_refresh_token = RefreshToken(refresh_token_str)
+                old_refresh_token = FilteredRefreshToken(refresh_token_str)
                 old_refresh_token.blacklist()
 
                 payload = old_refresh_token.payload
@@ -221,11 +304,18 @@ class LogoutView(APIView):
         
         if refresh_token:
             try:
-                token = RefreshToken(refresh_token)
+                token = FilteredRefreshToken(refresh_token)
                 token.blacklist()
             except Exception as e:
                 pass
 
+        access_token = request.COOKIES.get('access_token', None)
+        auth_header = request.headers.get('Authorization')
+        if auth_header and auth_header.startswith('Bearer '):
+            access_token = auth_header.split(' ')[1]
+        if access_token:
+            token_cache.revoke(access_token)
+
         response = Response(
             base_success_response('You have been logged out.'),
             status=status.HTTP_200_OK
@@ -0,0 +1,36 @@
+import time
+from contextlib import contextmanager
+from django.db import transaction
+
+
+#=== Rolled Back Fixture Data ===#
+@contextmanager
+def rolled_back():
+    """Run a benchmark inside a transaction that is always rolled back"""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+#=== Timing Helpers ===#
+def measure(func, repeat=1):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def percentile(timings, fraction):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(timings):
+    return (
+        f"mean {sum(timings) / len(timings) * 1000:.2f} ms, "
+        f"p50 {percentile(timings, 0.50) * 1000:.2f} ms, "
+        f"p99 {percentile(timings, 0.99) * 1000:.2f} ms "
+        f"over {len(timings)} run(s)"
+    )
@@ -0,0 +1,28 @@
+import base64
+import json
+
+#=== Keyset Cursor Helpers ===#
+def encode_cursor(*values):
+    """Opaque, URL-safe cursor for the last row of a page"""
+    raw = json.dumps(values, default=str, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Inverse of ``encode_cursor``; raises ValueError on a malformed cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def keyset_pagination(page_size, next_cursor):
+    return {
+        'page_size': page_size,
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+    }
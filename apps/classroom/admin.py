@@ -1,5 +1,6 @@
 from django.contrib import admin
 from apps.classroom.models import *
 
-for model in [Rooms, Bookings, Feedbacks]:
+for model in [Rooms, Bookings, Feedbacks, NotificationLog, TaskWatermark, NotificationPreference, ScheduledNotification,
+              RoomFeedbackStats]:
     admin.site.register(model)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ClassroomConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.classroom'
+
+    def ready(self):
+        import apps.classroom.signals
@@ -0,0 +1,84 @@
+from datetime import timedelta
+from apps.classroom.models import Rooms, Bookings
+from apps.classroom.interval_index import IntervalIndex
+
+MAX_BULK_OCCURRENCES = 10000
+
+
+def expand_recurrence(first_start, first_end, until, interval_weeks=1, exclude_dates=()):
+    """Weekly occurrences from the first one up to and including ``until``"""
+    excluded = set(exclude_dates)
+    step = timedelta(weeks=interval_weeks)
+    occurrences = []
+    start, end = first_start, first_end
+    while start.date() <= until:
+        if start.date() not in excluded:
+            occurrences.append((start, end))
+        start, end = start + step, end + step
+    return occurrences
+
+
+def lock_classrooms(classroom_ids):
+    """
+    Lock the given rooms for the rest of the current transaction.
+
+    PostgreSQL takes row locks in id order so concurrent bookings of the same
+    room queue up while other rooms proceed. SQLite ignores FOR UPDATE, but
+    its atomic blocks start with BEGIN IMMEDIATE (see DATABASES), which takes
+    the database write lock up front.
+    """
+    return list(Rooms.objects.select_for_update().filter(id__in=classroom_ids).order_by('id'))
+
+
+def find_conflicts(occurrences, check_existing=True):
+    """
+    Split occurrences into accepted and conflicting ones.
+
+    ``occurrences`` is a list of dicts with ``classroom_id``, ``start_time`` and
+    ``end_time``. Existing approved bookings of the involved rooms are loaded
+    with one interval query into an in-memory interval index. The occurrences are then
+    swept in start order: each is checked against the index and against the
+    latest-ending occurrence already accepted for its room. Call inside the
+    transaction that holds the room locks.
+    """
+    index = IntervalIndex()
+    if check_existing and occurrences:
+        existing = Bookings.objects.filter(
+            classroom_id__in={occurrence['classroom_id'] for occurrence in occurrences},
+            status='Approved',
+            start_time__lt=max(occurrence['end_time'] for occurrence in occurrences),
+            end_time__gt=min(occurrence['start_time'] for occurrence in occurrences)
+        ).order_by('classroom_id', 'start_time', 'id').values_list('classroom_id', 'start_time', 'end_time', 'id')
+        for classroom_id, start, end, booking_id in existing.iterator(chunk_size=5000):
+            index.add(classroom_id, start, end, booking_id)
+
+    accepted = []
+    conflicts = []
+    # classroom_id -> (end, position) of the latest-ending accepted occurrence
+    latest_accepted = {}
+    ordered = sorted(range(len(occurrences)), key=lambda position: occurrences[position]['start_time'])
+    for position in ordered:
+        occurrence = occurrences[position]
+        classroom_id = occurrence['classroom_id']
+        clashing_bookings = index.overlapping(classroom_id, occurrence['start_time'], occurrence['end_time'])
+        latest = latest_accepted.get(classroom_id) if check_existing else None
+        clashing_occurrences = [latest[1]] if latest and latest[0] > occurrence['start_time'] else []
+
+        if clashing_bookings or clashing_occurrences:
+            conflicts.append({
+                'index': position,
+                'classroom_id': classroom_id,
+                'start_time': occurrence['start_time'],
+                'end_time': occurrence['end_time'],
+                'conflicts_with_bookings': sorted(clashing_bookings),
+                'conflicts_with_occurrences': clashing_occurrences,
+            })
+            continue
+
+        accepted.append(position)
+        if latest is None or occurrence['end_time'] > latest[0]:
+            latest_accepted[classroom_id] = (occurrence['end_time'], position)
+
+    conflicts.sort(key=lambda conflict: conflict['index'])
+    accepted.sort()
+    return accepted, conflicts
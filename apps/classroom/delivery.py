@@ -0,0 +1,65 @@
+import os
+import smtplib
+import threading
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+
+_pool = threading.local()
+
+
+#=== Pooled Connection ===#
+def get_pooled_connection():
+    """The mail connection of this worker process and thread, opened on first use"""
+    if getattr(_pool, 'pid', None) != os.getpid() or _pool.connection is None:
+        connection = get_connection(fail_silently=False)
+        connection.open()
+        _pool.pid = os.getpid()
+        _pool.connection = connection
+    return _pool.connection
+
+
+def reset_pooled_connection():
+    connection = getattr(_pool, 'connection', None)
+    _pool.connection = None
+    if connection is not None and getattr(_pool, 'pid', None) == os.getpid():
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+#=== Chunked Delivery ===#
+def recipient_chunks(recipients, size=None):
+    size = size or settings.NOTIFICATION_RECIPIENTS_PER_MESSAGE
+    return [recipients[i:i + size] for i in range(0, len(recipients), size)]
+
+
+def is_transient(error):
+    """Connection problems and 4xx replies are worth retrying; 5xx replies are not"""
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    return isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError))
+
+
+def deliver_chunk(subject, body, recipients, html=None):
+    """
+    Send one message to ``recipients`` over the pooled connection, with an
+    optional HTML alternative. A connection the server dropped while idle is
+    replaced once before the error is raised.
+    """
+    for attempt in range(2):
+        connection = get_pooled_connection()
+        message = EmailMultiAlternatives(subject, body, settings.DEFAULT_FROM_EMAIL, recipients, connection=connection)
+        if html:
+            message.attach_alternative(html, 'text/html')
+        try:
+            return message.send()
+        except smtplib.SMTPServerDisconnected:
+            reset_pooled_connection()
+            if attempt:
+                raise
+        except Exception:
+            reset_pooled_connection()
+            raise
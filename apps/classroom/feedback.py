@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.core import signing
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from apps.classroom.models import RoomFeedbackStats
+
+FEEDBACK_TOKEN_SALT = 'classroom.feedback'
+
+
+#=== Feedback Links ===#
+def make_feedback_token(booking_id):
+    """
+    Signed, timestamped token naming the booking. It is the same for the
+    whole batch, so one message can carry it to every student; the student
+    is whoever is signed in when the feedback is submitted.
+    """
+    return signing.dumps(booking_id, salt=FEEDBACK_TOKEN_SALT)
+
+
+def read_feedback_token(token):
+    """
+    Booking id of a feedback token. Raises signing.SignatureExpired for
+    tokens older than FEEDBACK_TOKEN_MAX_AGE and signing.BadSignature for
+    anything else that was not issued here.
+    """
+    return signing.loads(token, salt=FEEDBACK_TOKEN_SALT, max_age=settings.FEEDBACK_TOKEN_MAX_AGE)
+
+
+def feedback_link(booking_id):
+    return settings.FEEDBACK_URL.format(token=make_feedback_token(booking_id))
+
+
+#=== Room Aggregates ===#
+def issue_state(feedback):
+    values = feedback.__dict__
+    return bool(values.get('cleanliness_issue')), bool(values.get('equipment_issue'))
+
+
+def add_room_feedback(room_id, submissions, cleanliness_issues, equipment_issues):
+    """
+    Add to a room's running totals with a single UPDATE of F() expressions,
+    so concurrent submissions never overwrite each other. The row is created
+    by the first submission for the room.
+    """
+    changes = {
+        'submissions': F('submissions') + submissions,
+        'cleanliness_issues': F('cleanliness_issues') + cleanliness_issues,
+        'equipment_issues': F('equipment_issues') + equipment_issues,
+        'updated_at': timezone.now(),
+    }
+    # Removals never create a row, so deleting a room cannot recreate its stats
+    if RoomFeedbackStats.objects.filter(room_id=room_id).update(**changes) or submissions <= 0:
+        return
+    try:
+        with transaction.atomic():
+            RoomFeedbackStats.objects.create(
+                room_id=room_id, submissions=submissions,
+                cleanliness_issues=cleanliness_issues, equipment_issues=equipment_issues
+            )
+    except IntegrityError:
+        # Another submission created the row first
+        RoomFeedbackStats.objects.filter(room_id=room_id).update(**changes)
@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+import numpy as np
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from apps.classroom.models import Bookings
+
+DEFAULT_OPEN_TIME = '08:00'
+DEFAULT_CLOSE_TIME = '20:00'
+
+
+def free_rooms(rooms, start_time, end_time):
+    """Anti-join: rooms with no approved booking overlapping [start_time, end_time)"""
+    overlapping_bookings = Bookings.objects.filter(
+        classroom=OuterRef('pk'),
+        status='Approved',
+        start_time__lt=end_time,
+        end_time__gt=start_time
+    )
+    return rooms.filter(~Exists(overlapping_bookings))
+
+
+def day_windows(first_day, days, open_time, close_time):
+    """Epoch-second [open, close) arrays for each day in the local time zone"""
+    tz = timezone.get_current_timezone()
+    opens = []
+    closes = []
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        opens.append(datetime.combine(day, open_time, tzinfo=tz).timestamp())
+        closes.append(datetime.combine(day, close_time, tzinfo=tz).timestamp())
+    return np.array(opens, dtype=np.int64), np.array(closes, dtype=np.int64)
+
+
+def booking_intervals(room_ids, range_start, range_end):
+    """Approved booking intervals touching the range, as (room, start, end) arrays"""
+    rows = Bookings.objects.filter(
+        classroom_id__in=room_ids,
+        status='Approved',
+        start_time__lt=range_end,
+        end_time__gt=range_start
+    ).values_list('classroom_id', 'start_time', 'end_time')
+
+    classroom_ids = []
+    starts = []
+    ends = []
+    for classroom_id, start, end in rows.iterator(chunk_size=10000):
+        classroom_ids.append(classroom_id)
+        starts.append(start.timestamp())
+        ends.append(end.timestamp())
+    return (
+        np.array(classroom_ids, dtype=np.int64),
+        np.array(starts, dtype=np.int64),
+        np.array(ends, dtype=np.int64),
+    )
+
+
+def compute_gaps(room_ids, booked_rooms, booked_starts, booked_ends, opens, closes, min_seconds):
+    """
+    Vectorised gap search.
+
+    The closed hours around every day window are added to each room as busy
+    time, all busy intervals are sorted per room and merged with a running
+    maximum, and whatever lies between consecutive merged intervals is free.
+    Returns (room_ids, starts, ends) arrays of the gaps of at least
+    ``min_seconds``.
+    """
+    room_ids = np.asarray(room_ids, dtype=np.int64)
+    room_count = len(room_ids)
+    if room_count == 0:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, empty
+
+    # Closed time: before the first open, between days, after the last close
+    closed_starts = np.concatenate(([opens[0] - 1], closes))
+    closed_ends = np.concatenate((opens, [closes[-1] + 1]))
+
+    position_of = {room_id: position for position, room_id in enumerate(room_ids.tolist())}
+    booked_positions = np.fromiter(
+        (position_of[room_id] for room_id in booked_rooms.tolist()),
+        dtype=np.int64, count=len(booked_rooms)
+    )
+
+    # Clip bookings to the searched range so the shifted time lines below
+    # never overlap between rooms
+    booked_starts = np.clip(booked_starts, closed_starts[0], closed_ends[-1])
+    booked_ends = np.clip(booked_ends, closed_starts[0], closed_ends[-1])
+
+    positions = np.concatenate((
+        np.repeat(np.arange(room_count, dtype=np.int64), len(closed_starts)),
+        booked_positions,
+    ))
+    starts = np.concatenate((np.tile(closed_starts, room_count), booked_starts))
+    ends = np.concatenate((np.tile(closed_ends, room_count), booked_ends))
+
+    order = np.lexsort((starts, positions))
+    positions = positions[order]
+    starts = starts[order]
+    ends = ends[order]
+
+    # Shift each room onto its own stretch of the time line so one running
+    # maximum merges overlaps without leaking across rooms.
+    span = int(closed_ends[-1] - closed_starts[0]) + 1
+    base = int(closed_starts[0])
+    offsets = positions * span - base
+    merged_ends = np.maximum.accumulate(ends + offsets) - offsets
+
+    same_room = positions[1:] == positions[:-1]
+    gap_starts = merged_ends[:-1]
+    gap_ends = starts[1:]
+    keep = same_room & (gap_ends - gap_starts >= min_seconds)
+
+    return room_ids[positions[1:][keep]], gap_starts[keep], gap_ends[keep]
+
+
+def find_free_slots(classrooms, first_day, days, min_minutes, open_time, close_time):
+    """
+    Every gap of at least ``min_minutes`` between ``open_time`` and
+    ``close_time`` in each room for ``days`` days from ``first_day``.
+
+    Bookings are loaded in a single query; the per-room interval arithmetic
+    runs in NumPy.
+    """
+    rooms = list(classrooms)
+    room_ids = [room.id for room in rooms]
+    opens, closes = day_windows(first_day, days, open_time, close_time)
+
+    range_start = datetime.fromtimestamp(int(opens[0]), tz=dt_timezone.utc)
+    range_end = datetime.fromtimestamp(int(closes[-1]), tz=dt_timezone.utc)
+    booked_rooms, booked_starts, booked_ends = booking_intervals(room_ids, range_start, range_end)
+
+    gap_rooms, gap_starts, gap_ends = compute_gaps(
+        room_ids, booked_rooms, booked_starts, booked_ends, opens, closes, min_minutes * 60
+    )
+
+    tz = timezone.get_current_timezone()
+    slots = {room_id: [] for room_id in room_ids}
+    for room_id, start, end in zip(gap_rooms.tolist(), gap_starts.tolist(), gap_ends.tolist()):
+        slots[room_id].append((datetime.fromtimestamp(start, tz=tz), datetime.fromtimestamp(end, tz=tz)))
+
+    return [(room, slots[room.id]) for room in rooms]
@@ -0,0 +1,289 @@
+import threading
+from bisect import bisect_left, bisect_right
+from django.core.cache import cache
+from django.utils import timezone
+
+INDEX_VERSION_KEY = 'classroom:booking-index:version'
+# (room ids, booking ids) each version touched, so other workers can reload
+# just those rooms; a missing record means reload everything
+INDEX_CHANGES_KEY = 'classroom:booking-index:changes:{version}'
+INDEX_CHANGES_TTL = 60 * 60
+MAX_REPLAYED_CHANGES = 100
+
+
+class RoomIntervals:
+    """Booking intervals of a single room kept sorted by (start, booking id)"""
+
+    __slots__ = ('starts', 'entries', 'max_ends')
+
+    def __init__(self):
+        self.starts = []
+        self.entries = []
+        # max_ends[i] is the latest end among entries[:i + 1], so overlap
+        # questions stay a bisection even if approved intervals overlap.
+        self.max_ends = []
+
+    def copy(self):
+        room = RoomIntervals()
+        room.starts = self.starts[:]
+        room.entries = self.entries[:]
+        room.max_ends = self.max_ends[:]
+        return room
+
+    def _reindex(self, position):
+        del self.max_ends[position:]
+        latest = self.max_ends[-1] if self.max_ends else None
+        for start, booking_id, end in self.entries[position:]:
+            latest = end if latest is None or end > latest else latest
+            self.max_ends.append(latest)
+
+    def add(self, start, end, booking_id):
+        position = bisect_right(self.entries, (start, booking_id, end))
+        self.entries.insert(position, (start, booking_id, end))
+        self.starts.insert(position, start)
+        self._reindex(position)
+
+    def remove(self, start, booking_id):
+        position = bisect_left(self.entries, (start, booking_id))
+        if position == len(self.entries) or self.entries[position][:2] != (start, booking_id):
+            return False
+        del self.entries[position]
+        del self.starts[position]
+        self._reindex(position)
+        return True
+
+    def occupant(self, at):
+        """Lowest booking id whose interval contains ``at``, or None"""
+        position = bisect_right(self.starts, at) - 1
+        found = None
+        while position >= 0 and self.max_ends[position] > at:
+            start, booking_id, end = self.entries[position]
+            if end > at and (found is None or booking_id < found):
+                found = booking_id
+            position -= 1
+        return found
+
+    def upcoming(self, after, limit=None):
+        """Entries starting strictly after ``after`` in start order"""
+        position = bisect_right(self.starts, after)
+        stop = None if limit is None else position + limit
+        return self.entries[position:stop]
+
+    def overlapping(self, start, end):
+        """Booking ids of every interval intersecting [start, end)"""
+        position = bisect_left(self.starts, end) - 1
+        found = []
+        while position >= 0 and self.max_ends[position] > start:
+            if self.entries[position][2] > start:
+                found.append(self.entries[position][1])
+            position -= 1
+        return found
+
+    def overlaps(self, start, end):
+        position = bisect_left(self.starts, end) - 1
+        return position >= 0 and self.max_ends[position] > start
+
+
+class IntervalIndex:
+    """
+    Per-classroom interval index answering availability questions by bisection.
+
+    ``add`` and ``remove`` change rooms in place, so they are only for an
+    index no other thread reads yet. ``replace`` and ``swap_rooms`` change
+    copies and publish them with one assignment; lookups never take a lock.
+    """
+
+    def __init__(self):
+        self.rooms = {}
+        self.locations = {}
+
+    def add(self, classroom_id, start, end, booking_id):
+        self.remove(booking_id)
+        self.rooms.setdefault(classroom_id, RoomIntervals()).add(start, end, booking_id)
+        self.locations[booking_id] = (classroom_id, start)
+
+    def remove(self, booking_id):
+        location = self.locations.pop(booking_id, None)
+        if location is None:
+            return False
+        classroom_id, start = location
+        return self.rooms[classroom_id].remove(start, booking_id)
+
+    def replace(self, booking_id, classroom_id=None, start=None, end=None):
+        """Copy-on-write: drop ``booking_id`` and re-add it at the given interval, if any"""
+        changed = {}
+        location = self.locations.pop(booking_id, None)
+        if location is not None:
+            previous_id, previous_start = location
+            changed[previous_id] = self.rooms[previous_id].copy()
+            changed[previous_id].remove(previous_start, booking_id)
+        if classroom_id is not None:
+            if classroom_id not in changed:
+                room = self.rooms.get(classroom_id)
+                changed[classroom_id] = room.copy() if room else RoomIntervals()
+            changed[classroom_id].add(start, end, booking_id)
+            self.locations[booking_id] = (classroom_id, start)
+        self._publish(changed)
+
+    def swap_rooms(self, rooms):
+        """Replace whole rooms with freshly built ones"""
+        for classroom_id in rooms:
+            previous = self.rooms.get(classroom_id)
+            for start, booking_id, end in previous.entries if previous else ():
+                if self.locations.get(booking_id, (None,))[0] == classroom_id:
+                    del self.locations[booking_id]
+        for classroom_id, room in rooms.items():
+            for start, booking_id, end in room.entries:
+                self.locations[booking_id] = (classroom_id, start)
+        self._publish(rooms)
+
+    def _publish(self, rooms):
+        merged = dict(self.rooms)
+        merged.update(rooms)
+        self.rooms = merged
+
+    def occupant(self, classroom_id, at):
+        room = self.rooms.get(classroom_id)
+        return room.occupant(at) if room else None
+
+    def next_start(self, classroom_id, after):
+        upcoming = self.upcoming(classroom_id, after, limit=1)
+        return upcoming[0][0] if upcoming else None
+
+    def upcoming(self, classroom_id, after, limit=None):
+        room = self.rooms.get(classroom_id)
+        return room.upcoming(after, limit) if room else []
+
+    def overlapping(self, classroom_id, start, end):
+        room = self.rooms.get(classroom_id)
+        return room.overlapping(start, end) if room else []
+
+    def overlaps(self, classroom_id, start, end):
+        room = self.rooms.get(classroom_id)
+        return room.overlaps(start, end) if room else False
+
+
+class BookingIntervalIndex:
+    """
+    Process-local index of approved bookings that have not ended yet.
+
+    Every worker keeps its own copy. Writers bump ``INDEX_VERSION_KEY`` in the
+    shared cache and record which rooms the new version touched; a worker
+    that sees versions it did not produce reloads those rooms from the
+    database on its next lookup, or everything if a record is missing.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._index = None
+        self._version = None
+
+    def _shared_version(self):
+        version = cache.get(INDEX_VERSION_KEY)
+        if version is None:
+            cache.add(INDEX_VERSION_KEY, 0, timeout=None)
+            version = cache.get(INDEX_VERSION_KEY, 0)
+        return version
+
+    def _publish(self, room_ids=None, booking_ids=()):
+        """Bump the shared version, recording what changed; None if the version had to be restarted"""
+        try:
+            version = cache.incr(INDEX_VERSION_KEY)
+        except ValueError:
+            cache.add(INDEX_VERSION_KEY, 1, timeout=None)
+            return None
+        if room_ids is not None:
+            cache.set(
+                INDEX_CHANGES_KEY.format(version=version),
+                (sorted(room_ids), sorted(booking_ids)), INDEX_CHANGES_TTL
+            )
+        return version
+
+    def _rows(self, classroom_ids=None):
+        from apps.classroom.models import Bookings
+
+        rows = Bookings.objects.filter(status='Approved', end_time__gt=timezone.now())
+        if classroom_ids is not None:
+            rows = rows.filter(classroom_id__in=classroom_ids)
+        return rows.order_by('classroom_id', 'start_time', 'id').values_list(
+            'classroom_id', 'start_time', 'end_time', 'id'
+        ).iterator(chunk_size=5000)
+
+    def _load(self):
+        index = IntervalIndex()
+        for classroom_id, start, end, booking_id in self._rows():
+            index.add(classroom_id, start, end, booking_id)
+        return index
+
+    def _load_rooms(self, classroom_ids):
+        rooms = {classroom_id: RoomIntervals() for classroom_id in classroom_ids}
+        for classroom_id, start, end, booking_id in self._rows(classroom_ids):
+            rooms[classroom_id].add(start, end, booking_id)
+        return rooms
+
+    def _changes(self, version):
+        """Room and booking ids changed after our version up to ``version``, or None if not all recorded"""
+        if version < self._version or version - self._version > MAX_REPLAYED_CHANGES:
+            return None
+        keys = [INDEX_CHANGES_KEY.format(version=number) for number in range(self._version + 1, version + 1)]
+        recorded = cache.get_many(keys)
+        if len(recorded) != len(keys):
+            return None
+        room_ids, booking_ids = set(), set()
+        for rooms, bookings in recorded.values():
+            room_ids.update(rooms)
+            booking_ids.update(bookings)
+        return room_ids, booking_ids
+
+    def current(self):
+        """The index, brought up to date first if another worker has changed bookings"""
+        version = self._shared_version()
+        with self._lock:
+            if self._index is not None and self._version != version:
+                changes = self._changes(version)
+                if changes is None:
+                    self._index = None
+                else:
+                    room_ids, booking_ids = changes
+                    # A booking may have moved out of a room nobody recorded
+                    room_ids.update(
+                        self._index.locations[booking_id][0]
+                        for booking_id in booking_ids if booking_id in self._index.locations
+                    )
+                    self._index.swap_rooms(self._load_rooms(room_ids))
+                    self._version = version
+            if self._index is None:
+                self._index = self._load()
+                self._version = version
+            return self._index
+
+    def apply(self, booking, deleted=False):
+        """Mirror a committed booking write locally and publish a new version"""
+        version = self._publish({booking.classroom_id}, {booking.id})
+        with self._lock:
+            # Not loaded yet, or someone else wrote in between: the next
+            # lookup catches up from the recorded changes
+            if self._index is None or version is None or self._version != version - 1:
+                return
+            if not deleted and booking.status == 'Approved':
+                self._index.replace(booking.id, booking.classroom_id, booking.start_time, booking.end_time)
+            else:
+                self._index.replace(booking.id)
+            self._version = version
+
+    def invalidate(self, room_ids=None):
+        """
+        Publish a new version after writes that bypass model signals (e.g.
+        bulk_create). Workers reload just ``room_ids``, or everything if not given.
+        """
+        self._publish(room_ids)
+        if room_ids is None:
+            self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._index = None
+            self._version = None
+
+
+booking_index = BookingIntervalIndex()
@@ -0,0 +1,32 @@
+import random
+from datetime import timedelta
+from django.utils import timezone
+from apps.authkit.models import User
+from apps.classroom.models import Rooms, Bookings
+
+
+def seed_rooms_and_bookings(room_count, booking_count, days_back=60):
+    """Generate benchmark rooms with back-to-back approved bookings"""
+    faculty = User.objects.create_user(
+        email='bench-faculty@example.com', password=None, username='bench-faculty', role='Faculty'
+    )
+    rooms = Rooms.objects.bulk_create([
+        Rooms(name=f'Bench {index}', campus='Bench', capacity=40, projector_count=index % 3)
+        for index in range(room_count)
+    ])
+    now = timezone.now()
+    per_room = max(booking_count // room_count, 1)
+    chunk = []
+    for room in rooms:
+        slot = now - timedelta(days=days_back)
+        for _ in range(per_room):
+            slot += timedelta(minutes=random.choice([60, 90, 120, 180]))
+            chunk.append(Bookings(
+                classroom=room, faculty=faculty, status='Approved',
+                start_time=slot, end_time=slot + timedelta(minutes=50)
+            ))
+            if len(chunk) >= 10000:
+                Bookings.objects.bulk_create(chunk)
+                chunk = []
+    Bookings.objects.bulk_create(chunk)
+    return rooms, faculty
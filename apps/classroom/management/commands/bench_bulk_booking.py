@@ -0,0 +1,48 @@
+import random
+import time
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIClient
+from apps.authkit.models import Batch
+from apps.base.base_benchmark import rolled_back
+from apps.classroom.management.commands._seed import seed_rooms_and_bookings
+
+
+class Command(BaseCommand):
+    help = "Time create-bulk-booking with many occurrences against seeded bookings (rolled back afterwards)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=200)
+        parser.add_argument('--bookings', type=int, default=100000)
+        parser.add_argument('--occurrences', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        random.seed(7)
+        with rolled_back():
+            rooms, faculty = seed_rooms_and_bookings(options['rooms'], options['bookings'])
+            Batch.objects.create(name='bench-batch')
+
+            first_day = datetime.now().replace(hour=8, minute=0, second=0, microsecond=0) + timedelta(days=1)
+            occurrences = []
+            for number in range(options['occurrences']):
+                start = first_day + timedelta(days=number % 120, hours=random.randint(0, 10))
+                occurrences.append({
+                    'classroom_id': rooms[number % len(rooms)].id,
+                    'start_time': start.strftime('%Y-%m-%dT%H:%M:%S'),
+                    'end_time': (start + timedelta(minutes=90)).strftime('%Y-%m-%dT%H:%M:%S'),
+                })
+
+            client = APIClient()
+            client.force_authenticate(faculty)
+            started = time.perf_counter()
+            response = client.post('/api/v1/create-bulk-booking', {
+                'batch': 'bench-batch',
+                'occurrences': occurrences,
+            }, format='json')
+            elapsed = time.perf_counter() - started
+
+            data = response.data.get('data') or response.data.get('error', {})
+            self.stdout.write(
+                f"{len(occurrences)} occurrences in {elapsed:.2f}s: "
+                f"{data.get('created', 0)} created, {len(data.get('conflicts', []))} conflicts"
+            )
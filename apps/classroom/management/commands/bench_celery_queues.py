@@ -0,0 +1,93 @@
+import threading
+import time
+from contextlib import ExitStack
+from celery import Celery
+from celery.contrib.testing.worker import start_worker
+from django.core.management.base import BaseCommand
+from apps.base.base_benchmark import percentile
+from core.celery import app as project_app
+
+# Stand-ins for the real tasks, routed the way the project routes them
+STAND_INS = {
+    'bench.send': 'apps.classroom.tasks.send_coalesced_notifications',
+    'bench.cleanup': 'apps.classroom.tasks.cleanup_old_bookings',
+}
+
+
+def benchmark_app(routed):
+    """A throwaway app on the in-memory broker, with or without the project's queue topology"""
+    app = Celery('bench_celery_queues', broker='memory://', set_as_current=False)
+    app.conf.update(
+        task_ignore_result=True,
+        worker_prefetch_multiplier=1,
+        broker_transport_options={'polling_interval': 0.005},
+        worker_hijack_root_logger=False,
+    )
+    if routed:
+        app.conf.update(
+            task_queues=project_app.conf.task_queues,
+            task_routes={name: project_app.conf.task_routes[task] for name, task in STAND_INS.items()},
+        )
+    return app
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure notification delivery latency behind a cleanup backlog on an in-memory broker, "
+        "with one shared queue and with the routed queue topology"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backlog', type=int, default=300, help="Cleanup tasks queued before the sends")
+        parser.add_argument('--sends', type=int, default=50)
+        parser.add_argument('--cleanup-ms', type=float, default=20)
+        parser.add_argument('--send-ms', type=float, default=2)
+        parser.add_argument('--workers', type=int, default=2, help="Workers in each layout (at least 2)")
+
+    def handle(self, *args, **options):
+        for routed in (False, True):
+            latencies = self.run(routed, options)
+            label = 'routed queues' if routed else 'single queue'
+            self.stdout.write(
+                f"{label}: delivery latency p50 {percentile(latencies, 0.5) * 1000:.0f} ms, "
+                f"p99 {percentile(latencies, 0.99) * 1000:.0f} ms, max {max(latencies) * 1000:.0f} ms"
+            )
+
+    def run(self, routed, options):
+        app = benchmark_app(routed)
+        latencies = []
+        done = threading.Event()
+        lock = threading.Lock()
+
+        @app.task(name='bench.cleanup')
+        def cleanup_chunk():
+            time.sleep(options['cleanup_ms'] / 1000)
+
+        @app.task(name='bench.send')
+        def send(queued_at):
+            time.sleep(options['send_ms'] / 1000)
+            with lock:
+                latencies.append(time.perf_counter() - queued_at)
+                if len(latencies) == options['sends']:
+                    done.set()
+
+        # Solo workers, each consuming in its own thread; the routed layout
+        # gives the delivery queue one of them and the rest to everything else
+        count = max(options['workers'], 2)
+        if routed:
+            layout = [['delivery']] + [['maintenance', 'scheduling', 'celery']] * (count - 1)
+        else:
+            layout = [['celery']] * count
+
+        with ExitStack() as stack:
+            for queues in layout:
+                stack.enter_context(
+                    start_worker(app, pool='solo', queues=queues, perform_ping_check=False, shutdown_timeout=60)
+                )
+            # The sends arrive while the cleanup burst is still queued
+            for _ in range(options['backlog']):
+                cleanup_chunk.delay()
+            for _ in range(options['sends']):
+                send.delay(time.perf_counter())
+            done.wait(timeout=600)
+        return latencies
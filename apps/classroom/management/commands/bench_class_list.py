@@ -0,0 +1,39 @@
+import random
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.base.base_benchmark import rolled_back, measure, summarize
+from apps.classroom.models import Bookings
+from apps.classroom.views import local_day_range
+from apps.classroom.management.commands._seed import seed_rooms_and_bookings
+
+
+class Command(BaseCommand):
+    help = "Compare start_time__date filtering with half-open day ranges for my-class-list (rolled back afterwards)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=200)
+        parser.add_argument('--bookings', type=int, default=200000)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        random.seed(7)
+        with rolled_back():
+            rooms, faculty = seed_rooms_and_bookings(options['rooms'], options['bookings'])
+            day = timezone.localdate()
+            week_start, week_end = local_day_range(day, day + timedelta(days=6))
+            day_start, day_end = local_day_range(day, day)
+
+            queries = {
+                'date cast (one day)': Bookings.objects.filter(faculty=faculty, start_time__date=day),
+                'range (one day)': Bookings.objects.filter(
+                    faculty=faculty, start_time__gte=day_start, start_time__lt=day_end
+                ),
+                'range (one week)': Bookings.objects.filter(
+                    faculty=faculty, start_time__gte=week_start, start_time__lt=week_end
+                ),
+            }
+            for label, queryset in queries.items():
+                queryset = queryset.select_related('batch', 'classroom').order_by('start_time')
+                self.stdout.write(f"-- {label}\n{queryset.explain()}")
+                self.stdout.write(f"   {summarize(measure(lambda: list(queryset.all()), options['repeat']))}")
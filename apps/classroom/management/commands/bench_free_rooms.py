@@ -0,0 +1,36 @@
+import random
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.base.base_benchmark import rolled_back, measure, summarize
+from apps.classroom.models import Rooms
+from apps.classroom.free_slots import free_rooms
+from apps.classroom.management.commands._seed import seed_rooms_and_bookings
+
+
+class Command(BaseCommand):
+    help = "Benchmark the free-room anti-join on generated data (rolled back afterwards)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=1000)
+        parser.add_argument('--bookings', type=int, default=1000000)
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        with rolled_back():
+            rooms, _ = seed_rooms_and_bookings(options['rooms'], options['bookings'])
+            now = timezone.now()
+
+            rooms_with_projector = Rooms.objects.filter(projector_count__gte=1)
+
+            def lookup():
+                start = now + timedelta(hours=random.randint(0, 24 * 120))
+                end = start + timedelta(minutes=random.choice([50, 80, 110]))
+                return list(free_rooms(rooms_with_projector, start, end))
+
+            query = free_rooms(rooms_with_projector, now, now + timedelta(minutes=50))
+            self.stdout.write(query.explain())
+            self.stdout.write(f"{len(rooms)} rooms / {options['bookings']} bookings: "
+                              f"{summarize(measure(lookup, options['repeat']))}")
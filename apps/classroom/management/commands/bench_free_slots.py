@@ -0,0 +1,60 @@
+import random
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.base.base_benchmark import rolled_back, measure, summarize
+from apps.classroom.free_slots import find_free_slots, DEFAULT_OPEN_TIME, DEFAULT_CLOSE_TIME
+from apps.classroom.models import Rooms, Bookings
+from apps.classroom.management.commands._seed import seed_rooms_and_bookings
+
+
+def naive_free_slots(classrooms, first_day, days, min_minutes, open_time, close_time):
+    """Reference implementation: one query and a Python sweep per room and day"""
+    tz = timezone.get_current_timezone()
+    result = []
+    for room in classrooms:
+        slots = []
+        for offset in range(days):
+            day = first_day + timedelta(days=offset)
+            cursor = datetime.combine(day, open_time, tzinfo=tz)
+            close = datetime.combine(day, close_time, tzinfo=tz)
+            bookings = Bookings.objects.filter(
+                classroom=room, status='Approved', start_time__lt=close, end_time__gt=cursor
+            ).order_by('start_time')
+            for booking in bookings:
+                if booking.start_time - cursor >= timedelta(minutes=min_minutes):
+                    slots.append((cursor, booking.start_time))
+                cursor = max(cursor, booking.end_time)
+            if close - cursor >= timedelta(minutes=min_minutes):
+                slots.append((cursor, close))
+        result.append((room, slots))
+    return result
+
+
+class Command(BaseCommand):
+    help = "Benchmark the NumPy free-slot finder against a per-room loop (rolled back afterwards)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=300)
+        parser.add_argument('--bookings', type=int, default=300000)
+        parser.add_argument('--days', type=int, default=14)
+        parser.add_argument('--min-minutes', type=int, default=30)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        random.seed(7)
+        open_time = datetime.strptime(DEFAULT_OPEN_TIME, '%H:%M').time()
+        close_time = datetime.strptime(DEFAULT_CLOSE_TIME, '%H:%M').time()
+        arguments = (timezone.localdate(), options['days'], options['min_minutes'], open_time, close_time)
+
+        with rolled_back():
+            seed_rooms_and_bookings(options['rooms'], options['bookings'])
+            classrooms = Rooms.objects.filter(campus='Bench')
+
+            vectorised = find_free_slots(classrooms, *arguments)
+            naive = naive_free_slots(classrooms, *arguments)
+            if [slots for room, slots in vectorised] != [slots for room, slots in naive]:
+                self.stderr.write("Results differ between implementations")
+
+            self.stdout.write(f"numpy: {summarize(measure(lambda: find_free_slots(classrooms, *arguments), options['repeat']))}")
+            self.stdout.write(f"naive: {summarize(measure(lambda: naive_free_slots(classrooms, *arguments), options['repeat']))}")
@@ -0,0 +1,95 @@
+import socketserver
+import threading
+import time
+from django.core.mail import send_mass_mail
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from apps.classroom.delivery import deliver_chunk, recipient_chunks, reset_pooled_connection
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept and discard messages"""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        with self.server.lock:
+            self.server.connections += 1
+        time.sleep(self.server.handshake_latency)
+        self.reply('220 sink')
+        for line in self.rfile:
+            command = line[:4].upper()
+            if command == b'DATA':
+                self.reply('354 go ahead')
+                for data in self.rfile:
+                    if data == b'.\r\n':
+                        break
+                with self.server.lock:
+                    self.server.messages += 1
+                self.reply('250 queued')
+            elif command == b'QUIT':
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('250 ok')
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, handshake_latency):
+        super().__init__(('127.0.0.1', 0), SMTPSinkHandler)
+        self.lock = threading.Lock()
+        self.handshake_latency = handshake_latency
+        self.connections = 0
+        self.messages = 0
+
+
+class Command(BaseCommand):
+    help = "Compare per-task SMTP connections with pooled, chunked delivery against a local SMTP sink"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--notifications', type=int, default=200)
+        parser.add_argument('--students', type=int, default=120, help="Recipients per notification")
+        parser.add_argument('--chunk-size', type=int, default=50)
+        parser.add_argument('--handshake-ms', type=float, default=20, help="Simulated connection setup latency")
+
+    def handle(self, *args, **options):
+        sink = SMTPSink(options['handshake_ms'] / 1000)
+        threading.Thread(target=sink.serve_forever, daemon=True).start()
+        students = [f'student-{i}@example.com' for i in range(options['students'])]
+
+        smtp = dict(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend', EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=sink.server_address[1], EMAIL_USE_TLS=False, EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='',
+            NOTIFICATION_RECIPIENTS_PER_MESSAGE=options['chunk_size'],
+        )
+        with override_settings(**smtp):
+            def per_task_connection():
+                for _ in range(options['notifications']):
+                    send_mass_mail([
+                        ('Class started', 'body', 'noreply@example.com', ['faculty@example.com']),
+                        ('Class started', 'body', 'noreply@example.com', students),
+                    ])
+
+            def pooled_chunked():
+                reset_pooled_connection()
+                for _ in range(options['notifications']):
+                    deliver_chunk('Class started', 'body', ['faculty@example.com'])
+                    for recipients in recipient_chunks(students):
+                        deliver_chunk('Class started', 'body', recipients)
+                reset_pooled_connection()
+
+            for label, run in (('connection per task', per_task_connection), ('pooled + chunked', pooled_chunked)):
+                sink.connections = sink.messages = 0
+                started = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{label}: {options['notifications']} notifications in {elapsed:.2f}s "
+                    f"({options['notifications'] / elapsed:.0f}/s), {sink.connections} connection(s), "
+                    f"{sink.messages} message(s)"
+                )
+        sink.shutdown()
@@ -0,0 +1,127 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.authkit.models import User, Batch
+from apps.classroom.models import Rooms, Bookings
+from apps.classroom.notification_templates import format_notification_email, notification_context
+
+
+def legacy_format(booking, notification_type):
+    """The previous formatter: every type and audience built as f-strings on each call"""
+    classroom = booking.classroom
+    faculty = booking.faculty
+    batch = booking.batch
+
+    subjects = {
+        'upcoming': f'Upcoming Class in {classroom.name} - Starting in 10 minutes',
+        'started': f'Class Started in {classroom.name}',
+        'completed': f'Class Completed in {classroom.name} - Feedback Required'
+    }
+
+    faculty_messages = {
+        'upcoming': f"""Dear {faculty.username},
+Your class in {classroom.name} will start in 10 minutes.
+
+Details:
+- Time: {booking.start_time.strftime('%I:%M %p')} - {booking.end_time.strftime('%I:%M %p')}
+- Batch: {batch.name if batch else 'N/A'}
+- Campus: {classroom.campus}
+
+Please ensure you reach the classroom on time.""",
+
+        'started': f"""Dear {faculty.username},
+Your class in {classroom.name} has started.
+
+Details:
+- Duration: {booking.start_time.strftime('%I:%M %p')} - {booking.end_time.strftime('%I:%M %p')}
+- Batch: {batch.name if batch else 'N/A'}
+- Campus: {classroom.campus}""",
+
+        'completed': f"""Dear {faculty.username},
+Your class in {classroom.name} has been completed.
+
+Thank you for using our classroom booking system."""
+    }
+
+    student_messages = {
+        'upcoming': f"""Dear Student,
+Your class in {classroom.name} will start in 10 minutes.
+
+Details:
+- Faculty: {faculty.username}
+- Time: {booking.start_time.strftime('%I:%M %p')} - {booking.end_time.strftime('%I:%M %p')}
+- Campus: {classroom.campus}
+
+Please reach the classroom on time.""",
+
+        'started': f"""Dear Student,
+Your class in {classroom.name} has started.
+
+Details:
+- Faculty: {faculty.username}
+- Duration: {booking.start_time.strftime('%I:%M %p')} - {booking.end_time.strftime('%I:%M %p')}
+- Campus: {classroom.campus}""",
+
+        'completed': f"""Dear Student,
+Your class in {classroom.name} has been completed.
+
+Please take a moment to provide feedback about the classroom:
+[Feedback Link Here]
+
+Your feedback helps us maintain and improve our facilities.
+Thank you!"""
+    }
+
+    return {
+        'subject': subjects[notification_type],
+        'faculty_message': faculty_messages[notification_type],
+        'student_message': student_messages[notification_type]
+    }
+
+
+class Command(BaseCommand):
+    help = "Compare f-string and precompiled notification formatting (CPU time, no database)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sends', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        start = timezone.now()
+        bookings = [
+            Bookings(
+                id=i, classroom=Rooms(name=f'Room {i % 50}', campus='Main', capacity=40),
+                faculty=User(username=f'faculty-{i % 20}', role='Faculty'), batch=Batch(name=f'CSE-{i % 10}'),
+                start_time=start + timedelta(minutes=i), end_time=start + timedelta(minutes=i + 90)
+            )
+            for i in range(options['sends'])
+        ]
+        types = ['upcoming', 'started', 'completed']
+
+        def legacy():
+            for i, booking in enumerate(bookings):
+                legacy_format(booking, types[i % 3])
+
+        def compiled():
+            # One context per booking, shared by the faculty and student sends
+            for i, booking in enumerate(bookings):
+                context = notification_context(booking)
+                format_notification_email(booking, types[i % 3], ('subject', 'faculty_message'), context)
+                format_notification_email(booking, types[i % 3], ('subject', 'student_message'), context)
+
+        def compiled_with_html():
+            for i, booking in enumerate(bookings):
+                context = notification_context(booking)
+                for audience in ('faculty', 'student'):
+                    format_notification_email(
+                        booking, types[i % 3], ('subject', f'{audience}_message', f'{audience}_html'), context
+                    )
+
+        for label, func in (('f-strings', legacy), ('templates', compiled), ('templates+html', compiled_with_html)):
+            started = time.process_time()
+            func()
+            elapsed = time.process_time() - started
+            self.stdout.write(
+                f"{label}: {elapsed * 1000:.0f} ms CPU for {options['sends']} sends "
+                f"({elapsed / options['sends'] * 1e6:.1f} us/send)"
+            )
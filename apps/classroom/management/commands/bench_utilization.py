@@ -0,0 +1,67 @@
+import random
+from datetime import datetime, timedelta
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.base.base_benchmark import rolled_back, measure, summarize
+from apps.classroom.free_slots import DEFAULT_OPEN_TIME, DEFAULT_CLOSE_TIME
+from apps.classroom.models import Rooms, Bookings
+from apps.classroom.utilization import compute_utilization
+from apps.classroom.management.commands._seed import seed_rooms_and_bookings
+
+
+def naive_utilization(campus, first_day, days, open_time, close_time):
+    """Reference implementation: a Python loop over every room, day and booking"""
+    tz = timezone.get_current_timezone()
+    result = {}
+    for room in Rooms.objects.filter(campus=campus).order_by('campus', 'name', 'id'):
+        utilization = []
+        for offset in range(days):
+            day = first_day + timedelta(days=offset)
+            opens = datetime.combine(day, open_time, tzinfo=tz)
+            closes = datetime.combine(day, close_time, tzinfo=tz)
+            booked = timedelta(0)
+            cursor = opens
+            for booking in Bookings.objects.filter(
+                classroom=room, status='Approved', start_time__lt=closes, end_time__gt=opens
+            ).order_by('start_time'):
+                start = max(booking.start_time, cursor)
+                end = min(booking.end_time, closes)
+                if end > start:
+                    booked += end - start
+                    cursor = end
+            utilization.append(round(booked / (closes - opens), 4))
+        result[room.id] = utilization
+    return result
+
+
+class Command(BaseCommand):
+    help = "Benchmark the NumPy utilization report against a per-room loop (rolled back afterwards)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=300)
+        parser.add_argument('--bookings', type=int, default=300000)
+        parser.add_argument('--days', type=int, default=30)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        random.seed(7)
+        open_time = datetime.strptime(DEFAULT_OPEN_TIME, '%H:%M').time()
+        close_time = datetime.strptime(DEFAULT_CLOSE_TIME, '%H:%M').time()
+        first_day = timezone.localdate() - timedelta(days=options['days'])
+        arguments = (first_day, options['days'], 'day', 'Bench', open_time, close_time)
+
+        with rolled_back():
+            seed_rooms_and_bookings(options['rooms'], options['bookings'])
+
+            report = compute_utilization(*arguments)
+            naive = naive_utilization('Bench', first_day, options['days'], open_time, close_time)
+            # Both round to four places; np.round and round() may differ in the last one
+            if any(
+                not np.allclose(room['utilization'], naive[room['room_id']], atol=1e-4) for room in report['rooms']
+            ) or len(report['rooms']) != len(naive):
+                self.stderr.write("Results differ between implementations")
+
+            naive_arguments = ('Bench', first_day, options['days'], open_time, close_time)
+            self.stdout.write(f"numpy: {summarize(measure(lambda: compute_utilization(*arguments), options['repeat']))}")
+            self.stdout.write(f"naive: {summarize(measure(lambda: naive_utilization(*naive_arguments), options['repeat']))}")
@@ -0,0 +1,266 @@
+import csv
+import json
+import os
+import time
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from apps.authkit.models import User, Batch
+from apps.classroom.models import Rooms, Bookings
+from apps.classroom.interval_index import IntervalIndex
+from apps.classroom.bulk_booking import lock_classrooms
+from apps.classroom.signals import bookings_bulk_changed
+from apps.classroom.tasks import queue_missed_notifications
+
+REQUIRED_COLUMNS = {'room', 'campus', 'batch', 'faculty', 'start_time', 'end_time'}
+
+
+def parse_datetime(value):
+    parsed = datetime.fromisoformat(value.strip())
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream a timetable CSV (room, campus, batch, faculty, start_time, end_time "
+        "and optional capacity, status) into bookings, one locked chunk at a time. "
+        "A --dry-run writes nothing, so it keeps the approved rows it accepted in "
+        "memory to check later rows against them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Validate every row without writing")
+        parser.add_argument('--create-missing', action='store_true', help="Create unknown rooms and batches")
+        parser.add_argument('--checkpoint', help="Checkpoint file (default: <path>.checkpoint)")
+        parser.add_argument('--resume', action='store_true', help="Skip rows committed by a previous run")
+        parser.add_argument('--no-notify', action='store_true', help="Do not schedule class notifications")
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.checkpoint_path = options['checkpoint'] or f"{options['path']}.checkpoint"
+        self.dry_run = options['dry_run']
+
+        # Name -> id lookups, preloaded once
+        self.rooms = {(name, campus): room_id for room_id, name, campus in Rooms.objects.values_list('id', 'name', 'campus')}
+        self.batches = dict(Batch.objects.values_list('name', 'id'))
+        self.faculty = dict(User.objects.filter(role='Faculty').values_list('username', 'id'))
+
+        # Approved rows a dry run accepted; a real run reads them back from the database
+        self.validated = IntervalIndex()
+        self.pending_id = 0
+
+        skip = self.read_checkpoint() if options['resume'] else 0
+        stats = {'rows': 0, 'created': 0, 'conflicts': 0, 'errors': 0}
+        started = time.perf_counter()
+        chunk = []
+
+        try:
+            handle = open(options['path'], newline='', encoding='utf-8-sig')
+        except OSError as e:
+            raise CommandError(f"Cannot open {options['path']}: {e}")
+
+        with handle:
+            reader = csv.DictReader(handle)
+            missing = REQUIRED_COLUMNS - set(reader.fieldnames or [])
+            if missing:
+                raise CommandError(f"Missing columns: {', '.join(sorted(missing))}")
+
+            for line_number, row in enumerate(reader, start=2):
+                stats['rows'] += 1
+                if stats['rows'] <= skip:
+                    continue
+
+                booking = self.build_booking(line_number, row, stats)
+                if booking is not None:
+                    chunk.append((line_number, row['room'].strip(), booking))
+
+                if len(chunk) >= options['chunk_size']:
+                    self.flush(chunk, stats)
+                    chunk = []
+                    self.report(stats, started)
+
+            self.flush(chunk, stats)
+
+        self.report(stats, started)
+        if not self.dry_run and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Validated' if self.dry_run else 'Imported'} {stats['rows'] - skip} row(s): "
+            f"{stats['created']} booking(s), {stats['conflicts']} conflict(s), {stats['errors']} error(s)"
+        ))
+
+    def build_booking(self, line_number, row, stats):
+        try:
+            start_time = parse_datetime(row['start_time'])
+            end_time = parse_datetime(row['end_time'])
+            if start_time >= end_time:
+                raise ValueError("start_time must be before end_time")
+            booking_status = (row.get('status') or 'Approved').strip()
+            if booking_status not in dict(Bookings.STATUS_CHOICES):
+                raise ValueError(f"unknown status {booking_status!r}")
+            faculty_id = self.faculty.get(row['faculty'].strip())
+            if faculty_id is None:
+                raise ValueError(f"unknown faculty {row['faculty']!r}")
+            classroom_id = self.resolve_room(row)
+            batch_id = self.resolve_batch(row['batch'].strip())
+        except (KeyError, ValueError, AttributeError) as e:
+            stats['errors'] += 1
+            self.stderr.write(f"line {line_number}: {e}")
+            return None
+
+        return Bookings(
+            classroom_id=classroom_id,
+            faculty_id=faculty_id,
+            batch_id=batch_id,
+            start_time=start_time,
+            end_time=end_time,
+            status=booking_status
+        )
+
+    def resolve_room(self, row):
+        key = (row['room'].strip(), row['campus'].strip())
+        if key in self.rooms:
+            return self.rooms[key]
+        if not self.options['create_missing']:
+            raise ValueError(f"unknown room {key[0]!r} on campus {key[1]!r}")
+        capacity = int(row.get('capacity') or 0)
+        if self.dry_run:
+            self.pending_id -= 1
+            self.rooms[key] = self.pending_id
+        else:
+            self.rooms[key] = Rooms.objects.create(name=key[0], campus=key[1], capacity=capacity).id
+        return self.rooms[key]
+
+    def resolve_batch(self, name):
+        if not name:
+            return None
+        if name in self.batches:
+            return self.batches[name]
+        if not self.options['create_missing']:
+            raise ValueError(f"unknown batch {name!r}")
+        if self.dry_run:
+            self.pending_id -= 1
+            self.batches[name] = self.pending_id
+        else:
+            batch, created = Batch.objects.get_or_create(name=name)
+            self.batches[name] = batch.id
+        return self.batches[name]
+
+    def check_chunk(self, chunk):
+        """
+        Split a chunk into accepted rows and approved rows that overlap an
+        approved booking or an earlier approved row. Like the database
+        constraint, only approved bookings conflict, so only the approved
+        bookings of the chunk's rooms and time range are read.
+        """
+        approved = [booking for line_number, room, booking in chunk if booking.status == 'Approved']
+        index = IntervalIndex()
+        room_ids = {booking.classroom_id for booking in approved if booking.classroom_id > 0}
+        if room_ids:
+            existing = Bookings.objects.filter(
+                classroom_id__in=room_ids, status='Approved',
+                start_time__lt=max(booking.end_time for booking in approved),
+                end_time__gt=min(booking.start_time for booking in approved)
+            ).values_list('classroom_id', 'start_time', 'end_time', 'id')
+            for classroom_id, start, end, booking_id in existing.iterator(chunk_size=5000):
+                index.add(classroom_id, start, end, booking_id)
+
+        accepted, conflicts = [], []
+        for entry in chunk:
+            booking = entry[2]
+            if booking.status == 'Approved':
+                interval = (booking.classroom_id, booking.start_time, booking.end_time)
+                if index.overlaps(*interval) or self.validated.overlaps(*interval):
+                    conflicts.append(entry)
+                    continue
+                self.pending_id -= 1
+                index.add(*interval, self.pending_id)
+                if self.dry_run:
+                    self.validated.add(*interval, self.pending_id)
+            accepted.append(entry)
+        return accepted, conflicts
+
+    def insert_chunk(self, chunk):
+        """Lock the chunk's rooms in id order, then check and insert it; returns (created, conflicts)"""
+        lock_classrooms({booking.classroom_id for line_number, room, booking in chunk})
+        accepted, conflicts = self.check_chunk(chunk)
+        return Bookings.objects.bulk_create([booking for line_number, room, booking in accepted]), conflicts
+
+    def insert_rows(self, chunk):
+        """
+        Like insert_chunk, but each row gets its own savepoint, so a row that
+        clashes with a booking written without the room locks is reported
+        instead of rolling back the chunk
+        """
+        lock_classrooms({booking.classroom_id for line_number, room, booking in chunk})
+        accepted, conflicts = self.check_chunk(chunk)
+        created = []
+        for entry in accepted:
+            try:
+                with transaction.atomic():
+                    created += Bookings.objects.bulk_create([entry[2]])
+            except IntegrityError:
+                conflicts.append(entry)
+        return created, conflicts
+
+    def flush(self, chunk, stats):
+        if not chunk:
+            return
+        if self.dry_run:
+            accepted, conflicts = self.check_chunk(chunk)
+            created = [booking for line_number, room, booking in accepted]
+        else:
+            try:
+                with transaction.atomic():
+                    created, conflicts = self.insert_chunk(chunk)
+                    self.after_commit(created)
+            except IntegrityError:
+                # Raised by the PostgreSQL exclusion constraint when another
+                # writer skipped the room locks; redo the chunk row by row
+                for line_number, room, booking in chunk:
+                    booking.pk = None
+                    booking._state.adding = True
+                with transaction.atomic():
+                    created, conflicts = self.insert_rows(chunk)
+                    self.after_commit(created)
+            self.write_checkpoint(stats['rows'])
+
+        stats['created'] += len(created)
+        stats['conflicts'] += len(conflicts)
+        for line_number, room, booking in sorted(conflicts, key=lambda entry: entry[0]):
+            self.stderr.write(f"line {line_number}: {room} is already booked during this time")
+
+    def after_commit(self, created):
+        if not created:
+            return
+        room_ids = {booking.classroom_id for booking in created}
+        transaction.on_commit(lambda: bookings_bulk_changed(room_ids))
+        if not self.options['no_notify']:
+            transaction.on_commit(lambda: queue_missed_notifications(created))
+
+    def read_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as handle:
+                return json.load(handle)['rows']
+        except FileNotFoundError:
+            return 0
+        except (ValueError, KeyError) as e:
+            raise CommandError(f"Unreadable checkpoint {self.checkpoint_path}: {e}")
+
+    def write_checkpoint(self, rows_done):
+        # Only written after the chunk committed; a crash in between replays
+        # the chunk, whose approved rows then show up as conflicts
+        temporary = f"{self.checkpoint_path}.tmp"
+        with open(temporary, 'w') as handle:
+            json.dump({'path': self.options['path'], 'rows': rows_done}, handle)
+        os.replace(temporary, self.checkpoint_path)
+
+    def report(self, stats, started):
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        self.stdout.write(
+            f"{stats['rows']} rows, {stats['created']} created, {stats['conflicts']} conflicts, "
+            f"{stats['errors']} errors ({stats['rows'] / elapsed:.0f} rows/s)"
+        )
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authkit', '0007_user_batch'),
+        ('classroom', '0006_rooms_marker_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookings',
+            index=models.Index(fields=['classroom', 'status', 'start_time', 'end_time'], name='booking_room_status_time_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:31
+
+from django.db import migrations
+
+CREATE_CONSTRAINT = """
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+ALTER TABLE classroom_bookings
+    ADD CONSTRAINT booking_no_overlap_approved
+    EXCLUDE USING gist (classroom_id WITH =, tstzrange(start_time, end_time, '[)') WITH &&)
+    WHERE (status = 'Approved');
+"""
+
+DROP_CONSTRAINT = """
+ALTER TABLE classroom_bookings DROP CONSTRAINT IF EXISTS booking_no_overlap_approved;
+"""
+
+
+def add_exclusion_constraint(apps, schema_editor):
+    # Range types and exclusion constraints only exist on PostgreSQL
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_CONSTRAINT)
+
+
+def remove_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_CONSTRAINT)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classroom', '0007_bookings_room_status_time_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_exclusion_constraint, remove_exclusion_constraint),
+    ]
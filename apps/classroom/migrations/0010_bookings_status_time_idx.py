@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authkit', '0007_user_batch'),
+        ('classroom', '0009_bookings_faculty_start_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookings',
+            index=models.Index(fields=['status', 'start_time'], name='booking_status_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookings',
+            index=models.Index(fields=['status', 'end_time'], name='booking_status_end_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:39
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classroom', '0010_bookings_status_time_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('value', models.DateTimeField()),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='NotificationLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('notification_type', models.CharField(choices=[('upcoming', 'Upcoming'), ('started', 'Started'), ('completed', 'Completed')], max_length=20)),
+                ('sent_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_logs', to='classroom.bookings')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('booking', 'notification_type'), name='notification_log_unique_send')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classroom', '0012_notificationpreference'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('notification_type', models.CharField(choices=[('upcoming', 'Upcoming'), ('started', 'Started'), ('completed', 'Completed')], max_length=20)),
+                ('send_at', models.DateTimeField()),
+                ('task_id', models.CharField(db_index=True, max_length=255)),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scheduled_notifications', to='classroom.bookings')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
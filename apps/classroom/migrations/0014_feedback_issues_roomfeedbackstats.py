@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_room_feedback_stats(apps, schema_editor):
+    # Earlier feedback only had free text, so it counts as submissions without issues
+    Feedbacks = apps.get_model('classroom', 'Feedbacks')
+    RoomFeedbackStats = apps.get_model('classroom', 'RoomFeedbackStats')
+    totals = Feedbacks.objects.values('booking__classroom_id').annotate(submissions=Count('id'))
+    RoomFeedbackStats.objects.bulk_create([
+        RoomFeedbackStats(room_id=total['booking__classroom_id'], submissions=total['submissions'])
+        for total in totals
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classroom', '0013_schedulednotification'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomFeedbackStats',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('room', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='feedback_stats', serialize=False, to='classroom.rooms')),
+                ('submissions', models.IntegerField(default=0)),
+                ('cleanliness_issues', models.IntegerField(default=0)),
+                ('equipment_issues', models.IntegerField(default=0)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='feedbacks',
+            name='cleanliness_issue',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='feedbacks',
+            name='equipment_issue',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddConstraint(
+            model_name='feedbacks',
+            constraint=models.UniqueConstraint(fields=('booking', 'student'), name='feedback_unique_student'),
+        ),
+        migrations.RunPython(backfill_room_feedback_stats, migrations.RunPython.noop),
+    ]
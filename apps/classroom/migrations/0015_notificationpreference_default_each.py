@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classroom', '0014_feedback_issues_roomfeedbackstats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notificationpreference',
+            name='mode',
+            field=models.CharField(choices=[('each', 'Every notification'), ('digest', 'Digest'), ('off', 'Off')], default='each', max_length=10),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from apps.base.base_model import BaseModel
 from apps.authkit.models import User, Batch
 
@@ -30,6 +31,14 @@ class Bookings(BaseModel):
     )
     status = models.CharField(max_length=255, choices=STATUS_CHOICES, default='Pending')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['classroom', 'status', 'start_time', 'end_time'], name='booking_room_status_time_idx'),
+            models.Index(fields=['faculty', 'start_time'], name='booking_faculty_start_idx'),
+            models.Index(fields=['status', 'start_time'], name='booking_status_start_idx'),
+            models.Index(fields=['status', 'end_time'], name='booking_status_end_idx'),
+        ]
+
     def __str__(self):
         return f"{self.classroom.name} booked by {self.faculty.username}"
     
@@ -38,6 +47,73 @@ class Feedbacks(BaseModel):
     student = models.ForeignKey(User, on_delete=models.CASCADE, limit_choices_to={'role': 'Student'})
     cleanliness_feedback = models.CharField(max_length=255, blank=True, null=True)
     equipment_feedback = models.CharField(max_length=255, blank=True, null=True)
+    cleanliness_issue = models.BooleanField(default=False)
+    equipment_issue = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['booking', 'student'], name='feedback_unique_student'),
+        ]
 
     def __str__(self):
         return f"Feedback by {self.student.username} for {self.booking.classroom.name}"
+
+class RoomFeedbackStats(BaseModel):
+    """Running feedback totals per room, kept in step with Feedbacks by signals"""
+    room = models.OneToOneField(Rooms, on_delete=models.CASCADE, primary_key=True, related_name='feedback_stats')
+    submissions = models.IntegerField(default=0)
+    cleanliness_issues = models.IntegerField(default=0)
+    equipment_issues = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Feedback stats for room {self.room_id}"
+
+class NotificationLog(BaseModel):
+    """One row per notification sent for a booking; the unique constraint makes sends idempotent"""
+    booking = models.ForeignKey(Bookings, on_delete=models.CASCADE, related_name='notification_logs')
+    NOTIFICATION_TYPE_CHOICES = (
+        ('upcoming', 'Upcoming'),
+        ('started', 'Started'),
+        ('completed', 'Completed'),
+    )
+    notification_type = models.CharField(max_length=20, choices=NOTIFICATION_TYPE_CHOICES)
+    sent_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['booking', 'notification_type'], name='notification_log_unique_send'),
+        ]
+
+    def __str__(self):
+        return f"{self.notification_type} notification for booking {self.booking_id}"
+
+class TaskWatermark(BaseModel):
+    """How far a periodic task has processed, persisted across runs"""
+    name = models.CharField(max_length=255, unique=True)
+    value = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} @ {self.value}"
+
+class NotificationPreference(BaseModel):
+    """How a student wants class notifications; users without a row get NOTIFICATION_DEFAULT_MODE"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='notification_preference')
+    MODE_CHOICES = (
+        ('each', 'Every notification'),
+        ('digest', 'Digest'),
+        ('off', 'Off'),
+    )
+    mode = models.CharField(max_length=10, choices=MODE_CHOICES, default='each')
+
+    def __str__(self):
+        return f"{self.user.username}: {self.mode}"
+
+class ScheduledNotification(BaseModel):
+    """A notification send queued with the broker, so the task can be revoked when its booking changes"""
+    booking = models.ForeignKey(Bookings, on_delete=models.CASCADE, related_name='scheduled_notifications')
+    notification_type = models.CharField(max_length=20, choices=NotificationLog.NOTIFICATION_TYPE_CHOICES)
+    send_at = models.DateTimeField()
+    task_id = models.CharField(max_length=255, db_index=True)
+
+    def __str__(self):
+        return f"{self.notification_type} notification for booking {self.booking_id} ({self.task_id})"
@@ -0,0 +1,145 @@
+from functools import cached_property
+from html import escape
+from apps.classroom.feedback import feedback_link
+
+SOURCES = {
+    'upcoming': {
+        'subject': "Upcoming Class in {classroom} - Starting in 10 minutes",
+        'faculty_message': """Dear {faculty},
+Your class in {classroom} will start in 10 minutes.
+
+Details:
+- Time: {time_range}
+- Batch: {batch}
+- Campus: {campus}
+
+Please ensure you reach the classroom on time.""",
+        'student_message': """Dear Student,
+Your class in {classroom} will start in 10 minutes.
+
+Details:
+- Faculty: {faculty}
+- Time: {time_range}
+- Campus: {campus}
+
+Please reach the classroom on time.""",
+        'faculty_html': """<p>Dear {faculty},</p>
+<p>Your class in <strong>{classroom}</strong> will start in 10 minutes.</p>
+<ul><li>Time: {time_range}</li><li>Batch: {batch}</li><li>Campus: {campus}</li></ul>
+<p>Please ensure you reach the classroom on time.</p>""",
+        'student_html': """<p>Dear Student,</p>
+<p>Your class in <strong>{classroom}</strong> will start in 10 minutes.</p>
+<ul><li>Faculty: {faculty}</li><li>Time: {time_range}</li><li>Campus: {campus}</li></ul>
+<p>Please reach the classroom on time.</p>""",
+    },
+    'started': {
+        'subject': "Class Started in {classroom}",
+        'faculty_message': """Dear {faculty},
+Your class in {classroom} has started.
+
+Details:
+- Duration: {time_range}
+- Batch: {batch}
+- Campus: {campus}""",
+        'student_message': """Dear Student,
+Your class in {classroom} has started.
+
+Details:
+- Faculty: {faculty}
+- Duration: {time_range}
+- Campus: {campus}""",
+        'faculty_html': """<p>Dear {faculty},</p>
+<p>Your class in <strong>{classroom}</strong> has started.</p>
+<ul><li>Duration: {time_range}</li><li>Batch: {batch}</li><li>Campus: {campus}</li></ul>""",
+        'student_html': """<p>Dear Student,</p>
+<p>Your class in <strong>{classroom}</strong> has started.</p>
+<ul><li>Faculty: {faculty}</li><li>Duration: {time_range}</li><li>Campus: {campus}</li></ul>""",
+    },
+    'completed': {
+        'subject': "Class Completed in {classroom} - Feedback Required",
+        'faculty_message': """Dear {faculty},
+Your class in {classroom} has been completed.
+
+Thank you for using our classroom booking system.""",
+        'student_message': """Dear Student,
+Your class in {classroom} has been completed.
+
+Please take a moment to provide feedback about the classroom:
+{feedback_link}
+
+Your feedback helps us maintain and improve our facilities.
+Thank you!""",
+        'faculty_html': """<p>Dear {faculty},</p>
+<p>Your class in <strong>{classroom}</strong> has been completed.</p>
+<p>Thank you for using our classroom booking system.</p>""",
+        'student_html': """<p>Dear Student,</p>
+<p>Your class in <strong>{classroom}</strong> has been completed.</p>
+<p>Please take a moment to <a href="{feedback_link}">provide feedback about the classroom</a>.</p>
+<p>Your feedback helps us maintain and improve our facilities.<br>Thank you!</p>""",
+    },
+}
+
+# Bound format_map of every (notification_type, part), looked up once per process
+TEMPLATES = {
+    (notification_type, part): source.format_map
+    for notification_type, parts in SOURCES.items()
+    for part, source in parts.items()
+}
+
+DEFAULT_PARTS = ('subject', 'faculty_message', 'student_message')
+
+
+class NotificationContext(dict):
+    """
+    Template values of one booking. The feedback link, which only completion
+    messages use, is signed on first use, and so is each HTML-escaped value.
+    """
+
+    def __init__(self, booking_id, **values):
+        super().__init__(values)
+        self.booking_id = booking_id
+
+    def __missing__(self, key):
+        if key != 'feedback_link':
+            raise KeyError(key)
+        value = self[key] = feedback_link(self.booking_id)
+        return value
+
+    @cached_property
+    def html(self):
+        return EscapedContext(self)
+
+
+class EscapedContext(dict):
+    """HTML-escaped values of a NotificationContext, filled in as templates ask for them"""
+
+    def __init__(self, context):
+        super().__init__()
+        self.context = context
+
+    def __missing__(self, key):
+        value = self[key] = escape(self.context[key])
+        return value
+
+
+def notification_context(booking):
+    """Values shared by every part of a booking's notifications, formatted once"""
+    classroom = booking.classroom
+    return NotificationContext(
+        booking.id,
+        classroom=classroom.name,
+        campus=classroom.campus,
+        faculty=booking.faculty.username,
+        batch=booking.batch.name if booking.batch else 'N/A',
+        time_range=f"{booking.start_time.strftime('%I:%M %p')} - {booking.end_time.strftime('%I:%M %p')}",
+    )
+
+
+def render_notification(notification_type, part, context):
+    return TEMPLATES[(notification_type, part)](context.html if part.endswith('_html') else context)
+
+
+def format_notification_email(booking, notification_type, parts=DEFAULT_PARTS, context=None):
+    """Render only the requested parts of one notification type"""
+    context = context or notification_context(booking)
+    return {part: render_notification(notification_type, part, context) for part in parts}
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core.cache import cache
+from apps.authkit.models import User
+
+BATCH_RECIPIENTS_KEY = 'classroom:batch-recipients:{batch_id}'
+# Signals cover saves and deletes; queryset updates and bulk writes elsewhere
+# are only picked up when the entry expires
+BATCH_RECIPIENTS_TTL = 60 * 60 * 6
+
+# User fields that decide whether and where someone receives batch mail
+RECIPIENT_FIELDS = ('batch_id', 'role', 'email')
+
+
+def get_student_emails(batch, modes=None):
+    """
+    Get all student emails from a specific batch, cached per batch.
+
+    ``modes`` limits the result to students whose notification preference
+    ('each', 'digest' or 'off') is one of them.
+    """
+    if not batch:
+        return []
+    key = BATCH_RECIPIENTS_KEY.format(batch_id=batch.pk)
+    # Stored as one string of "mode<TAB>email" lines, far smaller than a
+    # pickled list; the mode is empty for students without a preference
+    roster = cache.get(key)
+    if roster is None:
+        roster = '\n'.join(
+            f"{mode or ''}\t{email}"
+            for email, mode in User.objects.filter(
+                batch=batch,
+                role='Student'
+            ).order_by('id').values_list('email', 'notification_preference__mode')
+        )
+        cache.set(key, roster, BATCH_RECIPIENTS_TTL)
+    if not roster:
+        return []
+
+    emails = []
+    for line in roster.split('\n'):
+        mode, email = line.split('\t', 1)
+        if modes is None or (mode or settings.NOTIFICATION_DEFAULT_MODE) in modes:
+            emails.append(email)
+    return emails
+
+
+def invalidate_batch_recipients(*batch_ids):
+    cache.delete_many([BATCH_RECIPIENTS_KEY.format(batch_id=batch_id) for batch_id in batch_ids if batch_id])
+
+
+def recipient_state(user):
+    # Read from __dict__ so deferred fields never trigger a query
+    return tuple(user.__dict__.get(field) for field in RECIPIENT_FIELDS)
@@ -0,0 +1,223 @@
+from datetime import timedelta
+from django.core.cache import cache
+from apps.classroom.models import Rooms, Bookings
+from apps.classroom.serializers import RoomsSerializer
+from apps.classroom.interval_index import booking_index
+
+UPCOMING_BOOKINGS_LIMIT = 3
+
+SNAPSHOT_GENERATION_KEY = 'classroom:room-status:generation'
+SNAPSHOT_KEY = 'classroom:room-status:{generation}:{campus}'
+# Upper bound for snapshots of rooms that have no booking boundary ahead
+SNAPSHOT_MAX_AGE = timedelta(hours=1)
+
+
+def booking_state(booking):
+    """Plain snapshot of the booking fields the status views render"""
+    return {
+        'faculty': booking.faculty.username,
+        'batch': booking.batch.name if booking.batch else None,
+        'start_time': booking.start_time,
+        'end_time': booking.end_time,
+    }
+
+
+def build_room_states(classrooms, now):
+    """
+    Compute the status of every room in ``classrooms`` at ``now``.
+
+    Current and upcoming bookings are answered by the in-memory interval
+    index, so once it is warm this costs two queries whatever the number of
+    rooms: the rooms themselves and the bookings they reference, fetched by
+    id with faculty and batch joined in.
+    """
+    rooms = list(classrooms)
+    index = booking_index.current()
+
+    current_ids = {}
+    upcoming_ids = {}
+    for room in rooms:
+        current_ids[room.id] = index.occupant(room.id, now)
+        upcoming_ids[room.id] = [
+            booking_id for start, booking_id, end in index.upcoming(room.id, now, UPCOMING_BOOKINGS_LIMIT)
+        ]
+
+    wanted = {booking_id for booking_id in current_ids.values() if booking_id}
+    for booking_ids in upcoming_ids.values():
+        wanted.update(booking_ids)
+
+    bookings = {}
+    if wanted:
+        bookings = {
+            booking.id: booking_state(booking)
+            for booking in Bookings.objects.filter(id__in=wanted).select_related('faculty', 'batch').only(
+                'start_time', 'end_time', 'faculty__username', 'batch__name'
+            )
+        }
+
+    return [
+        {
+            'room': dict(RoomsSerializer(room).data),
+            'current': bookings.get(current_ids[room.id]),
+            'upcoming': [bookings[booking_id] for booking_id in upcoming_ids[room.id] if booking_id in bookings],
+        }
+        for room in rooms
+    ]
+
+
+def snapshot_valid_until(states, now):
+    """The next booking start or end after ``now``; the snapshot is exact until then"""
+    boundaries = []
+    for state in states:
+        if state['current']:
+            boundaries.append(state['current']['end_time'])
+        if state['upcoming']:
+            boundaries.append(state['upcoming'][0]['start_time'])
+    return min(boundaries, default=now + SNAPSHOT_MAX_AGE)
+
+
+def invalidate_room_snapshots():
+    """Drop every cached snapshot by moving to a new generation"""
+    try:
+        cache.incr(SNAPSHOT_GENERATION_KEY)
+    except ValueError:
+        cache.add(SNAPSHOT_GENERATION_KEY, 1, timeout=None)
+
+
+def get_room_snapshot(campus, now):
+    """
+    Room states of one campus (or every campus when ``campus`` is empty).
+
+    The snapshot is cached per campus for the time bucket ending at the next
+    booking boundary, and dropped whenever a booking or room is written.
+    """
+    generation = cache.get_or_set(SNAPSHOT_GENERATION_KEY, 0, timeout=None)
+    key = SNAPSHOT_KEY.format(generation=generation, campus=campus or '*')
+
+    snapshot = cache.get(key)
+    if snapshot is not None and now < snapshot['valid_until']:
+        return snapshot['rooms']
+
+    classrooms = Rooms.objects.all()
+    if campus:
+        classrooms = classrooms.filter(campus=campus)
+    states = build_room_states(classrooms, now)
+
+    valid_until = snapshot_valid_until(states, now)
+    cache.set(
+        key,
+        {'valid_until': valid_until, 'rooms': states},
+        timeout=max(int((valid_until - now).total_seconds()), 1)
+    )
+    return states
+
+
+def filter_room_states(states, minimums):
+    """Keep rooms whose equipment counts meet every ``{field: minimum}``"""
+    if not minimums:
+        return states
+    return [
+        state for state in states
+        if all(state['room'][field] >= minimum for field, minimum in minimums.items())
+    ]
+
+
+def hours_between(start, end):
+    return round((end - start).total_seconds() / 3600, 2)
+
+
+def classroom_list_entry(state, now, applied_filters):
+    """Render a room state the way ``ClassroomListAPIView`` reports it"""
+    current_booking = state['current']
+    next_booking = state['upcoming'][0] if state['upcoming'] else None
+
+    if current_booking:
+        time_until_free = hours_between(now, current_booking['end_time'])
+        total_duration = hours_between(current_booking['start_time'], current_booking['end_time'])
+        time_elapsed = hours_between(current_booking['start_time'], now)
+
+        status_text = (f"Occupied ({time_until_free:.2f} hours remaining out of {total_duration:.2f} hours, "
+                       f"{time_elapsed:.2f} hours elapsed)")
+
+        current_booking_info = {
+            'faculty': current_booking['faculty'],
+            'start_time': current_booking['start_time'],
+            'end_time': current_booking['end_time'],
+            'batch': current_booking['batch'],
+            'total_duration_hours': total_duration,
+            'remaining_hours': time_until_free,
+            'elapsed_hours': time_elapsed,
+            'formatted_time': f"{current_booking['start_time'].strftime('%I:%M %p')} - {current_booking['end_time'].strftime('%I:%M %p')}"
+        }
+    else:
+        if next_booking:
+            time_until_next = hours_between(now, next_booking['start_time'])
+            if time_until_next <= 24:
+                status_text = f"Available (Next class in {time_until_next:.1f} hours)"
+            else:
+                status_text = f"Available (Next class on {next_booking['start_time'].strftime('%B %d at %I:%M %p')})"
+        else:
+            status_text = "Available (No upcoming bookings)"
+        time_until_free = None
+        current_booking_info = None
+
+    next_bookings_info = []
+    for booking in state['upcoming']:
+        duration = hours_between(booking['start_time'], booking['end_time'])
+        next_bookings_info.append({
+            'start_time': booking['start_time'],
+            'end_time': booking['end_time'],
+            'faculty': booking['faculty'],
+            'batch': booking['batch'],
+            'duration_hours': duration,
+            'hours_until_start': hours_between(now, booking['start_time']),
+            'formatted_time': f"{booking['start_time'].strftime('%B %d, %I:%M %p')} - {booking['end_time'].strftime('%I:%M %p')} ({duration} hours)"
+        })
+
+    return {
+        'classroom': state['room'],
+        'status': status_text,
+        'hours_until_free': time_until_free,
+        'current_booking': current_booking_info,
+        'upcoming_bookings': next_bookings_info,
+        'applied_filters': applied_filters
+    }
+
+
+def global_list_entry(state, now):
+    """Render a room state the way ``GlobalClassroomListAPIView`` reports it"""
+    room = state['room']
+    current_booking = state['current']
+
+    if current_booking:
+        free_time = current_booking['end_time']
+    elif state['upcoming']:
+        free_time = state['upcoming'][0]['start_time']
+    else:
+        free_time = now
+
+    return {
+        "id": room['id'],
+        "name": room['name'],
+        "capacity": room['capacity'],
+        "available": not current_booking,
+        "freeTime": free_time.isoformat(),
+        "equipment": {
+            "computers": room['computer_count'],
+            "projectors": room['projector_count'],
+            "whiteboards": room['whiteboard_count'],
+            "dusters": room['duster_count'],
+            "speakers": room['speaker_count'],
+            "markers": room['marker_count']
+        },
+        "campus": room['campus'],
+        "current_status": {
+            "occupied": bool(current_booking),
+            "current_booking": {
+                "faculty": current_booking['faculty'],
+                "batch": current_booking['batch'],
+                "start_time": current_booking['start_time'].isoformat(),
+                "end_time": current_booking['end_time'].isoformat()
+            } if current_booking else None
+        }
+    }
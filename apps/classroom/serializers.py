@@ -14,4 +14,10 @@ class BookingsSerializer(serializers.ModelSerializer):
 class FeedbacksSerializer(serializers.ModelSerializer):
     class Meta:
         model = Feedbacks
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+class FeedbackSubmissionSerializer(serializers.Serializer):
+    token = serializers.CharField()
+    cleanliness_issue = serializers.BooleanField(default=False)
+    equipment_issue = serializers.BooleanField(default=False)
+    cleanliness_feedback = serializers.CharField(max_length=255, required=False, allow_blank=True, allow_null=True)
+    equipment_feedback = serializers.CharField(max_length=255, required=False, allow_blank=True, allow_null=True)
@@ -0,0 +1,99 @@
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from apps.authkit.models import User
+from apps.classroom.models import Rooms, Bookings, Feedbacks, NotificationPreference
+from apps.classroom.interval_index import booking_index
+from apps.classroom.room_status import invalidate_room_snapshots
+from apps.classroom.recipients import invalidate_batch_recipients, recipient_state
+from apps.classroom.tasks import schedule_state, reschedule_notifications
+from apps.classroom.feedback import issue_state, add_room_feedback
+
+
+def booking_changed(booking, deleted=False):
+    booking_index.apply(booking, deleted=deleted)
+    invalidate_room_snapshots()
+
+
+def bookings_bulk_changed(room_ids=None):
+    """Call on commit after bulk writes, which do not send model signals"""
+    booking_index.invalidate(room_ids)
+    invalidate_room_snapshots()
+
+
+@receiver(post_init, sender=Bookings)
+def remember_schedule_state(sender, instance, **kwargs):
+    instance._schedule_state = schedule_state(instance)
+
+
+@receiver(post_save, sender=Bookings)
+def booking_saved(sender, instance, created, **kwargs):
+    transaction.on_commit(lambda: booking_changed(instance))
+    previous = instance._schedule_state
+    current = schedule_state(instance)
+    instance._schedule_state = current
+    # New bookings queue their own missed sends; changed ones swap them out
+    if not created and previous != current:
+        transaction.on_commit(lambda: reschedule_notifications(instance, previous))
+
+
+@receiver(post_delete, sender=Bookings)
+def booking_deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda: booking_changed(instance, deleted=True))
+
+
+@receiver(post_save, sender=Rooms)
+@receiver(post_delete, sender=Rooms)
+def room_changed(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_room_snapshots)
+
+
+@receiver(post_init, sender=User)
+def remember_recipient_state(sender, instance, **kwargs):
+    instance._recipient_state = recipient_state(instance)
+
+
+@receiver(post_save, sender=User)
+def user_recipient_changed(sender, instance, created, **kwargs):
+    previous = instance._recipient_state
+    current = recipient_state(instance)
+    instance._recipient_state = current
+    if created or previous != current:
+        batch_ids = {previous[0], current[0]}
+        transaction.on_commit(lambda: invalidate_batch_recipients(*batch_ids))
+
+
+@receiver(post_delete, sender=User)
+def user_recipient_deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_batch_recipients(instance._recipient_state[0]))
+
+
+@receiver(post_save, sender=NotificationPreference)
+@receiver(post_delete, sender=NotificationPreference)
+def notification_preference_changed(sender, instance, **kwargs):
+    batch_id = User.objects.filter(id=instance.user_id).values_list('batch_id', flat=True).first()
+    transaction.on_commit(lambda: invalidate_batch_recipients(batch_id))
+
+
+@receiver(post_init, sender=Feedbacks)
+def remember_issue_state(sender, instance, **kwargs):
+    instance._issue_state = issue_state(instance)
+
+
+@receiver(post_save, sender=Feedbacks)
+def feedback_saved(sender, instance, created, **kwargs):
+    # Runs inside the saving transaction, so the totals commit with the row
+    previous = (False, False) if created else instance._issue_state
+    current = issue_state(instance)
+    instance._issue_state = current
+    if created or previous != current:
+        add_room_feedback(
+            instance.booking.classroom_id, int(created),
+            current[0] - previous[0], current[1] - previous[1]
+        )
+
+
+@receiver(post_delete, sender=Feedbacks)
+def feedback_deleted(sender, instance, **kwargs):
+    cleanliness_issue, equipment_issue = instance._issue_state
+    add_room_feedback(instance.booking.classroom_id, -1, -cleanliness_issue, -equipment_issue)
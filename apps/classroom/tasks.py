@@ -1,178 +1,461 @@
 # tasks.py
-from celery import shared_task
+import logging
+import smtplib
+from celery import current_app, shared_task
+from celery.utils import uuid
+from celery.utils.time import get_exponential_backoff_interval
 from django.utils import timezone
-from datetime import timedelta
-from django.core.mail import send_mass_mail
+from datetime import datetime, time, timedelta
 from django.conf import settings
-from apps.classroom.models import Bookings, Rooms
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Q
+from apps.classroom.models import Bookings, Rooms, NotificationLog, TaskWatermark, ScheduledNotification
 from apps.authkit.models import User
+from apps.classroom.recipients import get_student_emails
+from apps.classroom.delivery import deliver_chunk, recipient_chunks, is_transient
+from apps.classroom.notification_templates import format_notification_email, notification_context
+from apps.classroom.feedback import feedback_link
+
+logger = logging.getLogger(__name__)
+
+
+#=== Notification Dispatcher ===#
+DISPATCH_WATERMARK_KEY = 'classroom:notifications:dispatched-until'
+DISPATCH_LOCK_KEY = 'classroom:notifications:dispatch-lock'
+
+# The beat tick runs every DISPATCH_INTERVAL and queues everything due before
+# now + DISPATCH_LOOKAHEAD, so no ETA is ever more than the lookahead away
+DISPATCH_INTERVAL = timedelta(minutes=1)
+DISPATCH_LOOKAHEAD = timedelta(minutes=2)
+# How far back a late or restarted dispatcher catches up
+DISPATCH_MAX_CATCH_UP = timedelta(minutes=15)
+
+# notification type -> (booking field, offset of the send time from it)
+NOTIFICATION_BOUNDARIES = {
+    'upcoming': ('start_time', -timedelta(minutes=10)),
+    'started': ('start_time', timedelta(0)),
+    'completed': ('end_time', timedelta(0)),
+}
+
+
+def notification_boundaries(booking):
+    return [
+        (notification_type, getattr(booking, field) + offset)
+        for notification_type, (field, offset) in NOTIFICATION_BOUNDARIES.items()
+    ]
+
+
+def due_notifications(window_start, window_end):
+    """(booking_id, notification_type, send_at) for every send time in [window_start, window_end)"""
+    due = []
+    for notification_type, (field, offset) in NOTIFICATION_BOUNDARIES.items():
+        # Range scan on the (status, start_time) / (status, end_time) indexes
+        bookings = Bookings.objects.filter(**{
+            'status': 'Approved',
+            f'{field}__gte': window_start - offset,
+            f'{field}__lt': window_end - offset,
+        }).values_list('id', field)
+        for booking_id, boundary in bookings.iterator(chunk_size=2000):
+            due.append((booking_id, notification_type, boundary + offset))
+    return due
 
-def get_student_emails(batch):
-    """Get all student emails from a specific batch"""
-    if not batch:
-        return []
-    return list(User.objects.filter(
-        batch=batch,
-        role='Student'
-    ).values_list('email', flat=True))
-
-def format_notification_email(booking, notification_type):
-    """Format email content based on notification type"""
-    classroom = booking.classroom
-    faculty = booking.faculty
-    batch = booking.batch
-    
-    subjects = {
-        'upcoming': f'Upcoming Class in {classroom.name} - Starting in 10 minutes',
-        'started': f'Class Started in {classroom.name}',
-        'completed': f'Class Completed in {classroom.name} - Feedback Required'
-    }
-    
-    faculty_messages = {
-        'upcoming': f"""Dear {faculty.username},
-Your class in {classroom.name} will start in 10 minutes.
-
-Details:
-- Time: {booking.start_time.strftime('%I:%M %p')} - {booking.end_time.strftime('%I:%M %p')}
-- Batch: {batch.name if batch else 'N/A'}
-- Campus: {classroom.campus}
-
-Please ensure you reach the classroom on time.""",
-        
-        'started': f"""Dear {faculty.username},
-Your class in {classroom.name} has started.
-
-Details:
-- Duration: {booking.start_time.strftime('%I:%M %p')} - {booking.end_time.strftime('%I:%M %p')}
-- Batch: {batch.name if batch else 'N/A'}
-- Campus: {classroom.campus}""",
-        
-        'completed': f"""Dear {faculty.username},
-Your class in {classroom.name} has been completed.
-
-Thank you for using our classroom booking system."""
-    }
-    
-    student_messages = {
-        'upcoming': f"""Dear Student,
-Your class in {classroom.name} will start in 10 minutes.
-
-Details:
-- Faculty: {faculty.username}
-- Time: {booking.start_time.strftime('%I:%M %p')} - {booking.end_time.strftime('%I:%M %p')}
-- Campus: {classroom.campus}
-
-Please reach the classroom on time.""",
-        
-        'started': f"""Dear Student,
-Your class in {classroom.name} has started.
-
-Details:
-- Faculty: {faculty.username}
-- Duration: {booking.start_time.strftime('%I:%M %p')} - {booking.end_time.strftime('%I:%M %p')}
-- Campus: {classroom.campus}""",
-        
-        'completed': f"""Dear Student,
-Your class in {classroom.name} has been completed.
-
-Please take a moment to provide feedback about the classroom:
-[Feedback Link Here]
-
-Your feedback helps us maintain and improve our facilities.
-Thank you!"""
-    }
-    
-    return {
-        'subject': subjects[notification_type],
-        'faculty_message': faculty_messages[notification_type],
-        'student_message': student_messages[notification_type]
-    }
 
 @shared_task
-def schedule_class_notifications(booking_id):
-    """Schedule all notifications for a booking"""
+def dispatch_notifications():
+    """
+    Beat tick: queue every notification whose send time falls between the
+    previous tick's horizon and now + DISPATCH_LOOKAHEAD.
+
+    The watermark is advanced before the bookings are read, so a booking
+    committed concurrently is either seen here or finds the window already
+    claimed and queues itself (see queue_missed_notifications).
+    """
+    if not cache.add(DISPATCH_LOCK_KEY, 1, timeout=int(DISPATCH_INTERVAL.total_seconds()) * 5):
+        return 0
     try:
-        booking = Bookings.objects.get(id=booking_id)
-        
-        # Schedule 10-minute warning
-        notification_time = booking.start_time - timedelta(minutes=10)
-        send_class_notification.apply_async(
-            args=[booking_id, 'upcoming'],
-            eta=notification_time
-        )
-        
-        # Schedule start notification
-        send_class_notification.apply_async(
-            args=[booking_id, 'started'],
-            eta=booking.start_time
-        )
-        
-        # Schedule completion notification
-        send_class_notification.apply_async(
-            args=[booking_id, 'completed'],
-            eta=booking.end_time
+        now = timezone.now()
+        previous = cache.get(DISPATCH_WATERMARK_KEY)
+        window_start = max(previous or now, now - DISPATCH_MAX_CATCH_UP)
+        window_end = now + DISPATCH_LOOKAHEAD
+        if window_end <= window_start:
+            return 0
+
+        cache.set(DISPATCH_WATERMARK_KEY, window_end, timeout=None)
+        try:
+            due = due_notifications(window_start, window_end)
+        except Exception:
+            cache.set(DISPATCH_WATERMARK_KEY, previous, timeout=None)
+            raise
+
+        # One task per send time and type; simultaneous classes are
+        # coalesced into one message per recipient
+        groups = {}
+        for booking_id, notification_type, send_at in due:
+            groups.setdefault((notification_type, send_at), []).append(booking_id)
+        schedule_sends(groups, now)
+        return len(groups)
+    finally:
+        cache.delete(DISPATCH_LOCK_KEY)
+
+
+def schedule_sends(groups, now):
+    """
+    Queue one send task per {(notification_type, send_at): booking_ids}
+    group, recording each booking's task id first so a later change to the
+    booking can take it back out (see revoke_scheduled_notifications).
+    """
+    queued = []
+    rows = []
+    for (notification_type, send_at), booking_ids in groups.items():
+        task_id = uuid()
+        queued.append((task_id, booking_ids, notification_type, send_at))
+        rows += [
+            ScheduledNotification(booking_id=booking_id, notification_type=notification_type, send_at=send_at, task_id=task_id)
+            for booking_id in booking_ids
+        ]
+    ScheduledNotification.objects.bulk_create(rows, batch_size=1000)
+    for task_id, booking_ids, notification_type, send_at in queued:
+        send_coalesced_notifications.apply_async(
+            args=[booking_ids, notification_type], kwargs={'scheduled': True}, task_id=task_id, eta=max(send_at, now)
         )
-        
-    except Bookings.DoesNotExist:
-        print(f"Booking {booking_id} not found")
+
+
+def schedule_state(booking):
+    """The fields a booking's queued sends depend on, without loading deferred ones"""
+    values = booking.__dict__
+    return values.get('status'), values.get('start_time'), values.get('end_time')
+
+
+def revoke_scheduled_notifications(booking_ids):
+    """
+    Take the queued sends of ``booking_ids`` back out of the broker. A task
+    left without bookings is revoked; one shared with other bookings still
+    runs but skips these, since a scheduled send only delivers the bookings
+    that still hold its row.
+    """
+    rows = ScheduledNotification.objects.filter(booking_id__in=booking_ids)
+    task_ids = set(rows.values_list('task_id', flat=True))
+    if not task_ids:
+        return 0
+    rows.delete()
+    orphaned = task_ids - set(
+        ScheduledNotification.objects.filter(task_id__in=task_ids).values_list('task_id', flat=True)
+    )
+    if orphaned:
+        try:
+            current_app.control.revoke(sorted(orphaned))
+        except Exception:
+            # The sends no longer have rows, so they skip these bookings anyway
+            pass
+    return len(orphaned)
+
+
+def reschedule_notifications(booking, previous_state):
+    """
+    Revoke the queued sends of a booking whose status or times changed and
+    queue the ones now due inside the swept window; later ones are left to
+    the dispatcher. Notifications already sent for a moved boundary are
+    forgotten so they go out again at the new time.
+    """
+    revoke_scheduled_notifications([booking.id])
+    previous_status, previous_start, previous_end = previous_state
+    if previous_start is not None and previous_end is not None:
+        previous = Bookings(start_time=previous_start, end_time=previous_end)
+        moved = [
+            notification_type
+            for (notification_type, send_at), (_, previous_send_at)
+            in zip(notification_boundaries(booking), notification_boundaries(previous))
+            if send_at != previous_send_at and send_at > timezone.now()
+        ]
+        if moved:
+            NotificationLog.objects.filter(booking=booking, notification_type__in=moved).delete()
+    queue_missed_notifications([booking])
+
+
+def queue_missed_notifications(bookings):
+    """
+    Queue the send times of new bookings that fall inside a window the
+    dispatcher has already swept; everything later is left to the dispatcher.
+    """
+    watermark = cache.get(DISPATCH_WATERMARK_KEY)
+    if watermark is None:
+        return
+    now = timezone.now()
+    groups = {}
+    for booking in bookings:
+        if booking.status != 'Approved' or booking.end_time <= now:
+            continue
+        for notification_type, send_at in notification_boundaries(booking):
+            if send_at < watermark:
+                groups.setdefault((notification_type, send_at), []).append(booking.id)
+    if groups:
+        schedule_sends(groups, now)
 
 @shared_task
-def send_class_notification(booking_id, notification_type):
-    """Send email notifications to faculty and students"""
+def schedule_class_notifications(booking_id):
+    """Kept for messages queued before the dispatcher; only fills the swept window"""
+    queue_missed_notifications(Bookings.objects.filter(id=booking_id).only('id', 'status', 'start_time', 'end_time'))
+
+@shared_task
+def schedule_bulk_class_notifications(booking_ids):
+    """Kept for messages queued before the dispatcher; only fills the swept window"""
+    queue_missed_notifications(
+        Bookings.objects.filter(id__in=booking_ids).only('id', 'status', 'start_time', 'end_time')
+    )
+
+def retry_countdown(retries):
+    return get_exponential_backoff_interval(
+        factor=settings.NOTIFICATION_RETRY_BACKOFF, retries=retries, maximum=60 * 30, full_jitter=True
+    )
+
+@shared_task(bind=True, max_retries=settings.NOTIFICATION_MAX_RETRIES)
+def deliver_notification_chunk(self, subject, body, recipients, html=None):
+    """Retry one recipient chunk that failed transiently, with exponential backoff"""
     try:
-        booking = Bookings.objects.get(id=booking_id)
-        
-        # Skip if booking is not approved
-        if booking.status != 'Approved':
-            return
-        
-        # Get email content
-        email_content = format_notification_email(booking, notification_type)
-        
-        # Prepare faculty email
-        faculty_email = booking.faculty.email
-        
-        # Get student emails
-        student_emails = get_student_emails(booking.batch)
-        
-        # Prepare email messages
-        messages = []
-        
-        # Faculty email
-        messages.append((
-            email_content['subject'],
-            email_content['faculty_message'],
-            settings.DEFAULT_FROM_EMAIL,
-            [faculty_email]
-        ))
-        
-        # Student emails (Send in batches if needed)
-        if student_emails:
-            messages.append((
-                email_content['subject'],
-                email_content['student_message'],
-                settings.DEFAULT_FROM_EMAIL,
-                student_emails
-            ))
-        
-        # Send all emails
-        send_mass_mail(messages, fail_silently=False)
-        
-    except Bookings.DoesNotExist:
-        print(f"Booking {booking_id} not found")
+        deliver_chunk(subject, body, recipients, html)
     except Exception as e:
-        print(f"Error sending notification: {str(e)}")
+        if not is_transient(e):
+            raise
+        raise self.retry(exc=e, countdown=retry_countdown(self.request.retries + 1))
+
+def claim_notifications(bookings, notification_type):
+    """Ledger rows for the bookings not notified yet; a duplicate hits the unique constraint"""
+    claimed = []
+    for booking in bookings:
+        try:
+            with transaction.atomic():
+                NotificationLog.objects.create(booking=booking, notification_type=notification_type)
+        except IntegrityError:
+            continue
+        claimed.append(booking)
+    return claimed
+
+def combine_contents(contents, audience):
+    """Subject, text body and HTML body covering one or more rendered notifications"""
+    text_key, html_key = f'{audience}_message', f'{audience}_html'
+    if len(contents) == 1:
+        return contents[0]['subject'], contents[0][text_key], contents[0][html_key]
+    subject = f"{contents[0]['subject']} (+{len(contents) - 1} more)"
+    body = '\n\n----------\n\n'.join(content[text_key] for content in contents)
+    html = '\n<hr>\n'.join(content[html_key] for content in contents)
+    return subject, body, html
+
+def coalesce_messages(bookings, notification_type):
+    """
+    (subject, body, recipients, html) for a group of bookings sharing a send
+    time: one message per faculty member and one per roster chunk of each
+    batch, each covering all of their bookings. Students in digest mode or
+    with notifications off are left out, and a student part is only rendered
+    when somebody will receive it.
+    """
+    contexts = {}
+    by_faculty = {}
+    by_batch = {}
+    for booking in bookings:
+        by_faculty.setdefault(booking.faculty_id, []).append(booking)
+        if booking.batch_id:
+            by_batch.setdefault(booking.batch_id, []).append(booking)
+
+    def render(group, audience):
+        parts = ('subject', f'{audience}_message', f'{audience}_html')
+        contents = []
+        for booking in group:
+            if booking.id not in contexts:
+                contexts[booking.id] = notification_context(booking)
+            contents.append(format_notification_email(booking, notification_type, parts, contexts[booking.id]))
+        return combine_contents(contents, audience)
+
+    messages = []
+    for group in by_faculty.values():
+        subject, body, html = render(group, 'faculty')
+        messages.append((subject, body, [group[0].faculty.email], html))
+    for group in by_batch.values():
+        chunks = recipient_chunks(get_student_emails(group[0].batch, modes=('each',)))
+        if not chunks:
+            continue
+        subject, body, html = render(group, 'student')
+        for recipients in chunks:
+            messages.append((subject, body, recipients, html))
+    return messages
+
+def deliver_messages(messages):
+    # Each message goes out over the pooled connection; one that fails
+    # transiently is retried on its own with backoff, and any other failure
+    # is logged so the rest of the group still goes out (the bookings are
+    # already claimed in the ledger)
+    for subject, body, recipients, html in messages:
+        try:
+            deliver_chunk(subject, body, recipients, html)
+        except Exception as e:
+            if is_transient(e):
+                deliver_notification_chunk.apply_async(args=[subject, body, recipients, html], countdown=retry_countdown(0))
+            elif isinstance(e, smtplib.SMTPException):
+                logger.error("Notification %r to %d recipient(s) was refused: %s", subject, len(recipients), e)
+            else:
+                logger.exception("Notification %r to %d recipient(s) failed", subject, len(recipients))
+
+
+@shared_task(bind=True)
+def send_coalesced_notifications(self, booking_ids, notification_type, scheduled=False):
+    """
+    Send one notification type for bookings that share a send time, coalesced
+    per recipient. A send queued by schedule_sends only covers the bookings
+    still recorded against its task id.
+    """
+    bookings = Bookings.objects.select_related('classroom', 'faculty', 'batch').filter(
+        id__in=booking_ids, status='Approved'
+    ).order_by('start_time', 'id')
+    if scheduled:
+        bookings = bookings.filter(Exists(ScheduledNotification.objects.filter(
+            booking=OuterRef('pk'), task_id=self.request.id
+        )))
+        bookings = list(bookings)
+        ScheduledNotification.objects.filter(task_id=self.request.id).delete()
+    claimed = claim_notifications(bookings, notification_type)
+    if not claimed:
+        return 0
+
+    try:
+        messages = coalesce_messages(claimed, notification_type)
+    except Exception:
+        # Release the claims so a later run can deliver them
+        NotificationLog.objects.filter(booking__in=claimed, notification_type=notification_type).delete()
+        raise
+
+    deliver_messages(messages)
+    return len(messages)
+
+@shared_task
+def send_class_notification(booking_id, notification_type):
+    """Send email notifications to faculty and students"""
+    return send_coalesced_notifications([booking_id], notification_type)
+
+#=== Student Digests ===#
+# Digest markers only matter while their window can still come up; older
+# ones are pruned by cleanup_old_bookings
+DIGEST_MARKER = 'digest:{send_at}'
+DIGEST_MARKER_RETENTION = timedelta(days=2)
+
+def digest_windows(day):
+    """(send_at, first_start, last_start) of each digest on ``day``, in local time"""
+    tz = timezone.get_current_timezone()
+
+    def at(value):
+        return datetime.combine(day, time.fromisoformat(value), tzinfo=tz)
+
+    return [(at(send_at), at(first), at(last)) for send_at, first, last in settings.NOTIFICATION_DIGEST_WINDOWS]
+
+def format_digest_email(batch, upcoming, completed):
+    """Subject and body of a batch digest"""
+    lines = ["Dear Student,", f"Here is the class schedule for {batch.name}:", ""]
+    for booking in upcoming:
+        lines.append(
+            f"- {timezone.localtime(booking.start_time).strftime('%I:%M %p')} - "
+            f"{timezone.localtime(booking.end_time).strftime('%I:%M %p')}: {booking.classroom.name} "
+            f"({booking.classroom.campus}), Faculty: {booking.faculty.username}"
+        )
+    if not upcoming:
+        lines.append("No classes scheduled.")
+    if completed:
+        lines += ["", "Please take a moment to provide feedback about these classrooms:"]
+        for booking in completed:
+            lines.append(f"- {booking.classroom.name} ({booking.classroom.campus}): {feedback_link(booking.id)}")
+    lines += ["", "Thank you!"]
+    first = upcoming[0] if upcoming else completed[0]
+    return f"Class schedule for {batch.name} - {timezone.localtime(first.start_time).strftime('%d %b %Y')}", '\n'.join(lines)
+
+def send_digest(first_start, last_start, completed_since, until):
+    """One digest message per roster chunk of every batch with classes or feedback due"""
+    related = Bookings.objects.select_related('classroom', 'faculty', 'batch').filter(
+        status='Approved', batch__isnull=False
+    )
+    upcoming = related.filter(start_time__gte=first_start, start_time__lt=last_start).order_by('start_time', 'id')
+    completed = related.filter(end_time__gte=completed_since, end_time__lt=until).order_by('end_time', 'id')
+
+    batches = {}
+    for key, bookings in (('upcoming', upcoming), ('completed', completed)):
+        for booking in bookings:
+            entry = batches.setdefault(booking.batch_id, {'batch': booking.batch, 'upcoming': [], 'completed': []})
+            entry[key].append(booking)
+
+    messages = []
+    for entry in batches.values():
+        subject, body = format_digest_email(entry['batch'], entry['upcoming'], entry['completed'])
+        for recipients in recipient_chunks(get_student_emails(entry['batch'], modes=('digest',))):
+            messages.append((subject, body, recipients, None))
+    deliver_messages(messages)
+    return len(messages)
+
+@shared_task
+def send_batch_digests(now=None):
+    """
+    Send each configured digest once, as soon as its send time has passed
+    and while its classes are still ahead. A digest lists the batch's
+    classes in its window and the classes completed since the previous
+    digest, replacing the per-class emails of students in digest mode.
+    """
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    windows = digest_windows(today - timedelta(days=1))[-1:] + digest_windows(today)
+
+    sent = 0
+    for previous, (send_at, first_start, last_start) in zip(windows, windows[1:]):
+        if not send_at <= now < last_start:
+            continue
+        marker, created = TaskWatermark.objects.get_or_create(
+            name=DIGEST_MARKER.format(send_at=send_at.isoformat()), defaults={'value': now}
+        )
+        if created:
+            sent += send_digest(first_start, last_start, completed_since=previous[0], until=send_at)
+    return sent
 
 # Periodic task to clean up old bookings
+CLEANUP_WATERMARK = 'cleanup_old_bookings'
+CLEANUP_CHUNK_SIZE = 1000
+# On the very first run only recent history is considered
+CLEANUP_INITIAL_LOOKBACK = timedelta(hours=1)
+# Rows of sends whose task never ran (a lost worker) are dropped after this
+SCHEDULED_RETENTION = timedelta(days=1)
+
 @shared_task
-def cleanup_old_bookings():
-    """Clean up old bookings and ensure notifications are sent"""
+def cleanup_old_bookings(chunk_size=CLEANUP_CHUNK_SIZE):
+    """
+    Make sure every approved booking that ended since the last run got its
+    'completed' notification. Only bookings past the persisted watermark are
+    read, in keyset chunks, so the work is independent of booking history,
+    and each chunk is queued as one coalesced send.
+    """
     now = timezone.now()
-    old_bookings = Bookings.objects.filter(
-        end_time__lt=now,
-        status='Approved'
+    watermark, created = TaskWatermark.objects.get_or_create(
+        name=CLEANUP_WATERMARK, defaults={'value': now - CLEANUP_INITIAL_LOOKBACK}
     )
-    
-    for booking in old_bookings:
-        # Send completion notification if not already sent
-        send_class_notification.delay(booking.id, 'completed')
\ No newline at end of file
+
+    already_sent = NotificationLog.objects.filter(booking=OuterRef('pk'), notification_type='completed')
+    ended = Bookings.objects.filter(
+        status='Approved', end_time__gt=watermark.value, end_time__lte=now
+    ).filter(~Exists(already_sent)).order_by('end_time', 'id')
+
+    queued = 0
+    last = None
+    while True:
+        chunk = ended
+        if last is not None:
+            chunk = chunk.filter(Q(end_time__gt=last[0]) | Q(end_time=last[0], id__gt=last[1]))
+        rows = list(chunk.values_list('end_time', 'id')[:chunk_size])
+        if rows:
+            send_coalesced_notifications.delay([booking_id for end_time, booking_id in rows], 'completed')
+        queued += len(rows)
+        if len(rows) < chunk_size:
+            break
+        last = rows[-1]
+
+    # Advanced only after every chunk was queued; a crash replays the range
+    # and the ledger drops the duplicates
+    watermark.value = now
+    watermark.save(update_fields=['value', 'updated_at'])
+    ScheduledNotification.objects.filter(send_at__lt=now - SCHEDULED_RETENTION).delete()
+    TaskWatermark.objects.filter(
+        name__startswith=DIGEST_MARKER.format(send_at=''), value__lt=now - DIGEST_MARKER_RETENTION
+    ).delete()
+    return queued
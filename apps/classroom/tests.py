@@ -1,3 +1,1208 @@
-from django.test import TestCase
+import json
+import os
+import smtplib
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest import mock
+from io import StringIO
+import numpy as np
+from django.core import mail
+from django.core.management import call_command
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.authkit.models import User, Batch
+from apps.classroom.models import (
+    Rooms, Bookings, Feedbacks, NotificationLog, TaskWatermark, NotificationPreference, ScheduledNotification,
+    RoomFeedbackStats
+)
+from apps.classroom.interval_index import IntervalIndex, BookingIntervalIndex, booking_index
+from apps.classroom.delivery import reset_pooled_connection
+from apps.classroom.recipients import get_student_emails
+from apps.classroom.notification_templates import format_notification_email
+from apps.classroom.feedback import read_feedback_token, make_feedback_token
+from apps.classroom.utilization import booked_seconds
+from core.celery import app as celery_app
+from apps.classroom.tasks import (
+    dispatch_notifications, queue_missed_notifications, send_class_notification, cleanup_old_bookings,
+    send_coalesced_notifications, send_batch_digests, revoke_scheduled_notifications
+)
 
-# Create your tests here.
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+class IntervalIndexTests(SimpleTestCase):
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.index = IntervalIndex()
+        self.index.add(1, self.now - timedelta(hours=1), self.now + timedelta(hours=1), 10)
+        self.index.add(1, self.now + timedelta(hours=2), self.now + timedelta(hours=3), 11)
+        self.index.add(1, self.now + timedelta(hours=4), self.now + timedelta(hours=5), 12)
+
+    def test_occupant(self):
+        self.assertEqual(self.index.occupant(1, self.now), 10)
+        self.assertIsNone(self.index.occupant(1, self.now + timedelta(hours=1)))
+        self.assertIsNone(self.index.occupant(2, self.now))
+
+    def test_next_start(self):
+        self.assertEqual(self.index.next_start(1, self.now), self.now + timedelta(hours=2))
+        self.assertIsNone(self.index.next_start(1, self.now + timedelta(hours=4)))
+
+    def test_overlaps_is_half_open(self):
+        self.assertTrue(self.index.overlaps(1, self.now + timedelta(hours=2, minutes=30), self.now + timedelta(hours=6)))
+        self.assertFalse(self.index.overlaps(1, self.now + timedelta(hours=1), self.now + timedelta(hours=2)))
+        self.assertEqual(self.index.overlapping(1, self.now, self.now + timedelta(hours=4, minutes=1)), [12, 11, 10])
+
+    def test_remove(self):
+        self.index.remove(10)
+        self.assertIsNone(self.index.occupant(1, self.now))
+        self.assertFalse(self.index.remove(10))
+
+    def test_replace_leaves_published_rooms_untouched(self):
+        room = self.index.rooms[1]
+        self.index.replace(10, 2, self.now, self.now + timedelta(hours=1))
+        self.assertEqual([entry[1] for entry in room.entries], [10, 11, 12])
+        self.assertIsNone(self.index.occupant(1, self.now))
+        self.assertEqual(self.index.occupant(2, self.now), 10)
+        self.index.replace(10)
+        self.assertIsNone(self.index.occupant(2, self.now))
+
+    def test_lookups_during_replace_from_another_thread(self):
+        for number in range(200):
+            start = self.now + timedelta(hours=6, minutes=10 * number)
+            self.index.add(1, start, start + timedelta(minutes=30), 100 + number)
+
+        def write():
+            for number in range(2000):
+                start = self.now + timedelta(hours=6, minutes=10 * (number % 200))
+                self.index.replace(100 + number % 200, 1, start, start + timedelta(minutes=30 + number % 7))
+
+        def read(number):
+            at = self.now + timedelta(hours=6, minutes=number % 2000)
+            self.index.occupant(1, at)
+            self.index.overlapping(1, at, at + timedelta(hours=1))
+            return self.index.overlaps(1, at, at + timedelta(minutes=20))
+
+        # Switch threads often enough that lookups land mid-update
+        self.addCleanup(sys.setswitchinterval, sys.getswitchinterval())
+        sys.setswitchinterval(1e-6)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            writer = pool.submit(write)
+            results = list(pool.map(read, range(20000)))
+            writer.result()
+        self.assertTrue(all(results))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BookingIndexSyncTests(TestCase):
+
+    def setUp(self):
+        booking_index.reset()
+        self.now = timezone.now()
+        self.room = Rooms.objects.create(name='Room 1', campus='Main', capacity=40)
+        self.faculty = User.objects.create_user(
+            email='faculty@example.com', password='secret', username='faculty', role='Faculty'
+        )
+
+    def test_signals_keep_index_in_sync(self):
+        booking_index.current()
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = Bookings.objects.create(
+                classroom=self.room, faculty=self.faculty, status='Approved',
+                start_time=self.now - timedelta(minutes=5), end_time=self.now + timedelta(minutes=5)
+            )
+        self.assertEqual(booking_index.current().occupant(self.room.id, self.now), booking.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.status = 'Rejected'
+            booking.save()
+        self.assertIsNone(booking_index.current().occupant(self.room.id, self.now))
+
+    def test_bulk_changes_reload_only_the_named_rooms(self):
+        other_room = Rooms.objects.create(name='Room 2', campus='Main', capacity=40)
+        booking_index.current()
+        bookings = Bookings.objects.bulk_create([
+            Bookings(
+                classroom=room, faculty=self.faculty, status='Approved',
+                start_time=self.now - timedelta(minutes=5), end_time=self.now + timedelta(minutes=5)
+            )
+            for room in (self.room, other_room)
+        ])
+        booking_index.invalidate([self.room.id])
+        index = booking_index.current()
+        self.assertEqual(index.occupant(self.room.id, self.now), bookings[0].id)
+        # Not named, so still the copy loaded before the bulk write
+        self.assertIsNone(index.occupant(other_room.id, self.now))
+
+    def test_changes_from_other_workers_are_replayed(self):
+        booking = Bookings.objects.create(
+            classroom=self.room, faculty=self.faculty, status='Approved',
+            start_time=self.now - timedelta(minutes=5), end_time=self.now + timedelta(minutes=5)
+        )
+        other_room = Rooms.objects.create(name='Room 2', campus='Main', capacity=40)
+        booking_index.current()
+        # Another worker moves the booking; this one only sees the new version
+        Bookings.objects.filter(id=booking.id).update(classroom=other_room)
+        booking.classroom = other_room
+        BookingIntervalIndex().apply(booking)
+        with self.assertNumQueries(1):
+            index = booking_index.current()
+        self.assertIsNone(index.occupant(self.room.id, self.now))
+        self.assertEqual(index.occupant(other_room.id, self.now), booking.id)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class RoomStatusQueryCountTests(TestCase):
+    """The list endpoints must cost a constant number of queries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.faculty = User.objects.create_user(
+            email='faculty@example.com', password='secret', username='faculty', role='Faculty'
+        )
+        batch = Batch.objects.create(name='CSE-21')
+        for index in range(12):
+            room = Rooms.objects.create(name=f'Room {index}', campus='Main', capacity=40, projector_count=index % 3)
+            Bookings.objects.create(
+                classroom=room, faculty=cls.faculty, batch=batch, status='Approved',
+                start_time=now - timedelta(minutes=30), end_time=now + timedelta(minutes=30)
+            )
+            for hour in range(1, 6):
+                Bookings.objects.create(
+                    classroom=room, faculty=cls.faculty, batch=batch, status='Approved',
+                    start_time=now + timedelta(hours=hour), end_time=now + timedelta(hours=hour, minutes=50)
+                )
+
+    def setUp(self):
+        cache.clear()
+        booking_index.reset()
+        booking_index.current()
+        self.client = APIClient()
+        self.client.force_authenticate(self.faculty)
+
+    def test_classroom_list_query_count(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/v1/class-room-list', {'projector_count': 1})
+        classrooms = response.data['data']['classrooms']
+        self.assertEqual(len(classrooms), 8)
+        for entry in classrooms:
+            self.assertEqual(entry['current_booking']['faculty'], 'faculty')
+            self.assertEqual(len(entry['upcoming_bookings']), 3)
+
+    def test_global_class_list_query_count(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/v1/global-class-list')
+        self.assertEqual(len(response.data['data']), 12)
+        self.assertTrue(all(entry['current_status']['occupied'] for entry in response.data['data']))
+
+    def test_snapshot_is_reused_until_a_booking_changes(self):
+        self.client.get('/api/v1/class-room-list', {'campus': 'Main'})
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/class-room-list', {'capacity': 41, 'campus': 'Main'})
+        self.assertNotIn('data', response.data)
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/class-room-list', {'campus': 'Main', 'projector_count': 2})
+        self.assertEqual(len(response.data['data']['classrooms']), 4)
+
+        self.client.get('/api/v1/global-class-list')
+        with self.captureOnCommitCallbacks(execute=True):
+            Bookings.objects.filter(classroom__name='Room 0', start_time__lte=timezone.now()).get().delete()
+        response = self.client.get('/api/v1/global-class-list')
+        self.assertEqual(len(response.data['data']), 12)
+        occupied = [entry['current_status']['occupied'] for entry in response.data['data']]
+        self.assertEqual(occupied.count(False), 1)
+
+
+class FreeRoomListTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.faculty = User.objects.create_user(
+            email='faculty@example.com', password='secret', username='faculty', role='Faculty'
+        )
+        cls.busy = Rooms.objects.create(name='Busy', campus='Main', capacity=40, projector_count=1)
+        cls.free = Rooms.objects.create(name='Free', campus='Main', capacity=40, projector_count=1)
+        cls.small = Rooms.objects.create(name='Small', campus='Main', capacity=10, projector_count=1)
+        start = timezone.make_aware(datetime(2030, 1, 7, 9, 0))
+        Bookings.objects.create(
+            classroom=cls.busy, faculty=cls.faculty, status='Approved',
+            start_time=start, end_time=start + timedelta(hours=1)
+        )
+        Bookings.objects.create(
+            classroom=cls.free, faculty=cls.faculty, status='Rejected',
+            start_time=start, end_time=start + timedelta(hours=1)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.faculty)
+
+    def test_returns_rooms_without_overlapping_approved_bookings(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/free-rooms', {
+                'start': '2030-01-07T09:30:00', 'end': '2030-01-07T10:30:00', 'capacity': 20
+            })
+        self.assertEqual([room['name'] for room in response.data['data']], ['Free'])
+
+        response = self.client.get('/api/v1/free-rooms', {
+            'start': '2030-01-07T10:00:00', 'end': '2030-01-07T11:00:00', 'capacity': 20
+        })
+        self.assertEqual([room['name'] for room in response.data['data']], ['Busy', 'Free'])
+
+    def test_rejects_bad_window(self):
+        response = self.client.get('/api/v1/free-rooms', {'start': '2030-01-07T10:00:00', 'end': '2030-01-07T09:00:00'})
+        self.assertEqual(response.status_code, 400)
+
+
+class FreeSlotTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.faculty = User.objects.create_user(
+            email='faculty@example.com', password='secret', username='faculty', role='Faculty'
+        )
+        cls.room = Rooms.objects.create(name='Lab', campus='Main', capacity=40)
+        Rooms.objects.create(name='Other', campus='City', capacity=40)
+        day = timezone.make_aware(datetime(2030, 1, 7))
+        for start_hour, end_hour in [(9, 11), (10, 12), (15, 16)]:
+            Bookings.objects.create(
+                classroom=cls.room, faculty=cls.faculty, status='Approved',
+                start_time=day + timedelta(hours=start_hour), end_time=day + timedelta(hours=end_hour)
+            )
+        Bookings.objects.create(
+            classroom=cls.room, faculty=cls.faculty, status='Approved',
+            start_time=day + timedelta(hours=19, minutes=30), end_time=day + timedelta(days=1, hours=9)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.faculty)
+
+    def test_gaps_between_merged_bookings(self):
+        response = self.client.get('/api/v1/free-slots', {
+            'from': '2030-01-07', 'days': 2, 'min_minutes': 60, 'campus': 'Main'
+        })
+        self.assertEqual(len(response.data['data']), 1)
+        slots = [(slot['date'], slot['formatted_time']) for slot in response.data['data'][0]['slots']]
+        self.assertEqual(slots, [
+            ('2030-01-07', '08:00 AM - 09:00 AM'),
+            ('2030-01-07', '12:00 PM - 03:00 PM'),
+            ('2030-01-07', '04:00 PM - 07:30 PM'),
+            ('2030-01-08', '09:00 AM - 08:00 PM'),
+        ])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BookingCreateTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.faculty = User.objects.create_user(
+            email='faculty@example.com', password='secret', username='faculty', role='Faculty'
+        )
+        Batch.objects.create(name='CSE-21')
+        cls.room = Rooms.objects.create(name='Room 1', campus='Main', capacity=40)
+
+    def setUp(self):
+        cache.clear()
+        booking_index.reset()
+        self.client = APIClient()
+        self.client.force_authenticate(self.faculty)
+
+    def book(self):
+        return self.client.post('/api/v1/create-booking', {
+            'classroom_id': self.room.id,
+            'batch': 'CSE-21',
+            'start_time': '2030-01-07T09:00:00',
+            'end_time': '2030-01-07T10:00:00',
+        }, format='json')
+
+    @mock.patch('apps.classroom.views.queue_missed_notifications')
+    def test_only_approved_bookings_block_the_slot(self, queue_missed_notifications):
+        for booking_status in ('Rejected', 'Pending'):
+            Bookings.objects.create(
+                classroom=self.room, faculty=self.faculty, status=booking_status,
+                start_time=timezone.make_aware(datetime(2030, 1, 7, 9, 30)),
+                end_time=timezone.make_aware(datetime(2030, 1, 7, 10, 30))
+            )
+        self.assertEqual(self.book().status_code, 201)
+        self.assertEqual(self.book().status_code, 400)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ConcurrentBookingTests(TransactionTestCase):
+    """Hammer create-booking from many threads and look for double bookings"""
+
+    threads = 16
+    requests = 320
+
+    def setUp(self):
+        booking_index.reset()
+        self.faculty = User.objects.create_user(
+            email='faculty@example.com', password='secret', username='faculty', role='Faculty'
+        )
+        Batch.objects.create(name='CSE-21')
+        self.rooms = [Rooms.objects.create(name=f'Room {index}', campus='Main', capacity=40) for index in range(4)]
+
+    def book(self, number):
+        client = APIClient()
+        client.force_authenticate(self.faculty)
+        room = self.rooms[number % len(self.rooms)]
+        # Eight overlapping one-hour windows, staggered by 15 minutes
+        start = datetime(2030, 1, 7, 9, 0) + timedelta(minutes=15 * (number % 8))
+        try:
+            response = client.post('/api/v1/create-booking', {
+                'classroom_id': room.id,
+                'batch': 'CSE-21',
+                'start_time': start.strftime('%Y-%m-%dT%H:%M:%S'),
+                'end_time': (start + timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M:%S'),
+            }, format='json')
+            return response.status_code
+        finally:
+            connection.close()
+
+    @mock.patch('apps.classroom.views.queue_missed_notifications')
+    def test_no_double_bookings_under_concurrency(self, queue_missed_notifications):
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            codes = list(pool.map(self.book, range(self.requests)))
+
+        self.assertEqual(set(codes) - {201, 400}, set())
+        for room in self.rooms:
+            bookings = list(Bookings.objects.filter(classroom=room, status='Approved').order_by('start_time'))
+            for earlier, later in zip(bookings, bookings[1:]):
+                self.assertLessEqual(earlier.end_time, later.start_time)
+        self.assertEqual(codes.count(201), Bookings.objects.count())
+        # Each room only gets two back-to-back windows, so exactly one
+        # request per window can win
+        self.assertEqual(codes.count(201), 2 * len(self.rooms))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BulkBookingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.faculty = User.objects.create_user(
+            email='faculty@example.com', password='secret', username='faculty', role='Faculty'
+        )
+        Batch.objects.create(name='CSE-21')
+        cls.room = Rooms.objects.create(name='Room 1', campus='Main', capacity=40)
+        cls.existing = Bookings.objects.create(
+            classroom=cls.room, faculty=cls.faculty, status='Approved',
+            start_time=timezone.make_aware(datetime(2030, 1, 21, 9, 30)),
+            end_time=timezone.make_aware(datetime(2030, 1, 21, 10, 30))
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.faculty)
+
+    @mock.patch('apps.classroom.views.queue_missed_notifications')
+    def test_recurrence_reports_conflicts_and_schedules_once(self, queue_missed_notifications):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/v1/create-bulk-booking', {
+                'classroom_id': self.room.id,
+                'batch': 'CSE-21',
+                'recurrence': {
+                    'start_time': '2030-01-07T09:00:00',
+                    'end_time': '2030-01-07T10:00:00',
+                    'until': '2030-02-04',
+                    'exclude_dates': ['2030-01-28'],
+                },
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['data']['created'], 3)
+        [conflict] = response.data['data']['conflicts']
+        self.assertEqual(conflict['index'], 2)
+        self.assertEqual(conflict['conflicts_with_bookings'], [self.existing.id])
+        [bookings], _ = queue_missed_notifications.call_args
+        self.assertEqual([booking.id for booking in bookings], response.data['data']['booking_ids'])
+
+    @mock.patch('apps.classroom.views.queue_missed_notifications')
+    def test_occurrences_conflicting_with_each_other(self, queue_missed_notifications):
+        response = self.client.post('/api/v1/create-bulk-booking', {
+            'classroom_id': self.room.id,
+            'batch': 'CSE-21',
+            'occurrences': [
+                {'start_time': '2030-03-04T09:00:00', 'end_time': '2030-03-04T11:00:00'},
+                {'start_time': '2030-03-04T10:00:00', 'end_time': '2030-03-04T12:00:00'},
+                {'start_time': '2030-03-04T11:00:00', 'end_time': '2030-03-04T12:00:00'},
+            ],
+        }, format='json')
+        self.assertEqual(response.data['data']['created'], 2)
+        [conflict] = response.data['data']['conflicts']
+        self.assertEqual((conflict['index'], conflict['conflicts_with_occurrences']), (1, [0]))
+
+    @mock.patch('apps.classroom.views.queue_missed_notifications')
+    def test_rejected_and_pending_bookings_do_not_conflict(self, queue_missed_notifications):
+        for booking_status in ('Rejected', 'Pending'):
+            Bookings.objects.create(
+                classroom=self.room, faculty=self.faculty, status=booking_status,
+                start_time=timezone.make_aware(datetime(2030, 3, 11, 9, 30)),
+                end_time=timezone.make_aware(datetime(2030, 3, 11, 10, 30))
+            )
+        response = self.client.post('/api/v1/create-bulk-booking', {
+            'classroom_id': self.room.id,
+            'batch': 'CSE-21',
+            'occurrences': [{'start_time': '2030-03-11T09:00:00', 'end_time': '2030-03-11T10:00:00'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['data']['created'], response.data['data']['conflicts']), (1, []))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TimetableImportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.faculty = User.objects.create_user(
+            email='faculty@example.com', password='secret', username='faculty', role='Faculty'
+        )
+        cls.batch = Batch.objects.create(name='CSE-21')
+        cls.room = Rooms.objects.create(name='Room 1', campus='Main', capacity=40)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'timetable.csv')
+
+    def write_csv(self, rows):
+        with open(self.path, 'w', newline='') as handle:
+            handle.write('room,campus,batch,faculty,start_time,end_time,status\n')
+            for start, end, booking_status in rows:
+                handle.write(f'Room 1,Main,CSE-21,faculty,2030-01-07T{start},2030-01-07T{end},{booking_status}\n')
+
+    def run_import(self, rows, *args, stdout=None, stderr=None):
+        self.write_csv(rows)
+        call_command(
+            'import_timetable', self.path, '--no-notify', *args, stdout=stdout or StringIO(), stderr=stderr or StringIO()
+        )
+        return list(Bookings.objects.order_by('start_time').values_list('status', flat=True))
+
+    def test_dry_run_writes_nothing(self):
+        self.assertEqual(self.run_import([('09:00', '10:00', 'Approved')], '--dry-run'), [])
+        self.assertFalse(os.path.exists(f'{self.path}.checkpoint'))
+
+    def test_overlapping_approved_rows_conflict(self):
+        Bookings.objects.create(
+            classroom=self.room, faculty=self.faculty, status='Approved',
+            start_time=timezone.make_aware(datetime(2030, 1, 7, 8, 0)),
+            end_time=timezone.make_aware(datetime(2030, 1, 7, 9, 30))
+        )
+        statuses = self.run_import([
+            ('09:00', '10:00', 'Approved'),
+            ('10:00', '11:00', 'Approved'),
+            ('10:30', '11:30', 'Approved'),
+        ])
+        self.assertEqual(statuses, ['Approved', 'Approved'])
+
+    def test_pending_rows_do_not_block_approved_ones(self):
+        statuses = self.run_import([
+            ('09:00', '10:00', 'Pending'),
+            ('09:30', '10:30', 'Approved'),
+            ('09:45', '10:15', 'Rejected'),
+        ])
+        self.assertEqual(statuses, ['Pending', 'Approved', 'Rejected'])
+
+    def test_chunks_lock_their_rooms_and_check_earlier_chunks(self):
+        rows = [('09:00', '10:00', 'Approved'), ('09:30', '10:30', 'Approved'), ('10:00', '11:00', 'Approved')]
+        with mock.patch(
+            'apps.classroom.management.commands.import_timetable.lock_classrooms'
+        ) as lock_classrooms:
+            self.assertEqual(self.run_import(rows, '--chunk-size', '1'), ['Approved', 'Approved'])
+        self.assertEqual(lock_classrooms.call_args_list, [mock.call({self.room.id})] * 3)
+
+    def test_dry_run_checks_rows_across_chunks(self):
+        stdout = StringIO()
+        rows = [('09:00', '10:00', 'Approved'), ('09:30', '10:30', 'Approved')]
+        self.assertEqual(self.run_import(rows, '--dry-run', '--chunk-size', '1', stdout=stdout), [])
+        self.assertIn('1 booking(s), 1 conflict(s)', stdout.getvalue())
+
+    def test_constraint_violations_are_reported_per_row(self):
+        bulk_create = Bookings.objects.bulk_create
+        refused = timezone.make_aware(datetime(2030, 1, 7, 10, 0))
+
+        def clash(bookings, *args, **kwargs):
+            # Stands in for the exclusion constraint seeing a booking made without the room locks
+            if any(booking.start_time == refused for booking in bookings):
+                raise IntegrityError('conflicting key value violates exclusion constraint')
+            return bulk_create(bookings, *args, **kwargs)
+
+        stderr = StringIO()
+        rows = [('09:00', '10:00', 'Approved'), ('10:00', '11:00', 'Approved'), ('11:00', '12:00', 'Approved')]
+        with mock.patch.object(Bookings.objects, 'bulk_create', side_effect=clash):
+            self.assertEqual(self.run_import(rows, stderr=stderr), ['Approved', 'Approved'])
+        self.assertIn('line 3: Room 1 is already booked', stderr.getvalue())
+
+    def test_resume_skips_imported_rows(self):
+        rows = [('09:00', '10:00', 'Approved'), ('10:00', '11:00', 'Approved'), ('11:00', '12:00', 'Approved')]
+        with open(f'{self.path}.checkpoint', 'w') as handle:
+            json.dump({'path': self.path, 'rows': 2}, handle)
+        self.assertEqual(self.run_import(rows, '--resume'), ['Approved'])
+        self.assertEqual(Bookings.objects.get().start_time, timezone.make_aware(datetime(2030, 1, 7, 11, 0)))
+        self.assertFalse(os.path.exists(f'{self.path}.checkpoint'))
+
+
+class MyBookingsPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.faculty = User.objects.create_user(
+            email='faculty@example.com', password='secret', username='faculty', role='Faculty'
+        )
+        batch = Batch.objects.create(name='CSE-21')
+        room = Rooms.objects.create(name='Room 1', campus='Main', capacity=40)
+        start = timezone.make_aware(datetime(2030, 1, 7, 9, 0))
+        for offset in range(7):
+            # Pairs of bookings share a start time to exercise the id tie-break
+            Bookings.objects.create(
+                classroom=room, faculty=cls.faculty, batch=batch, status='Approved',
+                start_time=start + timedelta(days=offset // 2), end_time=start + timedelta(days=offset // 2, hours=1)
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.faculty)
+
+    def test_cursor_walks_every_booking_once(self):
+        seen = []
+        cursor = None
+        while True:
+            params = {'page_size': 3}
+            if cursor:
+                params['cursor'] = cursor
+            with self.assertNumQueries(1):
+                response = self.client.get('/api/v1/my-bookings', params)
+            seen.extend(booking['id'] for booking in response.data['data'])
+            cursor = response.data['pagination']['next_cursor']
+            if not response.data['pagination']['has_more']:
+                break
+        self.assertEqual(seen, sorted(Bookings.objects.values_list('id', flat=True)))
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/v1/my-bookings', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+class FacultyClassListTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.faculty = User.objects.create_user(
+            email='faculty@example.com', password='secret', username='faculty', role='Faculty'
+        )
+        batch = Batch.objects.create(name='CSE-21')
+        room = Rooms.objects.create(name='Room 1', campus='Main', capacity=40)
+        # 01:00 in Dhaka is still the previous day in UTC
+        for day, hour in [(7, 1), (7, 9), (8, 23), (9, 0)]:
+            start = timezone.make_aware(datetime(2030, 1, day, hour, 0))
+            Bookings.objects.create(
+                classroom=room, faculty=cls.faculty, batch=batch, status='Approved',
+                start_time=start, end_time=start + timedelta(hours=1)
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.faculty)
+
+    def test_single_day_uses_local_day_bounds(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/my-class-list', {'date': '2030-01-07'})
+        self.assertEqual(len(response.data['data']), 2)
+
+    def test_range_is_grouped_by_local_date(self):
+        response = self.client.get('/api/v1/my-class-list', {'from': '2030-01-07', 'to': '2030-01-09'})
+        self.assertEqual(
+            {date: len(classes) for date, classes in response.data['data'].items()},
+            {'2030-01-07': 2, '2030-01-08': 1, '2030-01-09': 1}
+        )
+
+    def test_range_must_be_ordered(self):
+        response = self.client.get('/api/v1/my-class-list', {'from': '2030-01-09', 'to': '2030-01-07'})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class NotificationDispatcherTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.faculty = User.objects.create_user(
+            email='faculty@example.com', password='secret', username='faculty', role='Faculty'
+        )
+        cls.room = Rooms.objects.create(name='Room 1', campus='Main', capacity=40)
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch('apps.classroom.tasks.send_class_notification.apply_async')
+        self.apply_async = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('apps.classroom.tasks.send_coalesced_notifications.apply_async')
+        self.apply_coalesced = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def book(self, start, end, booking_status='Approved'):
+        now = timezone.now()
+        return Bookings.objects.create(
+            classroom=self.room, faculty=self.faculty, status=booking_status,
+            start_time=now + start, end_time=now + end
+        )
+
+    def queued(self):
+        queued = [call.kwargs['args'] for call in self.apply_async.call_args_list]
+        for call in self.apply_coalesced.call_args_list:
+            booking_ids, notification_type = call.kwargs['args']
+            queued += [(booking_id, notification_type) for booking_id in booking_ids]
+        return sorted((booking_id, notification_type) for booking_id, notification_type in queued)
+
+    def test_tick_queues_only_the_next_window(self):
+        soon = self.book(timedelta(minutes=11), timedelta(minutes=70))
+        ending = self.book(-timedelta(minutes=50), timedelta(minutes=1))
+        self.book(timedelta(minutes=11), timedelta(minutes=70), booking_status='Pending')
+        self.book(timedelta(hours=3), timedelta(hours=4))
+
+        # Three range scans and one insert of the task ids
+        with self.assertNumQueries(4):
+            self.assertEqual(dispatch_notifications(), 2)
+        self.assertEqual(self.queued(), sorted([(soon.id, 'upcoming'), (ending.id, 'completed')]))
+
+        self.apply_coalesced.reset_mock()
+        dispatch_notifications()
+        self.assertEqual(self.queued(), [])
+
+    def test_bookings_inside_a_swept_window_queue_themselves(self):
+        dispatch_notifications()
+        late = self.book(timedelta(minutes=11), timedelta(minutes=70))
+        later = self.book(timedelta(minutes=30), timedelta(minutes=70))
+        queue_missed_notifications([late, later])
+        self.assertEqual(self.queued(), [(late.id, 'upcoming')])
+
+    @mock.patch('apps.classroom.tasks.current_app.control.revoke')
+    def test_changed_bookings_take_back_their_queued_sends(self, revoke):
+        start = timezone.now() + timedelta(minutes=11)
+        bookings = [
+            Bookings.objects.create(
+                classroom=Rooms.objects.create(name=f'Room {i + 2}', campus='Main', capacity=40),
+                faculty=self.faculty, status='Approved', start_time=start, end_time=start + timedelta(hours=1)
+            )
+            for i in range(2)
+        ]
+        dispatch_notifications()
+        [task_id] = ScheduledNotification.objects.values_list('task_id', flat=True).distinct()
+
+        # A task still shared with another booking is kept
+        bookings[0].status = 'Rejected'
+        with self.captureOnCommitCallbacks(execute=True):
+            bookings[0].save()
+        revoke.assert_not_called()
+        self.assertEqual(list(ScheduledNotification.objects.values_list('booking_id', flat=True)), [bookings[1].id])
+
+        bookings[1].start_time += timedelta(hours=3)
+        bookings[1].end_time += timedelta(hours=3)
+        with self.captureOnCommitCallbacks(execute=True):
+            bookings[1].save()
+        revoke.assert_called_once_with([task_id])
+        self.assertFalse(ScheduledNotification.objects.exists())
+        self.assertEqual(self.apply_coalesced.call_count, 1)
+
+    def test_scheduled_sends_skip_bookings_taken_out(self):
+        kept, removed = [self.book(timedelta(minutes=1), timedelta(hours=1)) for _ in range(2)]
+        for booking in (kept, removed):
+            ScheduledNotification.objects.create(
+                booking=booking, notification_type='started', send_at=booking.start_time, task_id='send-1'
+            )
+        with mock.patch('apps.classroom.tasks.current_app.control.revoke'):
+            revoke_scheduled_notifications([removed.id])
+
+        send_coalesced_notifications.apply(
+            args=[[kept.id, removed.id], 'started'], kwargs={'scheduled': True}, task_id='send-1'
+        )
+        self.assertEqual(list(NotificationLog.objects.values_list('booking_id', flat=True)), [kept.id])
+        self.assertFalse(ScheduledNotification.objects.exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class NotificationLedgerTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.faculty = User.objects.create_user(
+            email='faculty@example.com', password='secret', username='faculty', role='Faculty'
+        )
+        cls.batch = Batch.objects.create(name='CSE-21')
+        User.objects.create_user(
+            email='student@example.com', password='secret', username='student', role='Student', batch=cls.batch
+        )
+        cls.room = Rooms.objects.create(name='Room 1', campus='Main', capacity=40)
+
+    def setUp(self):
+        cache.clear()
+
+    def book(self, ended_ago):
+        now = timezone.now()
+        return Bookings.objects.create(
+            classroom=self.room, faculty=self.faculty, batch=self.batch, status='Approved',
+            start_time=now - ended_ago - timedelta(hours=1), end_time=now - ended_ago
+        )
+
+    def test_each_notification_is_sent_once(self):
+        booking = self.book(timedelta(minutes=5))
+        send_class_notification(booking.id, 'completed')
+        send_class_notification(booking.id, 'completed')
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(NotificationLog.objects.filter(booking=booking, notification_type='completed').count(), 1)
+
+    def test_failed_formatting_releases_the_claim(self):
+        booking = self.book(timedelta(minutes=5))
+        with mock.patch('apps.classroom.tasks.format_notification_email', side_effect=KeyError('subject')):
+            with self.assertRaises(KeyError):
+                send_class_notification(booking.id, 'completed')
+        self.assertFalse(NotificationLog.objects.exists())
+
+    @mock.patch('apps.classroom.tasks.send_coalesced_notifications.delay')
+    def test_cleanup_only_reads_bookings_ended_since_the_watermark(self, delay):
+        self.book(timedelta(days=30))
+        notified = self.book(timedelta(minutes=20))
+        NotificationLog.objects.create(booking=notified, notification_type='completed')
+        recent = [self.book(timedelta(minutes=minutes)) for minutes in (1, 2, 3, 10, 30)]
+
+        self.assertEqual(cleanup_old_bookings(chunk_size=2), 5)
+        # One coalesced send per keyset chunk, oldest first
+        self.assertEqual([call.args for call in delay.call_args_list], [
+            ([recent[4].id, recent[3].id], 'completed'),
+            ([recent[2].id, recent[1].id], 'completed'),
+            ([recent[0].id], 'completed'),
+        ])
+
+        delay.reset_mock()
+        self.assertEqual(cleanup_old_bookings(), 0)
+        fresh = self.book(timedelta(seconds=1))
+        TaskWatermark.objects.update(value=timezone.now() - timedelta(seconds=5))
+        self.assertEqual(cleanup_old_bookings(), 1)
+        delay.assert_called_once_with([fresh.id], 'completed')
+
+
+@override_settings(CACHES=LOCMEM_CACHES, NOTIFICATION_RECIPIENTS_PER_MESSAGE=50, NOTIFICATION_DEFAULT_MODE='each')
+class NotificationDeliveryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.faculty = User.objects.create_user(
+            email='faculty@example.com', password='secret', username='faculty', role='Faculty'
+        )
+        cls.batch = Batch.objects.create(name='CSE-21')
+        User.objects.bulk_create(
+            User(username=f'student-{i}', email=f'student-{i}@example.com', role='Student', batch=cls.batch)
+            for i in range(120)
+        )
+        room = Rooms.objects.create(name='Room 1', campus='Main', capacity=150)
+        now = timezone.now()
+        cls.bookings = [
+            Bookings.objects.create(
+                classroom=room, faculty=cls.faculty, batch=cls.batch, status='Approved',
+                start_time=now + timedelta(hours=hours), end_time=now + timedelta(hours=hours + 1)
+            )
+            for hours in (1, 3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        reset_pooled_connection()
+        self.addCleanup(reset_pooled_connection)
+
+    def test_recipients_are_chunked_over_one_pooled_connection(self):
+        with mock.patch('apps.classroom.delivery.get_connection', wraps=mail.get_connection) as get_connection:
+            for booking in self.bookings:
+                send_class_notification(booking.id, 'upcoming')
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual([len(message.to) for message in mail.outbox], [1, 50, 50, 20] * 2)
+        students = {address for message in mail.outbox[1:4] for address in message.to}
+        self.assertEqual(len(students), 120)
+
+    @mock.patch('apps.classroom.tasks.deliver_notification_chunk.apply_async')
+    def test_transient_chunk_failures_are_retried_alone(self, apply_async):
+        with mock.patch('apps.classroom.tasks.deliver_chunk', side_effect=[1, smtplib.SMTPServerDisconnected(), 1, 1]):
+            send_class_notification(self.bookings[0].id, 'started')
+        apply_async.assert_called_once()
+        subject, body, recipients, html = apply_async.call_args.kwargs['args']
+        self.assertEqual(len(recipients), 50)
+
+    @override_settings(NOTIFICATION_RECIPIENTS_PER_MESSAGE=60)
+    @mock.patch('apps.classroom.tasks.deliver_notification_chunk.apply_async')
+    def test_refused_messages_do_not_stop_the_rest(self, apply_async):
+        refused = smtplib.SMTPRecipientsRefused({'student-0@example.com': (550, b'no such user')})
+        with mock.patch('apps.classroom.tasks.deliver_chunk', side_effect=[1, refused, 1]) as deliver_chunk:
+            with self.assertLogs('apps.classroom.tasks', 'ERROR') as logs:
+                self.assertEqual(send_class_notification(self.bookings[1].id, 'started'), 3)
+        self.assertEqual([len(call.args[2]) for call in deliver_chunk.call_args_list], [1, 60, 60])
+        self.assertIn('60 recipient(s) was refused', logs.output[0])
+        apply_async.assert_not_called()
+
+    def test_unexpected_errors_do_not_stop_the_rest(self):
+        with mock.patch('apps.classroom.tasks.deliver_chunk', side_effect=[1, ValueError('bad header'), 1, 1]) as deliver_chunk:
+            with self.assertLogs('apps.classroom.tasks', 'ERROR') as logs:
+                self.assertEqual(send_class_notification(self.bookings[1].id, 'started'), 4)
+        self.assertEqual(deliver_chunk.call_count, 4)
+        self.assertIn('ValueError: bad header', logs.output[0])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BatchRecipientCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.batch = Batch.objects.create(name='CSE-21')
+        cls.other = Batch.objects.create(name='CSE-22')
+        cls.students = User.objects.bulk_create(
+            User(username=f'student-{i}', email=f'student-{i}@example.com', role='Student', batch=cls.batch)
+            for i in range(3)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_roster_is_read_once(self):
+        with self.assertNumQueries(1):
+            get_student_emails(self.batch)
+        with self.assertNumQueries(0):
+            emails = get_student_emails(self.batch)
+        self.assertEqual(emails, [f'student-{i}@example.com' for i in range(3)])
+        self.assertEqual(get_student_emails(self.other), [])
+
+    def test_relevant_user_changes_invalidate_both_batches(self):
+        get_student_emails(self.batch)
+        get_student_emails(self.other)
+        student = User.objects.get(id=self.students[0].id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            student.phone = '01700000000'
+            student.save()
+        with self.assertNumQueries(0):
+            get_student_emails(self.batch)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            student.batch = self.other
+            student.save()
+        self.assertEqual(len(get_student_emails(self.batch)), 2)
+        self.assertEqual(get_student_emails(self.other), ['student-0@example.com'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            student.delete()
+        self.assertEqual(get_student_emails(self.other), [])
+
+
+@override_settings(CACHES=LOCMEM_CACHES, NOTIFICATION_DEFAULT_MODE='digest')
+class CoalescedNotificationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.batch = Batch.objects.create(name='CSE-21')
+        cls.faculty = User.objects.bulk_create(
+            User(username=f'faculty-{i}', email=f'faculty-{i}@example.com', role='Faculty') for i in range(2)
+        )
+        students = User.objects.bulk_create(
+            User(username=name, email=f'{name}@example.com', role='Student', batch=cls.batch)
+            for name in ('each', 'off', 'default', 'digest')
+        )
+        NotificationPreference.objects.create(user=students[0], mode='each')
+        NotificationPreference.objects.create(user=students[1], mode='off')
+        NotificationPreference.objects.create(user=students[3], mode='digest')
+        cls.rooms = [Rooms.objects.create(name=f'Room {i}', campus='Main', capacity=40) for i in range(2)]
+
+    def setUp(self):
+        cache.clear()
+
+    def book(self, room, faculty, start, hours=1):
+        return Bookings.objects.create(
+            classroom=room, faculty=faculty, batch=self.batch, status='Approved',
+            start_time=start, end_time=start + timedelta(hours=hours)
+        )
+
+    def test_simultaneous_starts_are_coalesced_per_recipient(self):
+        start = timezone.now()
+        bookings = [self.book(room, faculty, start) for room, faculty in zip(self.rooms, self.faculty)]
+
+        self.assertEqual(send_coalesced_notifications([booking.id for booking in bookings], 'started'), 3)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox),
+                         ['each@example.com', 'faculty-0@example.com', 'faculty-1@example.com'])
+        [student_message] = [message for message in mail.outbox if message.to == ['each@example.com']]
+        self.assertIn('Room 0', student_message.body)
+        self.assertIn('Room 1', student_message.body)
+        [(html, mimetype)] = student_message.alternatives
+        self.assertEqual(mimetype, 'text/html')
+        self.assertIn('<strong>Room 1</strong>', html)
+
+        self.assertEqual(send_coalesced_notifications([booking.id for booking in bookings], 'started'), 0)
+
+    def test_digest_lists_the_window_and_recent_feedback_once(self):
+        today = timezone.localdate()
+        local = lambda day, hour: timezone.make_aware(datetime.combine(day, datetime.min.time()) + timedelta(hours=hour))
+        self.book(self.rooms[0], self.faculty[0], local(today, 9))
+        self.book(self.rooms[1], self.faculty[1], local(today, 11))
+        self.book(self.rooms[1], self.faculty[1], local(today, 14))
+        feedback_due = self.book(self.rooms[0], self.faculty[0], local(today - timedelta(days=1), 14))
+
+        # Marker get_or_create (a SELECT, then the INSERT inside a savepoint
+        # and its release), two booking queries and one roster query
+        with self.assertNumQueries(7):
+            self.assertEqual(send_batch_digests(now=local(today, 7.6)), 1)
+        [message] = mail.outbox
+        self.assertEqual(sorted(message.to), ['default@example.com', 'digest@example.com'])
+        self.assertIn('09:00 AM', message.body)
+        self.assertIn('11:00 AM', message.body)
+        self.assertNotIn('02:00 PM', message.body)
+        self.assertIn('provide feedback', message.body)
+        token = message.body.split('token=')[1].split()[0]
+        self.assertEqual(read_feedback_token(token), feedback_due.id)
+
+        self.assertEqual(send_batch_digests(now=local(today, 8)), 0)
+
+    def test_cleanup_prunes_old_digest_markers(self):
+        now = timezone.now()
+        TaskWatermark.objects.create(name='digest:old', value=now - timedelta(days=3))
+        TaskWatermark.objects.create(name='digest:recent', value=now - timedelta(hours=5))
+        cleanup_old_bookings()
+        self.assertEqual(
+            sorted(TaskWatermark.objects.values_list('name', flat=True)), ['cleanup_old_bookings', 'digest:recent']
+        )
+
+    def test_students_set_their_own_mode(self):
+        student = User.objects.get(username='off')
+        client = APIClient()
+        client.force_authenticate(student)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.put('/api/v1/notification-preferences', {'mode': 'each'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(client.get('/api/v1/notification-preferences').data['data']['mode'], 'each')
+        self.assertEqual(client.put('/api/v1/notification-preferences', {'mode': 'sms'}, format='json').status_code, 400)
+
+
+class NotificationTemplateTests(SimpleTestCase):
+
+    def setUp(self):
+        start = datetime(2026, 10, 19, 9, 0, tzinfo=timezone.get_current_timezone())
+        self.booking = Bookings(
+            classroom=Rooms(name='Lab <A>', campus='Main', capacity=40),
+            faculty=User(username='faculty-0', role='Faculty'),
+            batch=Batch(name='CSE-21'),
+            start_time=start, end_time=start + timedelta(minutes=90)
+        )
+
+    def test_text_parts_match_the_original_wording(self):
+        content = format_notification_email(self.booking, 'upcoming')
+        self.assertEqual(set(content), {'subject', 'faculty_message', 'student_message'})
+        self.assertEqual(content['subject'], 'Upcoming Class in Lab <A> - Starting in 10 minutes')
+        self.assertEqual(content['faculty_message'], (
+            "Dear faculty-0,\nYour class in Lab <A> will start in 10 minutes.\n\nDetails:\n"
+            "- Time: 09:00 AM - 10:30 AM\n- Batch: CSE-21\n- Campus: Main\n\n"
+            "Please ensure you reach the classroom on time."
+        ))
+
+    def test_only_requested_parts_are_rendered_and_html_is_escaped(self):
+        self.booking.batch = None
+        content = format_notification_email(self.booking, 'started', ('faculty_message', 'faculty_html'))
+        self.assertEqual(set(content), {'faculty_message', 'faculty_html'})
+        self.assertIn('- Batch: N/A', content['faculty_message'])
+        self.assertIn('<strong>Lab &lt;A&gt;</strong>', content['faculty_html'])
+
+    def test_completed_student_parts_link_to_feedback(self):
+        self.booking.id = 7
+        content = format_notification_email(self.booking, 'completed', ('student_message', 'student_html'))
+        token = content['student_message'].split('token=')[1].split()[0]
+        self.assertEqual(read_feedback_token(token), 7)
+        self.assertIn('<a href="http://', content['student_html'])
+        self.assertIn('- Feedback Required', format_notification_email(self.booking, 'completed')['subject'])
+
+
+class TaskRoutingTests(SimpleTestCase):
+
+    def route(self, name):
+        return celery_app.amqp.router.route({}, name)
+
+    def test_every_project_task_has_a_queue(self):
+        names = [name for name in celery_app.tasks if name.startswith('apps.')]
+        self.assertTrue(names)
+        for name in names:
+            self.assertIn(self.route(name)['queue'].name, {'scheduling', 'delivery', 'maintenance'}, name)
+
+    def test_first_sends_outrank_retries_on_the_delivery_queue(self):
+        send = self.route('apps.classroom.tasks.send_coalesced_notifications')
+        retry = self.route('apps.classroom.tasks.deliver_notification_chunk')
+        self.assertEqual(send['queue'].name, retry['queue'].name)
+        self.assertLess(send['priority'], retry['priority'])
+        self.assertTrue(celery_app.conf.task_ignore_result)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, NOTIFICATION_DEFAULT_MODE='each')
+class FeedbackTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.batch = Batch.objects.create(name='CSE-21')
+        cls.faculty = User.objects.create(username='faculty', email='faculty@example.com', role='Faculty')
+        cls.students = User.objects.bulk_create(
+            User(username=f'student-{i}', email=f'student-{i}@example.com', role='Student', batch=cls.batch)
+            for i in range(2)
+        )
+        cls.rooms = [Rooms.objects.create(name=f'Room {i}', campus='Main', capacity=40) for i in range(2)]
+        now = timezone.now()
+        cls.ended = Bookings.objects.create(
+            classroom=cls.rooms[0], faculty=cls.faculty, batch=cls.batch, status='Approved',
+            start_time=now - timedelta(hours=2), end_time=now - timedelta(hours=1)
+        )
+        cls.upcoming = Bookings.objects.create(
+            classroom=cls.rooms[0], faculty=cls.faculty, batch=cls.batch, status='Approved',
+            start_time=now + timedelta(hours=1), end_time=now + timedelta(hours=2)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def submit(self, token, student=None, **data):
+        self.client.force_authenticate(student or self.students[0])
+        return self.client.post('/api/v1/submit-feedback', {'token': token, **data}, format='json')
+
+    def test_signed_link_submits_once_and_updates_room_totals(self):
+        token = make_feedback_token(self.ended.id)
+        response = self.submit(token, cleanliness_issue=True, cleanliness_feedback='Dusty desks')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.submit(token, equipment_issue=True).status_code, 409)
+        # The link is shared by the batch; the signed-in student is who submits
+        self.assertEqual(self.submit(token, student=self.students[1]).status_code, 201)
+
+        stats = RoomFeedbackStats.objects.get(room=self.rooms[0])
+        self.assertEqual((stats.submissions, stats.cleanliness_issues, stats.equipment_issues), (2, 1, 0))
+
+    def test_tampered_expired_early_and_foreign_links_are_rejected(self):
+        token = make_feedback_token(self.ended.id)
+        self.assertEqual(self.submit(token[:-1] + ('A' if token[-1] != 'A' else 'B')).status_code, 400)
+        with override_settings(FEEDBACK_TOKEN_MAX_AGE=-1):
+            self.assertEqual(self.submit(token).status_code, 400)
+        self.assertEqual(self.submit(make_feedback_token(self.upcoming.id)).status_code, 400)
+        self.assertEqual(self.submit(token, student=self.faculty).status_code, 403)
+        outsider = User.objects.create(username='outsider', email='outsider@example.com', role='Student')
+        self.assertEqual(self.submit(token, student=outsider).status_code, 403)
+        self.client.force_authenticate(None)
+        self.assertEqual(
+            self.client.post('/api/v1/submit-feedback', {'token': token}, format='json').status_code, 401
+        )
+        self.assertFalse(Feedbacks.objects.exists())
+
+    def test_completion_emails_share_one_link_per_class(self):
+        send_class_notification(self.ended.id, 'completed')
+        [student_message] = [message for message in mail.outbox if message.to != ['faculty@example.com']]
+        self.assertEqual(sorted(student_message.to), ['student-0@example.com', 'student-1@example.com'])
+        token = student_message.body.split('token=')[1].split()[0]
+        self.assertEqual(read_feedback_token(token), self.ended.id)
+        self.assertIn('href="http', student_message.alternatives[0][0])
+
+    def test_dashboard_reads_room_totals(self):
+        feedbacks = [
+            Feedbacks.objects.create(booking=self.ended, student=student, equipment_issue=True)
+            for student in self.students
+        ]
+        feedbacks[0].cleanliness_issue = True
+        feedbacks[0].save()
+        feedbacks[1].delete()
+
+        self.client.force_authenticate(self.faculty)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/room-feedback-stats')
+        self.assertEqual(response.status_code, 200)
+        first, second = response.data['data']
+        self.assertEqual(
+            (first['submissions'], first['cleanliness_issues'], first['equipment_issues']), (1, 1, 1)
+        )
+        self.assertEqual((second['submissions'], second['cleanliness_issue_rate']), (0, None))
+
+        self.client.force_authenticate(self.students[0])
+        self.assertEqual(self.client.get('/api/v1/room-feedback-stats').status_code, 403)
+
+
+class BookedSecondsTests(SimpleTestCase):
+
+    def test_overlaps_count_once_and_bookings_are_clipped_per_day(self):
+        opens, closes = np.array([100, 1100]), np.array([200, 1200])
+        booked = booked_seconds(
+            [5, 7],
+            np.array([5, 5, 5, 7, 7]),
+            np.array([90, 120, 150, 1190, 300]),
+            np.array([150, 180, 1150, 1300, 400]),
+            opens, closes
+        )
+        # Room 5: 100-200 on day one (three overlapping pieces), 1100-1150 on
+        # day two; room 7: 1190-1200, plus one booking outside open hours
+        self.assertEqual(booked.tolist(), [[100, 50], [0, 10]])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class RoomUtilizationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.faculty = User.objects.create(username='faculty', email='faculty@example.com', role='Faculty')
+        cls.rooms = [
+            Rooms.objects.create(name='Lab', campus='Main', capacity=40, computer_count=30),
+            Rooms.objects.create(name='Hall', campus='Main', capacity=80, projector_count=1),
+        ]
+        cls.day = timezone.localdate() + timedelta(days=1)
+        for start, end in ((9, 11), (10, 12)):
+            cls.book(cls.rooms[0], start, end)
+
+    @classmethod
+    def book(cls, room, start, end, day=None):
+        midnight = datetime.combine(day or cls.day, datetime.min.time())
+        at = lambda hour: timezone.make_aware(midnight + timedelta(hours=hour))
+        return Bookings.objects.create(
+            classroom=room, faculty=cls.faculty, status='Approved', start_time=at(start), end_time=at(end)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.faculty)
+
+    def utilization(self, **params):
+        # Rooms are reported by campus and name: Hall, then Lab
+        response = self.client.get('/api/v1/room-utilization', {'from': self.day.isoformat(), 'days': 2, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data['data']
+
+    def test_booked_over_open_hours_per_room_campus_and_tier(self):
+        report = self.utilization()
+        self.assertEqual(report['periods'], [self.day.isoformat(), (self.day + timedelta(days=1)).isoformat()])
+        hall, lab = report['rooms']
+        self.assertEqual((lab['tier'], lab['booked_hours'], lab['utilization']), ('computer-lab', [3.0, 0.0], [0.25, 0.0]))
+        self.assertEqual((hall['tier'], hall['utilization']), ('multimedia', [0.0, 0.0]))
+        self.assertEqual(report['campuses'], [{'campus': 'Main', 'rooms': 2, 'utilization': [0.125, 0.0]}])
+        self.assertEqual([(row['tier'], row['utilization']) for row in report['breakdown']],
+                         [('computer-lab', [0.25, 0.0]), ('multimedia', [0.0, 0.0])])
+
+    def test_reports_are_cached_until_a_booking_is_written(self):
+        self.utilization()
+        with self.assertNumQueries(0):
+            self.utilization()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book(self.rooms[1], 8, 14, day=self.day + timedelta(days=1))
+        hall = self.utilization()['rooms'][0]
+        self.assertEqual(hall['utilization'], [0.0, 0.5])
+
+    def test_weeks_and_validation(self):
+        report = self.utilization(period='week', days=14)
+        self.assertIn(len(report['periods']), (2, 3))
+        self.assertEqual(sum(report['rooms'][1]['booked_hours']), 3.0)
+        response = self.client.get('/api/v1/room-utilization', {'period': 'month'})
+        self.assertEqual(response.status_code, 400)
@@ -4,7 +4,14 @@ from apps.classroom.views import *
 urlpatterns = [
     path("class-room-list", ClassroomListAPIView.as_view(), name="class-room-list"),
     path('create-booking', BookingCreateAPIView.as_view(), name='create_booking'),
+    path('create-bulk-booking', BulkBookingCreateAPIView.as_view(), name='create_bulk_booking'),
+    path('free-rooms', FreeRoomListAPIView.as_view(), name='free_rooms'),
+    path('free-slots', FreeSlotListAPIView.as_view(), name='free_slots'),
     path('my-bookings', MyBookingsAPIView.as_view(), name='my_bookings'),
     path('my-class-list', FacultyClassListAPIView.as_view(), name='my_class_list'),
+    path('notification-preferences', NotificationPreferenceAPIView.as_view(), name='notification_preferences'),
+    path('submit-feedback', FeedbackSubmitAPIView.as_view(), name='submit_feedback'),
+    path('room-feedback-stats', RoomFeedbackStatsAPIView.as_view(), name='room_feedback_stats'),
+    path('room-utilization', RoomUtilizationAPIView.as_view(), name='room_utilization'),
     path('global-class-list', GlobalClassroomListAPIView.as_view(), name='global_class_list'),
 ]
\ No newline at end of file
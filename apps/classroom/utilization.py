@@ -0,0 +1,186 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+import numpy as np
+from django.core.cache import cache
+from apps.classroom.models import Rooms
+from apps.classroom.free_slots import day_windows, booking_intervals
+from apps.classroom.room_status import SNAPSHOT_GENERATION_KEY
+
+UTILIZATION_KEY = 'classroom:utilization:{generation}:{campus}:{first_day}:{days}:{period}:{open}:{close}'
+# Booking and room writes move the snapshot generation, which retires every
+# cached report; the TTL only bounds how long unused reports linger
+UTILIZATION_TTL = 60 * 60
+
+# First matching (tier, equipment field) wins; rooms with neither are 'basic'
+EQUIPMENT_TIERS = (
+    ('computer-lab', 'computer_count'),
+    ('multimedia', 'projector_count'),
+)
+PERIODS = ('day', 'week')
+
+
+def equipment_tiers(counts):
+    """Tier name of every room from a {field: counts array} mapping"""
+    return np.select(
+        [counts[field] > 0 for tier, field in EQUIPMENT_TIERS],
+        [tier for tier, field in EQUIPMENT_TIERS],
+        default='basic'
+    )
+
+
+def booked_seconds(room_ids, booked_rooms, booked_starts, booked_ends, opens, closes):
+    """
+    [room, day] matrix of seconds booked inside each day's open hours.
+
+    Every booking is split into one piece per day window it touches and
+    clipped to it. The pieces are sorted per (room, day) and merged with a
+    running maximum, so overlapping bookings count once.
+    """
+    room_ids = np.asarray(room_ids, dtype=np.int64)
+    room_count = len(room_ids)
+    day_count = len(opens)
+    booked = np.zeros(room_count * day_count, dtype=np.int64)
+    if room_count == 0 or len(booked_starts) == 0:
+        return booked.reshape(room_count, day_count)
+
+    sorter = np.argsort(room_ids)
+    positions = sorter[np.searchsorted(room_ids, booked_rooms, sorter=sorter)]
+
+    # Day windows each booking touches: the first closing after its start up
+    # to the last opening before its end
+    first_day = np.searchsorted(closes, booked_starts, side='right')
+    last_day = np.searchsorted(opens, booked_ends, side='left') - 1
+    counts = np.maximum(last_day - first_day + 1, 0)
+    piece_booking = np.repeat(np.arange(len(booked_starts)), counts)
+    piece_offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    piece_day = np.repeat(first_day, counts) + piece_offsets
+
+    starts = np.maximum(booked_starts[piece_booking], opens[piece_day])
+    ends = np.minimum(booked_ends[piece_booking], closes[piece_day])
+    keep = ends > starts
+    groups = positions[piece_booking][keep] * day_count + piece_day[keep]
+    starts = starts[keep]
+    ends = ends[keep]
+    if len(groups) == 0:
+        return booked.reshape(room_count, day_count)
+
+    order = np.lexsort((starts, groups))
+    groups = groups[order]
+    starts = starts[order]
+    ends = ends[order]
+
+    # Shift each (room, day) onto its own stretch of the time line so one
+    # running maximum gives the furthest end seen so far within the group
+    span = int(closes[-1] - opens[0]) + 1
+    offsets = groups * span - int(opens[0])
+    reach = np.maximum.accumulate(ends + offsets) - offsets
+    covered_until = np.empty_like(reach)
+    covered_until[0] = starts[0]
+    covered_until[1:] = reach[:-1]
+    first_in_group = np.ones(len(groups), dtype=bool)
+    first_in_group[1:] = groups[1:] != groups[:-1]
+    covered_until[first_in_group] = starts[first_in_group]
+
+    added = np.maximum(ends - np.maximum(starts, covered_until), 0)
+    booked += np.bincount(groups, weights=added, minlength=room_count * day_count).astype(np.int64)
+    return booked.reshape(room_count, day_count)
+
+
+def period_labels(first_day, days, period):
+    """Label of every day (its own date, or the Monday of its week) and the distinct labels in order"""
+    dates = [first_day + timedelta(days=offset) for offset in range(days)]
+    if period == 'week':
+        dates = [day - timedelta(days=day.weekday()) for day in dates]
+    labels, day_period = np.unique(np.array([day.isoformat() for day in dates]), return_inverse=True)
+    return labels.tolist(), day_period
+
+
+def rates(booked, open_seconds):
+    return np.round(np.divide(booked, open_seconds, out=np.zeros(booked.shape), where=open_seconds > 0), 4).tolist()
+
+
+def compute_utilization(first_day, days, period, campus, open_time, close_time):
+    """
+    Booked hours divided by open hours per room and per day or week, with
+    totals per campus and per (campus, equipment tier).
+    """
+    rooms = Rooms.objects.order_by('campus', 'name', 'id')
+    if campus:
+        rooms = rooms.filter(campus=campus)
+    fields = ['id', 'name', 'campus'] + [field for tier, field in EQUIPMENT_TIERS]
+    rows = list(rooms.values_list(*fields))
+    columns = list(zip(*rows)) if rows else [[] for field in fields]
+    room_ids = np.array(columns[0], dtype=np.int64)
+    tiers = equipment_tiers({
+        field: np.array(columns[3 + position], dtype=np.int64)
+        for position, (tier, field) in enumerate(EQUIPMENT_TIERS)
+    })
+
+    opens, closes = day_windows(first_day, days, open_time, close_time)
+    range_start = datetime.fromtimestamp(int(opens[0]), tz=dt_timezone.utc)
+    range_end = datetime.fromtimestamp(int(closes[-1]), tz=dt_timezone.utc)
+    booked_rooms, booked_starts, booked_ends = booking_intervals(room_ids.tolist(), range_start, range_end)
+    booked = booked_seconds(room_ids, booked_rooms, booked_starts, booked_ends, opens, closes)
+
+    # Days -> periods as a 0/1 matrix, so each aggregation is one product
+    labels, day_period = period_labels(first_day, days, period)
+    to_period = np.zeros((days, len(labels)), dtype=np.int64)
+    to_period[np.arange(days), day_period] = 1
+    room_booked = booked @ to_period
+    open_seconds = (closes - opens) @ to_period
+
+    def totals(keys):
+        """Utilization of the rooms grouped by ``keys`` (one per room), one row per distinct key"""
+        distinct = sorted(set(keys))
+        position_of = {key: position for position, key in enumerate(distinct)}
+        group = np.array([position_of[key] for key in keys], dtype=np.int64)
+        group_booked = np.zeros((len(distinct), len(labels)), dtype=np.int64)
+        np.add.at(group_booked, group, room_booked)
+        room_counts = np.bincount(group, minlength=len(distinct))
+        return [
+            (key, int(room_counts[position]), rates(group_booked[position], open_seconds * room_counts[position]))
+            for position, key in enumerate(distinct)
+        ]
+
+    campuses = list(columns[2])
+    return {
+        'from': first_day.isoformat(),
+        'to': (first_day + timedelta(days=days - 1)).isoformat(),
+        'period': period,
+        'open': open_time.strftime('%H:%M'),
+        'close': close_time.strftime('%H:%M'),
+        'periods': labels,
+        'open_hours': np.round(open_seconds / 3600, 2).tolist(),
+        'rooms': [
+            {
+                'room_id': row[0],
+                'room': row[1],
+                'campus': row[2],
+                'tier': str(tiers[position]),
+                'booked_hours': np.round(room_booked[position] / 3600, 2).tolist(),
+                'utilization': rates(room_booked[position], open_seconds),
+            }
+            for position, row in enumerate(rows)
+        ],
+        'campuses': [
+            {'campus': key, 'rooms': count, 'utilization': utilization}
+            for key, count, utilization in totals(campuses)
+        ],
+        'breakdown': [
+            {'campus': room_campus, 'tier': tier, 'rooms': count, 'utilization': utilization}
+            for (room_campus, tier), count, utilization in totals(list(zip(campuses, tiers.tolist())))
+        ],
+    }
+
+
+def get_utilization(first_day, days, period, campus, open_time, close_time):
+    """Utilization report, cached per range, period and campus until the next booking or room write"""
+    generation = cache.get_or_set(SNAPSHOT_GENERATION_KEY, 0, timeout=None)
+    key = UTILIZATION_KEY.format(
+        generation=generation, campus=campus or '*', first_day=first_day.isoformat(), days=days, period=period,
+        open=open_time.strftime('%H%M'), close=close_time.strftime('%H%M')
+    )
+    report = cache.get(key)
+    if report is None:
+        report = compute_utilization(first_day, days, period, campus, open_time, close_time)
+        cache.set(key, report, UTILIZATION_TTL)
+    return report
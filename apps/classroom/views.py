@@ -1,14 +1,58 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from django.conf import settings
+from django.core import signing
 from django.utils import timezone
-from datetime import datetime
+from django.db import transaction, IntegrityError
+from django.db.models import Q
+from datetime import datetime, time, timedelta
 from rest_framework.permissions import IsAuthenticated
 from apps.authkit.authentication import CookieJWTAuthentication
 from apps.base.base_response import base_success_response, base_error_response
+from apps.base.base_pagination import encode_cursor, decode_cursor, keyset_pagination
 from apps.classroom.serializers import *
 from apps.classroom.models import *
-from apps.classroom.tasks import schedule_class_notifications
+from apps.classroom.tasks import queue_missed_notifications
+from apps.classroom.feedback import read_feedback_token
+from apps.classroom.bulk_booking import expand_recurrence, find_conflicts, lock_classrooms, MAX_BULK_OCCURRENCES
+from apps.classroom.signals import bookings_bulk_changed
+from apps.classroom.interval_index import booking_index
+from apps.classroom.free_slots import find_free_slots, free_rooms, DEFAULT_OPEN_TIME, DEFAULT_CLOSE_TIME
+from apps.classroom.utilization import get_utilization, PERIODS
+from apps.classroom.room_status import get_room_snapshot, filter_room_states, classroom_list_entry, global_list_entry
+
+ROOM_EQUIPMENT_FILTERS = [
+    'capacity',
+    'computer_count',
+    'projector_count',
+    'whiteboard_count',
+    'duster_count',
+    'marker_count',
+    'speaker_count',
+]
+
+def local_day_range(first_date, last_date):
+    """Aware [start of first_date, start of the day after last_date) in TIME_ZONE"""
+    return (
+        timezone.make_aware(datetime.combine(first_date, time.min)),
+        timezone.make_aware(datetime.combine(last_date + timedelta(days=1), time.min)),
+    )
+
+def get_room_filter_conditions(query_params):
+    """Build the `__gte` equipment filters and campus filter from query params"""
+    # Only add filters if the parameter exists and is not empty
+    filter_conditions = {}
+
+    for field in ROOM_EQUIPMENT_FILTERS:
+        if query_params.get(field):
+            filter_conditions[f'{field}__gte'] = int(query_params[field])
+
+    campus = query_params.get('campus')
+    if campus:
+        filter_conditions['campus'] = campus
+
+    return filter_conditions
 
 class ClassroomListAPIView(APIView):
     authentication_classes = [CookieJWTAuthentication]
@@ -19,34 +63,8 @@ class ClassroomListAPIView(APIView):
         
         # Handle query parameters with proper error handling
         try:
-            # Only add filters if the parameter exists and is not empty
-            filter_conditions = {}
-            
-            if request.query_params.get('capacity'):
-                filter_conditions['capacity__gte'] = int(request.query_params['capacity'])
-            
-            if request.query_params.get('computer_count'):
-                filter_conditions['computer_count__gte'] = int(request.query_params['computer_count'])
-                
-            if request.query_params.get('projector_count'):
-                filter_conditions['projector_count__gte'] = int(request.query_params['projector_count'])
-                
-            if request.query_params.get('whiteboard_count'):
-                filter_conditions['whiteboard_count__gte'] = int(request.query_params['whiteboard_count'])
-                
-            if request.query_params.get('duster_count'):
-                filter_conditions['duster_count__gte'] = int(request.query_params['duster_count'])
-                
-            if request.query_params.get('marker_count'):
-                filter_conditions['marker_count__gte'] = int(request.query_params['marker_count'])
-                
-            if request.query_params.get('speaker_count'):
-                filter_conditions['speaker_count__gte'] = int(request.query_params['speaker_count'])
-
-            # Handle campus filter
-            campus = request.query_params.get('campus')
-            if campus:
-                filter_conditions['campus'] = campus
+            filter_conditions = get_room_filter_conditions(request.query_params)
+            campus = filter_conditions.get('campus')
 
             # Store applied filters for response
             applied_filters = {
@@ -63,83 +81,18 @@ class ClassroomListAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Get filtered classrooms
-        classrooms = Rooms.objects.all()
-        if filter_conditions:
-            classrooms = classrooms.filter(**filter_conditions)
-
-        classroom_data = []
-
-        for classroom in classrooms:
-            # Rest of the code remains the same as before
-            current_booking = Bookings.objects.filter(
-                classroom=classroom,
-                start_time__lte=now,
-                end_time__gt=now,
-                status='Approved'
-            ).first()
-
-            future_bookings = Bookings.objects.filter(
-                classroom=classroom,
-                start_time__gt=now,
-                status='Approved'
-            ).order_by('start_time')
-
-            next_booking = future_bookings.first()
-
-            if current_booking:
-                time_until_free = round((current_booking.end_time - now).total_seconds() / 3600, 2)
-                total_duration = round((current_booking.end_time - current_booking.start_time).total_seconds() / 3600, 2)
-                time_elapsed = round((now - current_booking.start_time).total_seconds() / 3600, 2)
-                
-                status_text = (f"Occupied ({time_until_free:.2f} hours remaining out of {total_duration:.2f} hours, "
-                             f"{time_elapsed:.2f} hours elapsed)")
-                
-                current_booking_info = {
-                    'faculty': current_booking.faculty.username,
-                    'start_time': current_booking.start_time,
-                    'end_time': current_booking.end_time,
-                    'batch': current_booking.batch.name if current_booking.batch else None,
-                    'total_duration_hours': total_duration,
-                    'remaining_hours': time_until_free,
-                    'elapsed_hours': time_elapsed,
-                    'formatted_time': f"{current_booking.start_time.strftime('%I:%M %p')} - {current_booking.end_time.strftime('%I:%M %p')}"
-                }
-            else:
-                if next_booking:
-                    time_until_next = round((next_booking.start_time - now).total_seconds() / 3600, 2)
-                    if time_until_next <= 24:
-                        status_text = f"Available (Next class in {time_until_next:.1f} hours)"
-                    else:
-                        days_until_next = round(time_until_next / 24, 1)
-                        status_text = f"Available (Next class on {next_booking.start_time.strftime('%B %d at %I:%M %p')})"
-                else:
-                    status_text = "Available (No upcoming bookings)"
-                time_until_free = None
-                current_booking_info = None
-
-            next_bookings_info = []
-            for booking in future_bookings[:3]:
-                time_until_start = round((booking.start_time - now).total_seconds() / 3600, 2)
-                duration = round((booking.end_time - booking.start_time).total_seconds() / 3600, 2)
-                next_bookings_info.append({
-                    'start_time': booking.start_time,
-                    'end_time': booking.end_time,
-                    'faculty': booking.faculty.username,
-                    'batch': booking.batch.name if booking.batch else None,
-                    'duration_hours': duration,
-                    'hours_until_start': time_until_start,
-                    'formatted_time': f"{booking.start_time.strftime('%B %d, %I:%M %p')} - {booking.end_time.strftime('%I:%M %p')} ({duration} hours)"
-                })
-
-            classroom_data.append({
-                'classroom': RoomsSerializer(classroom).data,
-                'status': status_text,
-                'hours_until_free': time_until_free,
-                'current_booking': current_booking_info,
-                'upcoming_bookings': next_bookings_info,
-                'applied_filters': applied_filters
-            })
+        # Filter the cached campus snapshot instead of re-querying
+        minimums = {
+            key.replace('__gte', ''): value
+            for key, value in filter_conditions.items()
+            if key != 'campus'
+        }
+        states = filter_room_states(get_room_snapshot(campus, now), minimums)
+
+        classroom_data = [
+            classroom_list_entry(state, now, applied_filters)
+            for state in states
+        ]
         
         if len(classroom_data) == 0:
             return Response(
@@ -170,9 +123,9 @@ class BookingCreateAPIView(APIView):
         is_hoc_booking = request.data.get('is_hoc_booking', False)
 
         try:
-            start_time = datetime.strptime(start_time, "%Y-%m-%dT%H:%M:%S")
-            end_time = datetime.strptime(end_time, "%Y-%m-%dT%H:%M:%S")
-        except ValueError:
+            start_time = timezone.make_aware(datetime.strptime(start_time, "%Y-%m-%dT%H:%M:%S"))
+            end_time = timezone.make_aware(datetime.strptime(end_time, "%Y-%m-%dT%H:%M:%S"))
+        except (TypeError, ValueError):
             return Response(
                 base_error_response("Invalid date format. Please use YYYY-MM-DDTHH:MM:SS"),
                 status=status.HTTP_400_BAD_REQUEST
@@ -192,15 +145,10 @@ class BookingCreateAPIView(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        overlapping_booking = Bookings.objects.filter(
-            classroom=classroom,
-            start_time__lt=end_time,
-            end_time__gt=start_time
-        ).exists()
-
         booking_status = 'Pending' if is_hoc_booking else 'Approved'
         
-        if not is_hoc_booking and overlapping_booking:
+        # Cheap pre-check against the in-memory index of approved bookings
+        if not is_hoc_booking and booking_index.current().overlaps(classroom.id, start_time, end_time):
             return Response(
                 base_error_response("Classroom is already booked during this time."),
                 status=status.HTTP_400_BAD_REQUEST
@@ -214,28 +162,296 @@ class BookingCreateAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        booking = Bookings.objects.create(
-            classroom=classroom,
-            faculty=user,
-            batch=batch_obj,
-            start_time=start_time,
-            end_time=end_time,
-            is_hoc_booking=is_hoc_booking,
-            status=booking_status
-        )
+        try:
+            with transaction.atomic():
+                # Serialise bookings per classroom: the row lock is held until commit
+                lock_classrooms([classroom.id])
+
+                overlapping_booking = Bookings.objects.filter(
+                    classroom=classroom,
+                    status='Approved',
+                    start_time__lt=end_time,
+                    end_time__gt=start_time
+                ).exists()
+
+                if not is_hoc_booking and overlapping_booking:
+                    return Response(
+                        base_error_response("Classroom is already booked during this time."),
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+
+                booking = Bookings.objects.create(
+                    classroom=classroom,
+                    faculty=user,
+                    batch=batch_obj,
+                    start_time=start_time,
+                    end_time=end_time,
+                    is_hoc_booking=is_hoc_booking,
+                    status=booking_status
+                )
+        except IntegrityError:
+            # Raised by the PostgreSQL exclusion constraint on approved bookings
+            return Response(
+                base_error_response("Classroom is already booked during this time."),
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        # Schedule notifications if booking is approved
+        # The dispatcher picks up approved bookings on its own; only send
+        # times it has already swept past are queued here
         if booking_status == 'Approved':
-            schedule_class_notifications.delay(booking.id)
+            queue_missed_notifications([booking])
 
         return Response(
             base_success_response("Booking created successfully.", BookingsSerializer(booking).data),
             status=status.HTTP_201_CREATED
         )
         
+class BulkBookingCreateAPIView(APIView):
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def parse_occurrences(self, data):
+        """Occurrence dicts from an explicit list or a weekly recurrence rule"""
+        default_classroom_id = data.get('classroom_id')
+        recurrence = data.get('recurrence')
+
+        if recurrence:
+            first_start = timezone.make_aware(datetime.strptime(recurrence['start_time'], "%Y-%m-%dT%H:%M:%S"))
+            first_end = timezone.make_aware(datetime.strptime(recurrence['end_time'], "%Y-%m-%dT%H:%M:%S"))
+            until = datetime.strptime(recurrence['until'], "%Y-%m-%d").date()
+            interval_weeks = int(recurrence.get('interval_weeks', 1))
+            exclude_dates = [
+                datetime.strptime(value, "%Y-%m-%d").date()
+                for value in recurrence.get('exclude_dates', [])
+            ]
+            if interval_weeks < 1:
+                raise ValueError("interval_weeks must be positive")
+            windows = expand_recurrence(first_start, first_end, until, interval_weeks, exclude_dates)
+            occurrences = [
+                {'classroom_id': default_classroom_id, 'start_time': start, 'end_time': end}
+                for start, end in windows
+            ]
+        else:
+            occurrences = [
+                {
+                    'classroom_id': occurrence.get('classroom_id', default_classroom_id),
+                    'start_time': timezone.make_aware(datetime.strptime(occurrence['start_time'], "%Y-%m-%dT%H:%M:%S")),
+                    'end_time': timezone.make_aware(datetime.strptime(occurrence['end_time'], "%Y-%m-%dT%H:%M:%S")),
+                }
+                for occurrence in data.get('occurrences', [])
+            ]
+
+        for occurrence in occurrences:
+            occurrence['classroom_id'] = int(occurrence['classroom_id'])
+            if occurrence['start_time'] >= occurrence['end_time']:
+                raise ValueError("start_time must be before end_time")
+        return occurrences
+
+    def post(self, request):
+        user = request.user
+        is_hoc_booking = request.data.get('is_hoc_booking', False)
+
+        if user.role != 'Faculty':
+            return Response(
+                base_error_response("Only Faculty can book classrooms."),
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        try:
+            occurrences = self.parse_occurrences(request.data)
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            return Response(
+                base_error_response("Invalid occurrences. Provide 'occurrences' or a 'recurrence' rule with YYYY-MM-DDTHH:MM:SS times.", str(e)),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not occurrences:
+            return Response(
+                base_error_response("No occurrences to book."),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if len(occurrences) > MAX_BULK_OCCURRENCES:
+            return Response(
+                base_error_response(f"At most {MAX_BULK_OCCURRENCES} occurrences can be booked at once."),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            batch_obj = Batch.objects.get(name=request.data.get('batch'))
+        except Batch.DoesNotExist:
+            return Response(
+                base_error_response("Batch not found."),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        classroom_ids = {occurrence['classroom_id'] for occurrence in occurrences}
+        booking_status = 'Pending' if is_hoc_booking else 'Approved'
+
+        try:
+            with transaction.atomic():
+                rooms = lock_classrooms(classroom_ids)
+                if len(rooms) != len(classroom_ids):
+                    missing = sorted(classroom_ids - {room.id for room in rooms})
+                    return Response(
+                        base_error_response("Classroom not found.", {'classroom_ids': missing}),
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+
+                accepted, conflicts = find_conflicts(occurrences, check_existing=not is_hoc_booking)
+
+                bookings = Bookings.objects.bulk_create([
+                    Bookings(
+                        classroom_id=occurrences[position]['classroom_id'],
+                        faculty=user,
+                        batch=batch_obj,
+                        start_time=occurrences[position]['start_time'],
+                        end_time=occurrences[position]['end_time'],
+                        is_hoc_booking=is_hoc_booking,
+                        status=booking_status
+                    )
+                    for position in accepted
+                ], batch_size=1000)
+                booking_ids = [booking.id for booking in bookings]
+
+                # bulk_create sends no signals, so refresh caches explicitly
+                # once the rows are committed
+                transaction.on_commit(lambda: bookings_bulk_changed(classroom_ids))
+                if booking_status == 'Approved' and booking_ids:
+                    transaction.on_commit(lambda: queue_missed_notifications(bookings))
+        except IntegrityError:
+            # Raised by the PostgreSQL exclusion constraint on approved bookings
+            return Response(
+                base_error_response("Classroom is already booked during this time."),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not booking_ids:
+            return Response(
+                base_error_response("Classroom is already booked during every requested occurrence.", {'conflicts': conflicts}),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(
+            base_success_response(
+                f"Created {len(booking_ids)} booking(s), {len(conflicts)} occurrence(s) conflicted.",
+                {
+                    'created': len(booking_ids),
+                    'booking_ids': booking_ids,
+                    'conflicts': conflicts
+                }
+            ),
+            status=status.HTTP_201_CREATED
+        )
+
+class FreeRoomListAPIView(APIView):
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            start_time = timezone.make_aware(datetime.strptime(request.query_params.get('start'), "%Y-%m-%dT%H:%M:%S"))
+            end_time = timezone.make_aware(datetime.strptime(request.query_params.get('end'), "%Y-%m-%dT%H:%M:%S"))
+        except (TypeError, ValueError):
+            return Response(
+                base_error_response("Invalid date format. Please use YYYY-MM-DDTHH:MM:SS for start and end"),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if start_time >= end_time:
+            return Response(
+                base_error_response("start must be before end"),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            filter_conditions = get_room_filter_conditions(request.query_params)
+        except ValueError:
+            return Response(
+                base_error_response("Invalid filter parameters. Please ensure all counts are valid numbers."),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rooms = free_rooms(Rooms.objects.filter(**filter_conditions), start_time, end_time)
+
+        rooms_data = RoomsSerializer(rooms, many=True).data
+
+        if not rooms_data:
+            return Response(
+                base_error_response("No free classrooms found for the requested time"),
+                status=status.HTTP_200_OK
+            )
+
+        return Response(
+            base_success_response(f"Found {len(rooms_data)} free classroom(s)", rooms_data),
+            status=status.HTTP_200_OK
+        )
+        
+class FreeSlotListAPIView(APIView):
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    max_days = 62
+
+    def get(self, request):
+        try:
+            if request.query_params.get('from'):
+                first_day = datetime.strptime(request.query_params['from'], '%Y-%m-%d').date()
+            else:
+                first_day = timezone.localdate()
+            days = int(request.query_params.get('days', 14))
+            min_minutes = int(request.query_params.get('min_minutes', 30))
+            open_time = datetime.strptime(request.query_params.get('open', DEFAULT_OPEN_TIME), '%H:%M').time()
+            close_time = datetime.strptime(request.query_params.get('close', DEFAULT_CLOSE_TIME), '%H:%M').time()
+            filter_conditions = get_room_filter_conditions(request.query_params)
+        except ValueError:
+            return Response(
+                base_error_response("Invalid parameters. Use YYYY-MM-DD for from, HH:MM for open/close and numbers for counts."),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not 1 <= days <= self.max_days or min_minutes < 1 or open_time >= close_time:
+            return Response(
+                base_error_response(f"days must be between 1 and {self.max_days}, min_minutes positive and open before close"),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        classrooms = Rooms.objects.filter(**filter_conditions)
+        free_slots = find_free_slots(classrooms, first_day, days, min_minutes, open_time, close_time)
+
+        rooms_data = []
+        for classroom, slots in free_slots:
+            if not slots:
+                continue
+            rooms_data.append({
+                'classroom': RoomsSerializer(classroom).data,
+                'slots': [
+                    {
+                        'date': start.strftime('%Y-%m-%d'),
+                        'start_time': start.isoformat(),
+                        'end_time': end.isoformat(),
+                        'minutes': int((end - start).total_seconds() // 60),
+                        'formatted_time': f"{start.strftime('%I:%M %p')} - {end.strftime('%I:%M %p')}"
+                    }
+                    for start, end in slots
+                ]
+            })
+
+        if not rooms_data:
+            return Response(
+                base_error_response("No free slots found matching the specified criteria"),
+                status=status.HTTP_200_OK
+            )
+
+        return Response(
+            base_success_response(f"Found free slots in {len(rooms_data)} classroom(s)", rooms_data),
+            status=status.HTTP_200_OK
+        )
+        
 class MyBookingsAPIView(APIView):
     authentication_classes = [CookieJWTAuthentication]
     permission_classes = [IsAuthenticated]
+    default_page_size = 50
+    max_page_size = 200
 
     def get(self, request):
         if request.user.role != 'Faculty':
@@ -264,8 +480,36 @@ class MyBookingsAPIView(APIView):
             elif date_range == 'past':
                 bookings = bookings.filter(end_time__lt=now)
         
-        # Order by start time
-        bookings = bookings.order_by('start_time')
+        # Resume after the last row of the previous page
+        try:
+            page_size = min(max(int(request.query_params.get('page_size', self.default_page_size)), 1), self.max_page_size)
+            cursor = request.query_params.get('cursor')
+            if cursor:
+                cursor_start, cursor_id = decode_cursor(cursor)
+                cursor_start = datetime.fromisoformat(cursor_start)
+                bookings = bookings.filter(
+                    Q(start_time__gt=cursor_start) | Q(start_time=cursor_start, id__gt=int(cursor_id))
+                )
+        except (TypeError, ValueError):
+            return Response(
+                base_error_response("Invalid pagination parameters"),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Keyset order on (start_time, id), one row past the page to detect more
+        bookings = list(
+            bookings.select_related('classroom', 'batch').only(
+                'start_time', 'end_time', 'status',
+                'classroom__name', 'classroom__campus', 'classroom__capacity',
+                'classroom__computer_count', 'classroom__projector_count',
+                'classroom__whiteboard_count', 'classroom__speaker_count',
+                'batch__name'
+            ).order_by('start_time', 'id')[:page_size + 1]
+        )
+        next_cursor = None
+        if len(bookings) > page_size:
+            bookings = bookings[:page_size]
+            next_cursor = encode_cursor(bookings[-1].start_time.isoformat(), bookings[-1].id)
         
         bookings_data = []
         for booking in bookings:
@@ -307,7 +551,8 @@ class MyBookingsAPIView(APIView):
         return Response(
             base_success_response(
                 "Bookings retrieved successfully",
-                bookings_data  # Direct list of bookings
+                bookings_data,  # Direct list of bookings
+                pagination=keyset_pagination(page_size, next_cursor)
             ),
             status=status.HTTP_200_OK
         )
@@ -316,6 +561,7 @@ class MyBookingsAPIView(APIView):
 class FacultyClassListAPIView(APIView):
     authentication_classes = [CookieJWTAuthentication]
     permission_classes = [IsAuthenticated]
+    max_days = 62
 
     def get(self, request):
         if request.user.role != 'Faculty':
@@ -326,25 +572,40 @@ class FacultyClassListAPIView(APIView):
 
         now = timezone.now()
         
-        # Get query parameters for filtering
+        # Get query parameters for filtering: a single `date`, or a `from`/`to` range
         date_filter = request.query_params.get('date')
+        from_filter = request.query_params.get('from')
+        to_filter = request.query_params.get('to')
         try:
-            if date_filter:
-                filter_date = datetime.strptime(date_filter, '%Y-%m-%d').date()
+            if from_filter or to_filter:
+                first_date = datetime.strptime(from_filter or to_filter, '%Y-%m-%d').date()
+                last_date = datetime.strptime(to_filter or from_filter, '%Y-%m-%d').date()
+            elif date_filter:
+                first_date = last_date = datetime.strptime(date_filter, '%Y-%m-%d').date()
             else:
-                filter_date = now.date()
+                first_date = last_date = timezone.localdate()
         except ValueError:
             return Response(
                 base_error_response("Invalid date format. Use YYYY-MM-DD"),
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Get faculty's bookings for the specified date
+        if not 0 <= (last_date - first_date).days < self.max_days:
+            return Response(
+                base_error_response(f"'to' must be on or after 'from' and at most {self.max_days} days later"),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Get faculty's bookings for the requested days
         # Changed to include all statuses, not just Approved
+        # Half-open [first day 00:00, day after last 00:00) in TIME_ZONE keeps
+        # start_time bare so the (faculty, start_time) index can be used
+        range_start, range_end = local_day_range(first_date, last_date)
         bookings = Bookings.objects.filter(
             faculty=request.user,
-            start_time__date=filter_date
-        ).order_by('start_time')
+            start_time__gte=range_start,
+            start_time__lt=range_end
+        ).select_related('batch', 'classroom').order_by('start_time')
 
         classes = []
         for booking in bookings:
@@ -373,15 +634,27 @@ class FacultyClassListAPIView(APIView):
                 'class_status': class_status
             })
 
+        if first_date == last_date:
+            period = first_date.strftime('%B %d, %Y')
+        else:
+            period = f"{first_date.strftime('%B %d, %Y')} - {last_date.strftime('%B %d, %Y')}"
+
         if not classes:
             return Response(
-                base_error_response(f"No classes found for {filter_date.strftime('%B %d, %Y')}"),
+                base_error_response(f"No classes found for {period}"),
                 status=status.HTTP_200_OK
             )
+
+        if from_filter or to_filter:
+            classes_by_date = {}
+            for booking, class_data in zip(bookings, classes):
+                local_date = timezone.localtime(booking.start_time).strftime('%Y-%m-%d')
+                classes_by_date.setdefault(local_date, []).append(class_data)
+            classes = classes_by_date
             
         return Response(
             base_success_response(
-                f"Classes for {filter_date.strftime('%B %d, %Y')}",
+                f"Classes for {period}",
                 classes
             ),
             status=status.HTTP_200_OK
@@ -393,64 +666,10 @@ class GlobalClassroomListAPIView(APIView):
 
     def get(self, request):
         now = timezone.now()
-        classrooms = Rooms.objects.all()
-        
-        classroom_list = []
-        
-        for classroom in classrooms:
-            # Get current booking
-            current_booking = Bookings.objects.filter(
-                classroom=classroom,
-                start_time__lte=now,
-                end_time__gt=now,
-                status='Approved'
-            ).first()
-
-            # Get next booking if room is currently occupied
-            if current_booking:
-                free_time = current_booking.end_time
-            else:
-                next_booking = Bookings.objects.filter(
-                    classroom=classroom,
-                    start_time__gt=now,
-                    status='Approved'
-                ).order_by('start_time').first()
-                
-                # If there's no next booking, use current time as free time
-                free_time = next_booking.start_time if next_booking else now
-
-            # Create the classroom object with the specified structure
-            classroom_obj = {
-                "id": classroom.id,
-                "name": classroom.name,
-                "capacity": classroom.capacity,
-                "available": not current_booking,
-                "freeTime": free_time.isoformat(),
-                "equipment": {
-                    "computers": classroom.computer_count,
-                    "projectors": classroom.projector_count,
-                    "whiteboards": classroom.whiteboard_count,
-                    "dusters": classroom.duster_count,
-                    "speakers": classroom.speaker_count,
-                    "markers": classroom.marker_count
-                }
-            }
-
-            # Add additional useful information
-            classroom_obj.update({
-                "campus": classroom.campus,
-                "current_status": {
-                    "occupied": bool(current_booking),
-                    "current_booking": {
-                        "faculty": current_booking.faculty.username,
-                        "batch": current_booking.batch.name,
-                        "start_time": current_booking.start_time.isoformat(),
-                        "end_time": current_booking.end_time.isoformat()
-                    } if current_booking else None
-                }
-            })
-
-            classroom_list.append(classroom_obj)
+        classroom_list = [
+            global_list_entry(state, now)
+            for state in get_room_snapshot(None, now)
+        ]
 
         # Sort classrooms: available rooms first, then by free time
         classroom_list.sort(key=lambda x: (not x['available'], x['freeTime']))
@@ -464,4 +683,201 @@ class GlobalClassroomListAPIView(APIView):
         return Response(
             base_success_response("Classroom list retrieved successfully", classroom_list),
             status=status.HTTP_200_OK
-        )
\ No newline at end of file
+        )
+class NotificationPreferenceAPIView(APIView):
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        mode = NotificationPreference.objects.filter(user_id=request.user.id).values_list('mode', flat=True).first()
+        return Response(
+            base_success_response("Notification preference fetched successfully.", {
+                'mode': mode or settings.NOTIFICATION_DEFAULT_MODE,
+                'modes': dict(NotificationPreference.MODE_CHOICES),
+            }),
+            status=status.HTTP_200_OK
+        )
+
+    def put(self, request):
+        if request.user.role != 'Student':
+            return Response(
+                base_error_response("Only Students can change notification preferences"),
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        mode = request.data.get('mode')
+        if mode not in dict(NotificationPreference.MODE_CHOICES):
+            return Response(
+                base_error_response(f"mode must be one of: {', '.join(dict(NotificationPreference.MODE_CHOICES))}"),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        NotificationPreference.objects.update_or_create(user_id=request.user.id, defaults={'mode': mode})
+        return Response(
+            base_success_response("Notification preference updated successfully.", {'mode': mode}),
+            status=status.HTTP_200_OK
+        )
+
+class FeedbackSubmitAPIView(APIView):
+    """
+    Feedback from the signed link in a completion email or digest. The link
+    names the booking and is shared by the whole batch; the student is the
+    signed-in user.
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if request.user.role != 'Student':
+            return Response(
+                base_error_response("Only Students can submit feedback"),
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        serializer = FeedbackSubmissionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                base_error_response("Invalid feedback.", serializer.errors),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        data = serializer.validated_data
+
+        try:
+            booking_id = read_feedback_token(data['token'])
+        except signing.SignatureExpired:
+            return Response(
+                base_error_response("This feedback link has expired."),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except signing.BadSignature:
+            return Response(
+                base_error_response("Invalid feedback link."),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        booking = Bookings.objects.select_related('classroom').filter(id=booking_id, status='Approved').first()
+        if booking is None:
+            return Response(
+                base_error_response("This feedback link is no longer valid."),
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if booking.batch_id is None or booking.batch_id != request.user.batch_id:
+            return Response(
+                base_error_response("You can only give feedback on your own batch's classes."),
+                status=status.HTTP_403_FORBIDDEN
+            )
+        if booking.end_time > timezone.now():
+            return Response(
+                base_error_response("Feedback opens once the class has ended."),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            # The room totals are updated in the same transaction (see signals)
+            with transaction.atomic():
+                feedback = Feedbacks.objects.create(
+                    booking=booking,
+                    student=request.user,
+                    cleanliness_issue=data['cleanliness_issue'],
+                    equipment_issue=data['equipment_issue'],
+                    cleanliness_feedback=data.get('cleanliness_feedback'),
+                    equipment_feedback=data.get('equipment_feedback')
+                )
+        except IntegrityError:
+            return Response(
+                base_error_response("Feedback for this class has already been submitted."),
+                status=status.HTTP_409_CONFLICT
+            )
+
+        return Response(
+            base_success_response("Thank you for your feedback.", {
+                'feedback_id': feedback.id,
+                'room': booking.classroom.name,
+                'cleanliness_issue': feedback.cleanliness_issue,
+                'equipment_issue': feedback.equipment_issue,
+            }),
+            status=status.HTTP_201_CREATED
+        )
+
+class RoomFeedbackStatsAPIView(APIView):
+    """Per-room feedback totals, read from the running aggregates in one query"""
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if request.user.role not in ('Admin', 'Faculty'):
+            return Response(
+                base_error_response("Only Admins and Faculty can view room feedback"),
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        rooms = Rooms.objects.order_by('campus', 'name')
+        campus = request.query_params.get('campus')
+        if campus:
+            rooms = rooms.filter(campus=campus)
+
+        # Rooms without feedback yet have no stats row and come back as zeros
+        rows = rooms.values_list(
+            'id', 'name', 'campus', 'feedback_stats__submissions',
+            'feedback_stats__cleanliness_issues', 'feedback_stats__equipment_issues'
+        )
+        stats = []
+        for room_id, name, room_campus, *totals in rows:
+            submissions, cleanliness_issues, equipment_issues = (total or 0 for total in totals)
+            stats.append({
+                'room_id': room_id,
+                'room': name,
+                'campus': room_campus,
+                'submissions': submissions,
+                'cleanliness_issues': cleanliness_issues,
+                'equipment_issues': equipment_issues,
+                'cleanliness_issue_rate': round(cleanliness_issues / submissions, 3) if submissions else None,
+                'equipment_issue_rate': round(equipment_issues / submissions, 3) if submissions else None,
+            })
+
+        return Response(
+            base_success_response("Room feedback stats retrieved successfully", stats),
+            status=status.HTTP_200_OK
+        )
+
+class RoomUtilizationAPIView(APIView):
+    """Booked hours over open hours per room and day or week, with campus and equipment tier totals"""
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    max_days = 366
+
+    def get(self, request):
+        if request.user.role not in ('Admin', 'Faculty'):
+            return Response(
+                base_error_response("Only Admins and Faculty can view room utilization"),
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        try:
+            if request.query_params.get('from'):
+                first_day = datetime.strptime(request.query_params['from'], '%Y-%m-%d').date()
+            else:
+                first_day = timezone.localdate()
+            days = int(request.query_params.get('days', 7))
+            open_time = datetime.strptime(request.query_params.get('open', DEFAULT_OPEN_TIME), '%H:%M').time()
+            close_time = datetime.strptime(request.query_params.get('close', DEFAULT_CLOSE_TIME), '%H:%M').time()
+        except ValueError:
+            return Response(
+                base_error_response("Invalid parameters. Use YYYY-MM-DD for from, HH:MM for open/close and a number for days."),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        period = request.query_params.get('period', 'day')
+        if not 1 <= days <= self.max_days or open_time >= close_time or period not in PERIODS:
+            return Response(
+                base_error_response(
+                    f"days must be between 1 and {self.max_days}, open before close and period one of: {', '.join(PERIODS)}"
+                ),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        report = get_utilization(first_day, days, period, request.query_params.get('campus'), open_time, close_time)
+        return Response(
+            base_success_response("Room utilization retrieved successfully", report),
+            status=status.HTTP_200_OK
+        )
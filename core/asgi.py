@@ -3,14 +3,30 @@ ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Under ASGI, requests resolve against settings.ASGI_ROOT_URLCONF, so
+api/v1/login and api/v1/async-login both await password checks on the bounded
+hashing pool (apps/authkit/hashing_pool.py) instead of holding a worker while
+PBKDF2 runs.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup(set_prefix=False)
+
+
+class ClassroomASGIHandler(ASGIHandler):
+
+    async def get_response_async(self, request):
+        request.urlconf = settings.ASGI_ROOT_URLCONF
+        return await super().get_response_async(request)
+
 
-application = get_asgi_application()
+application = ClassroomASGIHandler()
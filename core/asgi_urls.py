@@ -0,0 +1,8 @@
+from django.urls import path
+from apps.authkit.views import AsyncLoginView
+from core.urls import urlpatterns as wsgi_urlpatterns
+
+# Same routes as core.urls, except api/v1/login awaits the hashing pool
+urlpatterns = [
+    path('api/v1/login', AsyncLoginView.as_view(), name='login'),
+] + wsgi_urlpatterns
@@ -1,6 +1,7 @@
 import os
 from celery import Celery
 from celery.schedules import crontab
+from kombu import Queue
 from django.conf import settings
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
@@ -15,13 +16,60 @@ app.conf.update(
     beat_max_loop_interval=300,  # 5 minutes
 )
 
+# Queue topology: time-critical sends never wait behind bulk maintenance.
+# Each queue gets its own worker, sized for its work:
+#   celery -A core worker -n scheduling@%h -Q scheduling -c 1 --prefetch-multiplier 1
+#   celery -A core worker -n delivery@%h -Q delivery -c 8 --prefetch-multiplier 1
+#   celery -A core worker -n maintenance@%h -Q maintenance,celery -c 2 --prefetch-multiplier 4
+# Within the delivery queue first attempts (priority 0) go ahead of digests
+# and retries; on Redis lower numbers are served first.
+app.conf.update(
+    task_queues=(
+        Queue('scheduling'),
+        Queue('delivery'),
+        Queue('maintenance'),
+        Queue('celery'),
+    ),
+    task_routes={
+        'apps.classroom.tasks.dispatch_notifications': {'queue': 'scheduling'},
+        'apps.classroom.tasks.schedule_class_notifications': {'queue': 'scheduling'},
+        'apps.classroom.tasks.schedule_bulk_class_notifications': {'queue': 'scheduling'},
+        'apps.classroom.tasks.send_coalesced_notifications': {'queue': 'delivery', 'priority': 0},
+        'apps.classroom.tasks.send_class_notification': {'queue': 'delivery', 'priority': 0},
+        'apps.classroom.tasks.send_batch_digests': {'queue': 'delivery', 'priority': 3},
+        'apps.classroom.tasks.deliver_notification_chunk': {'queue': 'delivery', 'priority': 6},
+        'apps.classroom.tasks.cleanup_old_bookings': {'queue': 'maintenance'},
+        'apps.authkit.tasks.prune_expired_tokens': {'queue': 'maintenance'},
+    },
+    broker_transport_options={
+        'priority_steps': list(range(10)),
+        'sep': ':',
+        'queue_order_strategy': 'priority',
+    },
+    # Every task is fire-and-forget; nothing reads results back
+    task_ignore_result=True,
+    worker_prefetch_multiplier=1,
+)
+
 # Load tasks from all registered apps
 app.autodiscover_tasks()
 
 # Configure periodic tasks
 app.conf.beat_schedule = {
+    'dispatch-notifications': {
+        'task': 'apps.classroom.tasks.dispatch_notifications',
+        'schedule': 60.0,
+    },
+    'send-batch-digests': {
+        'task': 'apps.classroom.tasks.send_batch_digests',
+        'schedule': crontab(minute='*/5'),
+    },
     'cleanup-old-bookings': {
         'task': 'apps.classroom.tasks.cleanup_old_bookings',
         'schedule': crontab(minute='*/15'),
     },
+    'prune-expired-tokens': {
+        'task': 'apps.authkit.tasks.prune_expired_tokens',
+        'schedule': crontab(minute=30),
+    },
 }
\ No newline at end of file
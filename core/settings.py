@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 import os
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 
@@ -86,6 +87,18 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock when an atomic block starts so concurrent
+            # booking transactions queue instead of failing mid-way
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # A file-backed test database so threaded tests get real locking
+        # instead of shared-cache "table is locked" errors; kept out of the
+        # project tree
+        'TEST': {
+            'NAME': Path(tempfile.gettempdir()) / 'classroom_test_db.sqlite3',
+        },
     }
 }
 
@@ -211,7 +224,6 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
-CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
 
 CACHES = {
@@ -219,4 +231,29 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.redis.RedisCache',
         'LOCATION': 'redis://localhost:6379/1',
     }
-}
\ No newline at end of file
+}
+# Login password hashing pool
+LOGIN_HASH_WORKERS = os.cpu_count() or 1
+LOGIN_HASH_QUEUE = 32
+LOGIN_RETRY_AFTER = 2
+# URLconf core/asgi.py resolves requests against; it serves api/v1/login with
+# the async view, which does not hold a worker while the password is hashed
+ASGI_ROOT_URLCONF = 'core.asgi_urls'
+
+# Class notification delivery
+NOTIFICATION_RECIPIENTS_PER_MESSAGE = 50
+NOTIFICATION_RETRY_BACKOFF = 30
+NOTIFICATION_MAX_RETRIES = 5
+# Students without a NotificationPreference: 'each', 'digest' or 'off'.
+# Digests skip classes booked after their window was sent, classes outside
+# every window and the "starting soon" reminder, so they stay opt-in
+NOTIFICATION_DEFAULT_MODE = 'each'
+# Digests as (local send time, first class start, last class start) per day
+NOTIFICATION_DIGEST_WINDOWS = [
+    ('07:30', '08:00', '13:00'),
+    ('12:30', '13:00', '21:00'),
+]
+
+# Classroom feedback links in completion emails and digests
+FEEDBACK_URL = 'http://localhost:3000/feedback?token={token}'
+FEEDBACK_TOKEN_MAX_AGE = 60 * 60 * 24 * 7